@@ -1,6 +1,6 @@
 # Abstract base class for all agents
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -22,6 +22,10 @@ class BaseAgent(ABC):
         """Calculate confidence score for handling this message"""
         pass
     
+    def retrieval_plan(self, query: str) -> List[Tuple[str, str, int]]:
+        """Knowledge base searches this agent runs for a message, as (collection, query, limit)"""
+        return []
+    
     def can_handle(self, message: Message) -> bool:
         """Check if agent can handle this message type"""
         return self.get_confidence_score(message) >= self.confidence_threshold
\ No newline at end of file
@@ -3,9 +3,8 @@ LangGraph Orchestrator - Real Implementation
 Uses actual LangGraph for multi-agent workflow orchestration
 """
 
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List, Tuple
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from pydantic import BaseModel, Field
 import asyncio
 import time
@@ -20,11 +19,25 @@ from app.agents.product_agent import ProductAgent
 from app.agents.refund_agent import RefundAgent
 from app.agents.technical_agent import TechnicalAgent
 from app.database.models import Message, ChatResponse, MessageType
-from app.database.redis_client import RedisClient
+from app.services.cache_service import CacheService, cache_service
+from app.services.conversation_memory import bind_conversation
+from app.core.deadlines import deadline_scope
+from app.services.resource_registry import ResourceRegistry, resource_registry
+from app.services.semantic_cache import extract_entity_key, normalize_query
+from app.services.streaming import StreamSink, bind_sink, current_sink, emit_event, emit_full_response
+from app.core.config import settings
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Agent mapping based on intent
+INTENT_AGENT_MAPPING = {
+    "product_inquiry": "ProductAgent",
+    "refund_request": "RefundAgent",
+    "technical_issue": "TechnicalAgent",
+    "general_question": "ProductAgent"  # Default
+}
+
 class ConversationState(BaseModel):
     """State object for LangGraph workflow"""
     user_id: str
@@ -39,20 +52,34 @@ class ConversationState(BaseModel):
     sources: List[str] = Field(default_factory=list)
     suggestions: List[str] = Field(default_factory=list)
     error: str = ""
+    cache_bypass: bool = False
+    cache_status: str = ""
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 class LangGraphOrchestrator:
     """Real LangGraph implementation for multi-agent orchestration"""
     
-    def __init__(self):
-        self.router = RouterAgent()
+    def __init__(self, registry: ResourceRegistry = None, cache: CacheService = None):
+        # All agents share one LLM client, embeddings model and Chroma client
+        self.registry = registry or resource_registry
+        langchain_client = self.registry.get_llm_client()
+        chroma_client = self.registry.get_chroma_client()
+        
+        self.router = RouterAgent(
+            langchain_client=langchain_client,
+            cascade=self.registry.get_intent_router()
+        )
         self.agents = {
-            "ProductAgent": ProductAgent(),
-            "RefundAgent": RefundAgent(),
-            "TechnicalAgent": TechnicalAgent()
+            "ProductAgent": ProductAgent(langchain_client=langchain_client, chroma_client=chroma_client),
+            "RefundAgent": RefundAgent(langchain_client=langchain_client, chroma_client=chroma_client),
+            "TechnicalAgent": TechnicalAgent(langchain_client=langchain_client, chroma_client=chroma_client)
         }
-        self.redis_client = RedisClient()
-        self.memory = MemorySaver()
+        self.chroma_client = chroma_client
+        self.redis_client = self.registry.get_redis_client()
+        self.conversation_memory = self.registry.get_conversation_memory()
+        self.cache_service = cache or cache_service
+        self.memory = self.registry.get_checkpointer()
+        self.single_flight = self.registry.get_single_flight()
         self.workflow = self._create_workflow()
     
     def _create_workflow(self):
@@ -64,7 +91,9 @@ class LangGraphOrchestrator:
         # Add nodes (each step in the workflow)
         workflow.add_node("classify_intent", self._classify_intent_node)
         workflow.add_node("route_to_agent", self._route_to_agent_node)
+        workflow.add_node("check_cache", self._check_cache_node)
         workflow.add_node("process_with_agent", self._process_with_agent_node)
+        workflow.add_node("write_cache", self._write_cache_node)
         workflow.add_node("generate_suggestions", self._generate_suggestions_node)
         workflow.add_node("handle_error", self._handle_error_node)
         
@@ -85,21 +114,32 @@ class LangGraphOrchestrator:
             "route_to_agent",
             self._should_continue_after_routing,
             {
-                "continue": "process_with_agent",
+                "continue": "check_cache",
                 "error": "handle_error"
             }
         )
         
+        # Cache hits skip retrieval and generation entirely
+        workflow.add_conditional_edges(
+            "check_cache",
+            self._should_process_after_cache_check,
+            {
+                "hit": "generate_suggestions",
+                "miss": "process_with_agent"
+            }
+        )
+        
         workflow.add_conditional_edges(
             "process_with_agent",
             self._should_continue_after_processing,
             {
-                "continue": "generate_suggestions",
+                "continue": "write_cache",
                 "error": "handle_error"
             }
         )
         
         # Add edges to END
+        workflow.add_edge("write_cache", "generate_suggestions")
         workflow.add_edge("generate_suggestions", END)
         workflow.add_edge("handle_error", END)
         
@@ -118,8 +158,9 @@ class LangGraphOrchestrator:
                 conversation_id=state.conversation_id
             )
             
-            # Get intent classification
-            intent_scores = await self.router.classify_intent(message.content)
+            # Get intent classification (its own slice of the request deadline)
+            with deadline_scope(settings.INTENT_STAGE_DEADLINE_SECONDS):
+                intent_scores, intent_tier = await self.router.classify_intent_with_tier(message.content)
             
             # Get best intent
             best_intent = max(intent_scores, key=intent_scores.get)
@@ -129,8 +170,10 @@ class LangGraphOrchestrator:
             state.intent = best_intent
             state.intent_confidence = confidence
             state.metadata["intent_scores"] = intent_scores
+            state.metadata["intent_tier"] = intent_tier
             
             logger.info(f"Intent classified: {best_intent} (confidence: {confidence:.2f})")
+            await emit_event("intent", {"intent": best_intent, "confidence": confidence})
             
         except Exception as e:
             logger.error(f"Intent classification error: {e}")
@@ -143,17 +186,9 @@ class LangGraphOrchestrator:
         try:
             logger.info(f"Routing intent '{state.intent}' to agent...")
             
-            # Agent mapping based on intent
-            agent_mapping = {
-                "product_inquiry": "ProductAgent",
-                "refund_request": "RefundAgent",
-                "technical_issue": "TechnicalAgent",
-                "general_question": "ProductAgent"  # Default
-            }
-            
             # Select agent based on intent and confidence
             if state.intent_confidence > 0.7:
-                selected_agent = agent_mapping.get(state.intent, "ProductAgent")
+                selected_agent = INTENT_AGENT_MAPPING.get(state.intent, "ProductAgent")
             else:
                 # Low confidence - use general agent
                 selected_agent = "ProductAgent"
@@ -162,6 +197,7 @@ class LangGraphOrchestrator:
             state.metadata["routing_reason"] = f"Intent: {state.intent}, Confidence: {state.intent_confidence:.2f}"
             
             logger.info(f"Routed to: {selected_agent}")
+            await emit_event("agent", {"agent": selected_agent, "reason": state.metadata["routing_reason"]})
             
         except Exception as e:
             logger.error(f"Routing error: {e}")
@@ -185,16 +221,45 @@ class LangGraphOrchestrator:
                 conversation_id=state.conversation_id
             )
             
-            # Process with agent
-            agent_response = await agent.process_message(message)
+            async def run_agent() -> Dict[str, Any]:
+                agent_response = await agent.process_message(message)
+                return {
+                    "content": agent_response.content,
+                    "confidence": agent_response.confidence,
+                    "sources": agent_response.sources,
+                    "processing_time": getattr(agent_response, 'processing_time', 0),
+                    "fallback": agent_response.metadata.get("fallback", False)
+                }
+            
+            # Identical questions in flight at the same time share one agent run. Streaming
+            # requests run their own, since a shared run streams to nobody
+            if settings.SINGLE_FLIGHT_ENABLED and self._is_shareable(state) and current_sink() is None:
+                result, shared = await self.single_flight.do(
+                    self._single_flight_key(state),
+                    run_agent,
+                    remote_result=lambda: self.cache_service.get_ai_response_cache(
+                        state.selected_agent,
+                        state.current_message,
+                        context=self._cache_context(state)
+                    )
+                )
+            else:
+                result, shared = await run_agent(), False
             
             # Update state
-            state.agent_response = agent_response.content
-            state.response_confidence = agent_response.confidence
-            state.sources = agent_response.sources
-            state.metadata["agent_processing_time"] = getattr(agent_response, 'processing_time', 0)
-            
-            logger.info(f"Agent response generated (confidence: {agent_response.confidence:.2f})")
+            state.agent_response = result["content"]
+            state.response_confidence = result.get("confidence", 0.0)
+            state.sources = result.get("sources", [])
+            state.metadata["agent_processing_time"] = result.get("processing_time", 0)
+            state.metadata["agent_fallback"] = result.get("fallback", False)
+            if shared:
+                # The request that ran the agent also writes the cache
+                state.cache_status = "coalesced"
+                logger.info(f"Coalesced onto an in-flight {state.selected_agent} request")
+            
+            logger.info(f"Agent response generated (confidence: {state.response_confidence:.2f})")
+            await emit_full_response(state.agent_response)
+            await emit_event("sources", {"sources": state.sources})
             
         except Exception as e:
             logger.error(f"Agent processing error: {e}")
@@ -202,6 +267,86 @@ class LangGraphOrchestrator:
         
         return state
     
+    def _is_shareable(self, state: ConversationState) -> bool:
+        """Whether the answer may be served to (or taken from) other conversations"""
+        return not state.cache_bypass and state.cache_status != "context_dependent"
+    
+    def _single_flight_key(self, state: ConversationState) -> str:
+        """Requests with the same key would get the same cached answer"""
+        return f"{state.selected_agent}:{normalize_query(state.current_message)}:{extract_entity_key(state.current_message)}"
+    
+    def _cache_context(self, state: ConversationState) -> Dict[str, Any]:
+        """Request details besides agent and query that change the answer"""
+        return {"entities": extract_entity_key(state.current_message)}
+    
+    async def _check_cache_node(self, state: ConversationState) -> ConversationState:
+        """Node: Serve a cached response for this agent and query (read-through)"""
+        if state.cache_bypass:
+            state.cache_status = "bypass"
+            await emit_event("cache", {"status": state.cache_status})
+            return state
+        
+        try:
+            # A follow-up ("what about the second one?") means something different in every
+            # conversation, so only first turns share cached or coalesced answers
+            if await self.conversation_memory.get_window(state.conversation_id):
+                state.cache_status = "context_dependent"
+                await emit_event("cache", {"status": state.cache_status})
+                return state
+            
+            cached = await self.cache_service.get_ai_response_cache(
+                state.selected_agent,
+                state.current_message,
+                context=self._cache_context(state)
+            )
+            
+            if cached:
+                state.agent_response = cached["content"]
+                state.response_confidence = cached.get("confidence", 0.0)
+                state.sources = cached.get("sources", [])
+                state.cache_status = f"{cached.get('cache_layer', 'exact')}_hit"
+                if "cache_similarity" in cached:
+                    state.metadata["cache_similarity"] = cached["cache_similarity"]
+                logger.info(f"Serving cached response for {state.selected_agent} ({state.cache_status})")
+            else:
+                state.cache_status = "miss"
+                
+        except Exception as e:
+            # A cache failure must never fail the request
+            logger.error(f"Cache check error: {e}")
+            state.cache_status = "error"
+        
+        await emit_event("cache", {"status": state.cache_status})
+        if state.cache_status.endswith("_hit"):
+            await emit_full_response(state.agent_response)
+            await emit_event("sources", {"sources": state.sources})
+        
+        return state
+    
+    async def _write_cache_node(self, state: ConversationState) -> ConversationState:
+        """Node: Store the fresh agent response (write-through)"""
+        # Coalesced answers were written by the request that ran the agent
+        if state.metadata.get("agent_fallback") or state.cache_status in ("coalesced", "context_dependent"):
+            return state
+        
+        try:
+            await self.cache_service.cache_ai_response(
+                state.selected_agent,
+                state.current_message,
+                {
+                    "agent_name": state.selected_agent,
+                    "content": state.agent_response,
+                    "confidence": state.response_confidence,
+                    "sources": state.sources,
+                    "processing_time": state.metadata.get("agent_processing_time", 0)
+                },
+                context=self._cache_context(state)
+            )
+        except Exception as e:
+            logger.error(f"Cache write error: {e}")
+        
+        return state
+    
     async def _generate_suggestions_node(self, state: ConversationState) -> ConversationState:
         """Node: Generate follow-up suggestions"""
         try:
@@ -231,6 +376,7 @@ class LangGraphOrchestrator:
             )
             
             logger.info(f"Generated {len(state.suggestions)} suggestions")
+            await emit_event("suggestions", {"suggestions": state.suggestions})
             
         except Exception as e:
             logger.error(f"Suggestion generation error: {e}")
@@ -266,13 +412,25 @@ class LangGraphOrchestrator:
             return "error"
         return "continue"
     
+    def _should_process_after_cache_check(self, state: ConversationState) -> str:
+        """Conditional edge: Skip the agent on a cache hit"""
+        if state.cache_status.endswith("_hit"):
+            return "hit"
+        return "miss"
+    
     def _should_continue_after_processing(self, state: ConversationState) -> str:
         """Conditional edge: Continue after agent processing"""
         if state.error:
             return "error"
         return "continue"
     
-    async def process_message(self, user_id: str, message: str, conversation_id: str = None) -> ChatResponse:
+    async def process_message(
+        self,
+        user_id: str,
+        message: str,
+        conversation_id: str = None,
+        bypass_cache: bool = False
+    ) -> ChatResponse:
         """Main method to process message through LangGraph workflow"""
         start_time = time.time()
         
@@ -286,27 +444,34 @@ class LangGraphOrchestrator:
                 user_id=user_id,
                 conversation_id=conversation_id,
                 original_message=message,
-                current_message=message
+                current_message=message,
+                cache_bypass=bypass_cache
             )
             
-            # Store user message
-            await self._store_user_message(user_id, message, conversation_id)
+            user_message = Message(
+                content=message,
+                type=MessageType.USER,
+                user_id=user_id,
+                conversation_id=conversation_id
+            )
             
             # Process through LangGraph workflow
             config = {"configurable": {"thread_id": conversation_id}}
             
             logger.info(f"Starting LangGraph workflow for conversation: {conversation_id}")
             
-            # Execute workflow
-            final_state = await self.workflow.ainvoke(initial_state, config)
+            # Execute workflow (LangGraph returns the final state values as a dict); every
+            # candidate agent's searches start now and overlap intent classification. LLM calls
+            # see only this conversation's history, and every stage shares the request deadline
+            with (
+                deadline_scope(settings.REQUEST_DEADLINE_SECONDS),
+                self.chroma_client.prefetch(self._speculative_searches(message)),
+                bind_conversation(conversation_id)
+            ):
+                final_state = ConversationState(**await self.workflow.ainvoke(initial_state, config))
             
-            # Store assistant message
-            await self._store_assistant_message(
-                user_id, 
-                final_state.agent_response, 
-                conversation_id,
-                final_state.selected_agent
-            )
+            # Store both turns in one Redis round-trip
+            await self._store_messages(user_message, final_state.agent_response)
             
             # Calculate response time
             response_time = time.time() - start_time
@@ -318,7 +483,8 @@ class LangGraphOrchestrator:
                 confidence=final_state.response_confidence,
                 response_time=response_time,
                 conversation_id=conversation_id,
-                suggestions=final_state.suggestions
+                suggestions=final_state.suggestions,
+                metadata={"cache_status": final_state.cache_status}
             )
             
             logger.info(f"LangGraph workflow completed in {response_time:.2f}s")
@@ -337,31 +503,72 @@ class LangGraphOrchestrator:
                 suggestions=["Try asking your question differently", "Contact human support"]
             )
     
-    async def _store_user_message(self, user_id: str, message: str, conversation_id: str):
-        """Store user message in Redis"""
+    async def stream_message(
+        self,
+        user_id: str,
+        message: str,
+        conversation_id: str = None,
+        bypass_cache: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process a message, yielding workflow events and tokens as they are produced.
+        
+        Events: start, intent, agent, cache, token, sources, suggestions, then
+        done (the complete ChatResponse) or error. Closing the iterator cancels
+        the workflow.
+        """
+        conversation_id = conversation_id or f"conv_{uuid.uuid4().hex[:8]}"
+        sink = StreamSink()
+        
+        async def run():
+            with bind_sink(sink):
+                try:
+                    await sink.emit("start", {"conversation_id": conversation_id})
+                    response = await self.process_message(user_id, message, conversation_id, bypass_cache)
+                    await sink.emit("done", response.model_dump())
+                except Exception as e:
+                    logger.error(f"Streaming workflow error: {e}")
+                    await sink.emit("error", {"detail": "Internal server error"})
+                # Not reached on cancellation: the consumer is already gone
+                await sink.close()
+        
+        task = asyncio.create_task(run())
         try:
-            user_message = Message(
-                content=message,
-                type=MessageType.USER,
-                user_id=user_id,
-                conversation_id=conversation_id
-            )
-            await self.redis_client.store_message(user_message)
-        except Exception as e:
-            logger.warning(f"Failed to store user message: {e}")
+            async for event in sink.events():
+                yield event
+            await task
+        finally:
+            # Client went away (or stopped iterating): stop generating
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
     
-    async def _store_assistant_message(self, user_id: str, response: str, conversation_id: str, agent_name: str):
-        """Store assistant message in Redis"""
+    def _speculative_searches(self, message: str) -> List[Tuple[str, str, int]]:
+        """Searches any agent could run for this message; the selected agent's are reused, the rest cancelled"""
+        if not settings.SPECULATIVE_RETRIEVAL_ENABLED:
+            return []
+        
+        return [search for agent in self.agents.values() for search in agent.retrieval_plan(message)]
+    
+    async def _store_messages(self, user_message: Message, response: str):
+        """Store the user message and assistant reply in Redis and the conversation's memory window"""
         try:
+            await self.conversation_memory.add_turn(user_message.conversation_id, user_message.content, response)
+            
             assistant_message = Message(
                 content=response,
                 type=MessageType.ASSISTANT,
-                user_id=user_id,
-                conversation_id=conversation_id
+                user_id=user_message.user_id,
+                conversation_id=user_message.conversation_id
+            )
+            await self.redis_client.store_messages(
+                [user_message, assistant_message],
+                background=settings.CONVERSATION_WRITE_BACKGROUND
             )
-            await self.redis_client.store_message(assistant_message)
         except Exception as e:
-            logger.warning(f"Failed to store assistant message: {e}")
+            logger.warning(f"Failed to store conversation messages: {e}")
     
     async def get_conversation_history(self, user_id: str, limit: int = 10) -> list:
         """Retrieve conversation history from Redis"""
@@ -1,11 +1,15 @@
+from typing import List, Optional, Tuple
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.agents.base_agent import BaseAgent
 from app.database.models import Message, AgentResponse
+from app.services.context_builder import document_chunks
 from app.services.huggingface_client import LangChainHuggingFaceClient
 from app.database.chroma_client import ChromaClient
+from app.services.resource_registry import resource_registry
+from app.core.keywords import KEYWORD_CATEGORIES, keyword_engine
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,22 +17,27 @@ logger = get_logger(__name__)
 class ProductAgent(BaseAgent):
    """Product agent with LangChain RAG implementation"""
    
-   def __init__(self):
+   def __init__(
+       self,
+       langchain_client: Optional[LangChainHuggingFaceClient] = None,
+       chroma_client: Optional[ChromaClient] = None
+   ):
        super().__init__("ProductAgent")
-       self.langchain_client = LangChainHuggingFaceClient()
-       self.chroma_client = ChromaClient()
+       self.langchain_client = langchain_client or resource_registry.get_llm_client()
+       self.chroma_client = chroma_client or resource_registry.get_chroma_client()
+   
+   def retrieval_plan(self, query: str) -> List[Tuple[str, str, int]]:
+       """Product catalogue search"""
+       return [("products", query, 5)]
    
    async def process_message(self, message: Message) -> AgentResponse:
        """Process message using LangChain RAG"""
        try:
-           # 1. RETRIEVE: Get relevant documents from ChromaDB
-           similar_docs = await self.chroma_client.search_products(
-               query=message.content,
-               limit=5
-           )
+           # 1. RETRIEVE: Get relevant documents from ChromaDB (prefetched during routing when speculative)
+           similar_docs = await self.chroma_client.search(*self.retrieval_plan(message.content)[0])
            
-           # 2. AUGMENT: Create context from retrieved documents
-           context = "\n".join([doc.get("content", "") for doc in similar_docs])
+           # 2. AUGMENT: Create context from retrieved documents within the product token budget
+           context = self.langchain_client.context_builder.build("product", document_chunks(similar_docs))
            
            # 3. GENERATE: Use LangChain to generate response
            response = await self.langchain_client.generate_with_rag(
@@ -52,12 +61,11 @@ class ProductAgent(BaseAgent):
                content="I apologize, but I'm having trouble accessing product information right now.",
                confidence=0.3,
                sources=[],
-               processing_time=0.1
+               processing_time=0.1,
+               metadata={"fallback": True}
            )
    
    async def get_confidence_score(self, message: Message) -> float:
        """Calculate confidence for product queries"""
-       product_keywords = ["price", "features", "product", "buy", "purchase", "plan"]
-       score = sum(1 for keyword in product_keywords 
-                  if keyword.lower() in message.content.lower())
-       return min(score / len(product_keywords), 1.0)
\ No newline at end of file
+       score = keyword_engine.scan(message.content)["confidence.product"]
+       return min(score / len(KEYWORD_CATEGORIES["confidence.product"]), 1.0)
\ No newline at end of file
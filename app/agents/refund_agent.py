@@ -1,12 +1,16 @@
+from typing import List, Optional, Tuple
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.agents.base_agent import BaseAgent
 from app.database.models import Message, AgentResponse
+from app.services.context_builder import document_chunks
 from app.services.huggingface_client import LangChainHuggingFaceClient
 from app.database.chroma_client import ChromaClient
+from app.services.resource_registry import resource_registry
 from app.services.external_apis import ExternalAPIClient
+from app.core.keywords import KEYWORD_CATEGORIES, keyword_engine
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -14,10 +18,14 @@ logger = get_logger(__name__)
 class RefundAgent(BaseAgent):
     """Refund agent with LangChain RAG implementation"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        langchain_client: Optional[LangChainHuggingFaceClient] = None,
+        chroma_client: Optional[ChromaClient] = None
+    ):
         super().__init__("RefundAgent")
-        self.langchain_client = LangChainHuggingFaceClient()
-        self.chroma_client = ChromaClient()
+        self.langchain_client = langchain_client or resource_registry.get_llm_client()
+        self.chroma_client = chroma_client or resource_registry.get_chroma_client()
         self.external_api = ExternalAPIClient()
         self.refund_policies = self._load_refund_policies()
     
@@ -66,14 +74,15 @@ class RefundAgent(BaseAgent):
             ]
         }
     
+    def retrieval_plan(self, query: str) -> List[Tuple[str, str, int]]:
+        """Refund policy search"""
+        return [("faqs", f"refund policy {query}", 3)]
+    
     async def process_message(self, message: Message) -> AgentResponse:
         """Process refund-related queries using LangChain RAG"""
         try:
-            # 1. RETRIEVE: Search policy documents using ChromaDB
-            policy_docs = await self.chroma_client.search_faqs(
-                query=f"refund policy {message.content}",
-                limit=3
-            )
+            # 1. RETRIEVE: Search policy documents using ChromaDB (prefetched during routing when speculative)
+            policy_docs = await self.chroma_client.search(*self.retrieval_plan(message.content)[0])
             
             # 2. AUGMENT: Create comprehensive context
             context = await self._create_refund_context(message.content, policy_docs)
@@ -104,54 +113,53 @@ class RefundAgent(BaseAgent):
                 content="I apologize, but I'm having trouble processing your refund request. Please contact our support team.",
                 confidence=0.3,
                 sources=[],
-                processing_time=0.1
+                processing_time=0.1,
+                metadata={"fallback": True}
             )
     
     async def _create_refund_context(self, query: str, retrieved_docs: list) -> str:
-        """Create comprehensive refund context"""
-        context_parts = []
+        """Create refund context within the refund token budget"""
+        # Retrieved policy documents, best match first
+        context_parts = document_chunks(retrieved_docs, "Policy Document")
         
-        # Add retrieved policy documents
-        for doc in retrieved_docs:
-            context_parts.append(f"Policy Document: {doc.get('content', '')}")
-        
-        # Add relevant policy information
+        # Relevant policy terms are authoritative, so always kept
         relevant_policies = self._get_relevant_policies(query)
         for policy_name, policy_info in relevant_policies.items():
-            context_parts.append(f"""
+            context_parts.append({"pinned": True, "text": f"""
             {policy_name.replace('_', ' ').title()}:
             - Period: {policy_info['period']}
             - Conditions: {', '.join(policy_info['conditions'])}
             - Processing Time: {policy_info['process_time']}
-            """)
+            """})
         
         # Add non-refundable items
-        context_parts.append(f"Non-refundable items: {', '.join(self.refund_policies['non_refundable'])}")
+        context_parts.append({
+            "score": 0.5,
+            "text": f"Non-refundable items: {', '.join(self.refund_policies['non_refundable'])}"
+        })
         
-        # Add general refund guidelines
-        context_parts.append("""
+        # General refund guidelines go last when the budget is tight
+        context_parts.append({"score": 0.1, "text": """
         Refund Guidelines:
         - Always check customer eligibility first
         - Provide clear timelines and expectations
         - Explain required documentation
         - Offer alternative solutions when appropriate
         - Be empathetic and professional
-        """)
+        """})
         
-        return "\n\n".join(context_parts)
+        return self.langchain_client.context_builder.build("refund", context_parts)
     
     def _classify_refund_request(self, query: str) -> str:
         """Classify the type of refund request"""
-        query_lower = query.lower()
+        hits = keyword_engine.scan(query)
         
         # Policy inquiry indicators
-        policy_keywords = ["policy", "how long", "can i", "what is", "explain", "rules", "terms"]
-        if any(keyword in query_lower for keyword in policy_keywords):
+        if hits["refund.policy_inquiry"]:
             return "policy_inquiry"
         
         # Refund request indicators
-        request_keywords = ["want refund", "return", "cancel", "money back", "process refund", "order"]
-        if any(keyword in query_lower for keyword in request_keywords):
+        if hits["refund.request"]:
             return "refund_request"
         
         return "general_inquiry"
@@ -180,8 +188,6 @@ class RefundAgent(BaseAgent):
             You are a customer service representative explaining refund policies.
             Be clear, helpful, and provide specific information.
             
-            Context: {context}
-            
             Customer Question: {query}
             
             Provide a helpful explanation of the relevant refund policy.
@@ -224,8 +230,6 @@ class RefundAgent(BaseAgent):
             general_prompt = f"""
             You are a helpful customer service agent handling refund inquiries.
             
-            Context: {context}
-            
             Customer Message: {query}
             
             Provide a helpful response addressing their refund concern.
@@ -409,16 +413,11 @@ class RefundAgent(BaseAgent):
     
     async def get_confidence_score(self, message: Message) -> float:
         """Calculate confidence for handling refund queries"""
-        refund_keywords = [
-            "refund", "return", "money back", "cancel order", "policy",
-            "reimburse", "charge back", "dispute", "billing", "payment"
-        ]
-        
-        content_lower = message.content.lower()
-        score = sum(1 for keyword in refund_keywords if keyword in content_lower)
+        hits = keyword_engine.scan(message.content)
+        score = hits["confidence.refund"]
         
         # Boost confidence for specific refund patterns
-        if any(pattern in content_lower for pattern in ["want refund", "return policy", "money back"]):
+        if hits["confidence.refund.boost"]:
             score += 2
         
-        return min(score / len(refund_keywords), 1.0)
\ No newline at end of file
+        return min(score / len(KEYWORD_CATEGORIES["confidence.refund"]), 1.0)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import time
 
 import os
 import sys
@@ -6,6 +7,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.agents.base_agent import BaseAgent
 from app.services.huggingface_client import LangChainHuggingFaceClient
+from app.services.intent_router import IntentCascade
+from app.services.resource_registry import resource_registry
 from app.database.models import Message, AgentResponse
 from app.core.logger import get_logger
 
@@ -14,32 +17,56 @@ logger = get_logger(__name__)
 class RouterAgent(BaseAgent):
     """Router agent using LangChain for intent classification"""
     
-    def __init__(self):
+    INTENT_LABELS = [
+        "product_inquiry",
+        "refund_request", 
+        "technical_issue",
+        "general_question"
+    ]
+    
+    def __init__(
+        self,
+        langchain_client: Optional[LangChainHuggingFaceClient] = None,
+        cascade: Optional[IntentCascade] = None
+    ):
         super().__init__("RouterAgent")
-        self.langchain_client = LangChainHuggingFaceClient()
-        self.intent_labels = [
-            "product_inquiry",
-            "refund_request", 
-            "technical_issue",
-            "general_question"
-        ]
+        self.langchain_client = langchain_client or resource_registry.get_llm_client()
+        self.cascade = cascade or (
+            IntentCascade(langchain_client) if langchain_client else resource_registry.get_intent_router()
+        )
+        self.intent_labels = list(self.INTENT_LABELS)
     
     async def classify_intent(self, message: str) -> Dict[str, float]:
-        """Classify user intent using LangChain"""
+        """Classify user intent using the confidence cascade"""
+        intent_scores, _ = await self.classify_intent_with_tier(message)
+        return intent_scores
+    
+    async def classify_intent_with_tier(self, message: str) -> Tuple[Dict[str, float], str]:
+        """Intent scores plus the cascade tier (cache, rules, local, remote) that decided them"""
         try:
-            result = await self.langchain_client.classify_text(
-                text=message,
-                candidate_labels=self.intent_labels
-            )
+            intent_scores, tier = await self.cascade.classify(message, self.intent_labels)
             
-            # Convert to dict of label: score
-            intent_scores = {}
-            for label, score in zip(result["labels"], result["scores"]):
-                intent_scores[label] = score
-                
-            logger.info(f"Intent classification: {intent_scores}")
-            return intent_scores
+            logger.info(f"Intent classification ({tier}): {intent_scores}")
+            return intent_scores, tier
             
         except Exception as e:
             logger.error(f"Intent classification failed: {e}")
-            return {"general_question": 1.0}  # Fallback
\ No newline at end of file
+            return {"general_question": 1.0}, "fallback"  # Fallback
+    
+    async def process_message(self, message: Message) -> AgentResponse:
+        """Classify the message; the best intent is the response content"""
+        start_time = time.perf_counter()
+        intent_scores, tier = await self.classify_intent_with_tier(message.content)
+        best_intent = max(intent_scores, key=intent_scores.get)
+        
+        return AgentResponse(
+            agent_name=self.name,
+            content=best_intent,
+            confidence=intent_scores[best_intent],
+            processing_time=time.perf_counter() - start_time,
+            metadata={"intent_scores": intent_scores, "intent_tier": tier}
+        )
+    
+    async def get_confidence_score(self, message: Message) -> float:
+        """The router handles every message"""
+        return 1.0
@@ -1,11 +1,15 @@
+from typing import List, Optional, Tuple
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.agents.base_agent import BaseAgent
 from app.database.models import Message, AgentResponse
+from app.services.context_builder import document_chunks
 from app.services.huggingface_client import LangChainHuggingFaceClient
 from app.database.chroma_client import ChromaClient
+from app.services.resource_registry import resource_registry
+from app.core.keywords import KEYWORD_CATEGORIES, keyword_engine
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,10 +17,17 @@ logger = get_logger(__name__)
 class TechnicalAgent(BaseAgent):
     """Technical support agent with LangChain RAG implementation"""
     
-    def __init__(self):
+    # Checked in this order; keywords live in app.core.keywords
+    ISSUE_TYPES = ["login_issues", "app_crashes", "payment_issues", "performance_issues", "api_errors"]
+    
+    def __init__(
+        self,
+        langchain_client: Optional[LangChainHuggingFaceClient] = None,
+        chroma_client: Optional[ChromaClient] = None
+    ):
         super().__init__("TechnicalAgent")
-        self.langchain_client = LangChainHuggingFaceClient()
-        self.chroma_client = ChromaClient()
+        self.langchain_client = langchain_client or resource_registry.get_llm_client()
+        self.chroma_client = chroma_client or resource_registry.get_chroma_client()
         self.troubleshooting_db = self._load_troubleshooting_solutions()
     
     def _load_troubleshooting_solutions(self) -> dict:
@@ -69,14 +80,15 @@ class TechnicalAgent(BaseAgent):
             }
         }
     
+    def retrieval_plan(self, query: str) -> List[Tuple[str, str, int]]:
+        """Troubleshooting FAQ search"""
+        return [("faqs", f"technical issue {query}", 3)]
+    
     async def process_message(self, message: Message) -> AgentResponse:
         """Process technical support queries using LangChain RAG"""
         try:
-            # 1. RETRIEVE: Search troubleshooting database using ChromaDB
-            troubleshooting_docs = await self.chroma_client.search_faqs(
-                query=f"technical issue {message.content}",
-                limit=3
-            )
+            # 1. RETRIEVE: Search troubleshooting database using ChromaDB (prefetched during routing when speculative)
+            troubleshooting_docs = await self.chroma_client.search(*self.retrieval_plan(message.content)[0])
             
             # 2. AUGMENT: Create context from retrieved documents and local knowledge
             context = await self._create_technical_context(message.content, troubleshooting_docs)
@@ -109,53 +121,45 @@ class TechnicalAgent(BaseAgent):
                 content="I'm experiencing technical difficulties. Please try again or contact our technical support team.",
                 confidence=0.2,
                 sources=[],
-                processing_time=0.1
+                processing_time=0.1,
+                metadata={"fallback": True}
             )
     
     async def _create_technical_context(self, query: str, retrieved_docs: list) -> str:
-        """Create comprehensive technical context"""
-        context_parts = []
+        """Create technical context within the technical token budget"""
+        # Retrieved documents, best match first
+        context_parts = document_chunks(retrieved_docs, "Knowledge Base")
         
-        # Add retrieved documents
-        for doc in retrieved_docs:
-            context_parts.append(f"Knowledge Base: {doc.get('content', '')}")
-        
-        # Add relevant troubleshooting steps
+        # The standard solution for a recognized issue is always kept
         issue_type = self._identify_issue_type(query)
         if issue_type in self.troubleshooting_db:
             solution = self.troubleshooting_db[issue_type]
-            context_parts.append(f"Standard Solution for {issue_type}: {'; '.join(solution['steps'])}")
+            context_parts.append({
+                "pinned": True,
+                "text": f"Standard Solution for {issue_type}: {'; '.join(solution['steps'])}"
+            })
         
-        # Add general technical context
-        context_parts.append("""
+        # General technical guidelines go last when the budget is tight
+        context_parts.append({"score": 0.1, "text": """
         Technical Support Guidelines:
         - Always provide step-by-step solutions
         - Include specific troubleshooting steps
         - Mention when to escalate to human support
         - Be clear about system requirements
         - Provide alternative solutions when possible
-        """)
+        """})
         
-        return "\n\n".join(context_parts)
+        return self.langchain_client.context_builder.build("technical", context_parts)
     
     def _identify_issue_type(self, query: str) -> str:
         """Identify the type of technical issue using enhanced detection"""
-        query_lower = query.lower()
-        
-        # Enhanced keyword matching
-        issue_patterns = {
-            "login_issues": ["login", "sign in", "password", "authentication", "access denied", "locked out"],
-            "app_crashes": ["crash", "freeze", "stuck", "not working", "stops responding", "hangs"],
-            "payment_issues": ["payment", "billing", "card", "charge", "transaction", "declined"],
-            "performance_issues": ["slow", "loading", "timeout", "lag", "performance", "speed"],
-            "api_errors": ["api", "endpoint", "error code", "400", "500", "unauthorized", "forbidden"]
-        }
-        
-        for issue_type, keywords in issue_patterns.items():
-            if any(keyword in query_lower for keyword in keywords):
-                return issue_type
-        
-        return "general_technical"
+        # First issue type (in priority order) with a keyword hit
+        category = keyword_engine.first_match(
+            query,
+            [f"issue.{issue_type}" for issue_type in self.ISSUE_TYPES],
+            default="issue.general_technical"
+        )
+        return category[len("issue."):]
     
     async def _provide_structured_solution(self, issue_type: str, query: str) -> str:
         """Provide structured step-by-step solution"""
@@ -194,20 +198,14 @@ class TechnicalAgent(BaseAgent):
     
     async def get_confidence_score(self, message: Message) -> float:
         """Calculate confidence for handling technical queries"""
-        technical_keywords = [
-            "error", "bug", "crash", "login", "technical", "support", "help", 
-            "issue", "problem", "not working", "freeze", "stuck", "slow",
-            "api", "code", "system", "server", "connection", "timeout"
-        ]
-        
-        content_lower = message.content.lower()
-        score = sum(1 for keyword in technical_keywords if keyword in content_lower)
+        hits = keyword_engine.scan(message.content)
+        score = hits["confidence.technical"]
         
         # Boost confidence for specific technical patterns
-        if any(pattern in content_lower for pattern in ["error code", "exception", "stack trace", "debug"]):
+        if hits["confidence.technical.boost"]:
             score += 2
         
-        return min(score / len(technical_keywords), 1.0)
+        return min(score / len(KEYWORD_CATEGORIES["confidence.technical"]), 1.0)
     
     async def diagnose_issue(self, message: Message) -> dict:
         """Advanced issue diagnosis using LangChain"""
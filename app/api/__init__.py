@@ -2,7 +2,7 @@
 API Module
 
 FastAPI endpoints and routing for the customer service system.
-Includes chat endpoints, health checks, and analytics.
+Includes chat endpoints, health checks, analytics, and admin operations.
 """
 import os
 import sys
@@ -11,17 +11,20 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from app.api.chat_routes import router as chat_router
 from app.api.health_routes import router as health_router
 from app.api.analytics_routes import router as analytics_router
+from app.api.admin_routes import router as admin_router
 
 # Available routers
 ROUTERS = [
     (chat_router, "/api/v1", "chat"),
     (health_router, "/health", "health"),
-    (analytics_router, "/api/v1/analytics", "analytics")
+    (analytics_router, "/api/v1/analytics", "analytics"),
+    (admin_router, "/api/v1/admin", "admin")
 ]
 
 __all__ = [
     "chat_router",
     "health_router", 
     "analytics_router",
+    "admin_router",
     "ROUTERS"
 ]
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Admin Routes
+
+Operational endpoints for cache maintenance. Require the X-Admin-Key header.
+"""
+
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any
+from datetime import datetime
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.api.dependencies import admin_dependencies
+from app.database.models import CacheInvalidationRequest
+from app.services.cache_service import cache_service
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+@router.post("/cache/invalidate", dependencies=admin_dependencies)
+async def invalidate_cache(request: CacheInvalidationRequest) -> Dict[str, Any]:
+    """Invalidate one key, a whole cache type/prefix, or everything with a tag"""
+    
+    try:
+        if request.tag:
+            removed = await cache_service.invalidate_tag(request.tag)
+            target = f"tag {request.tag}"
+        elif request.cache_type and request.identifier:
+            removed = int(await cache_service.invalidate_cache(request.cache_type, request.identifier))
+            target = f"{request.cache_type}/{request.identifier}"
+        elif request.cache_type:
+            removed = await cache_service.invalidate_prefix(request.cache_type)
+            target = request.cache_type
+        else:
+            raise HTTPException(status_code=400, detail="Provide a tag or a cache_type")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Cache invalidation failed: {e}")
+        raise HTTPException(status_code=500, detail="Cache invalidation failed")
+    
+    logger.info(f"Admin invalidated {removed} cache entries for {target}")
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "target": target,
+        "removed": removed
+    }
+
+@router.post("/cache/invalidate/knowledge-base", dependencies=admin_dependencies)
+async def invalidate_knowledge_base_cache() -> Dict[str, Any]:
+    """Flush cached responses derived from the knowledge base"""
+    
+    try:
+        removed = await cache_service.invalidate_knowledge_base()
+    except Exception as e:
+        logger.error(f"Knowledge base cache invalidation failed: {e}")
+        raise HTTPException(status_code=500, detail="Cache invalidation failed")
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "removed": removed
+    }
+
+@router.post("/cache/clear-expired", dependencies=admin_dependencies)
+async def clear_expired_cache() -> Dict[str, Any]:
+    """Purge expired local entries and stale tag references"""
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "cleared": await cache_service.clear_expired_cache()
+    }
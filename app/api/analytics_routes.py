@@ -5,6 +5,7 @@ Analytics and metrics endpoints for monitoring system performance.
 """
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import json
@@ -14,7 +15,8 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.api.dependencies import common_dependencies
-from app.database.redis_client import RedisClient
+from app.services.cache_service import cache_service
+from app.services.resource_registry import resource_registry
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,7 +26,7 @@ router = APIRouter()
 async def get_metrics_overview() -> Dict[str, Any]:
     """Get high-level metrics overview"""
     
-    redis_client = RedisClient()
+    redis_client = resource_registry.get_redis_client()
     
     # Mock metrics for demo (in production, calculate from real data)
     return {
@@ -176,6 +178,80 @@ async def get_agent_performance() -> Dict[str, Any]:
         ]
     }
 
+@router.get("/performance/classification", dependencies=common_dependencies)
+async def get_classification_performance() -> Dict[str, Any]:
+    """Intent classification backend and micro-batching metrics"""
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **resource_registry.get_llm_client().get_classification_stats()
+    }
+
+@router.get("/performance/hedging", dependencies=common_dependencies)
+async def get_hedging_performance() -> Dict[str, Any]:
+    """Hedge delay, hedge rate and hedge wins per model role"""
+    
+    llm_client = resource_registry.get_llm_client()
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "timeouts": llm_client.timeouts,
+        "models": {role: hedger.get_stats() for role, hedger in llm_client.hedgers.items()}
+    }
+
+@router.get("/performance/coalescing", dependencies=common_dependencies)
+async def get_coalescing_performance() -> Dict[str, Any]:
+    """Agent runs versus identical requests that shared an in-flight answer"""
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **resource_registry.get_single_flight().get_stats()
+    }
+
+@router.get("/performance/routing", dependencies=common_dependencies)
+async def get_routing_performance() -> Dict[str, Any]:
+    """Intent cascade hit rate, latency and shadow-sampled accuracy per tier"""
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **resource_registry.get_intent_router().get_stats()
+    }
+
+@router.get("/cache/stats", dependencies=common_dependencies)
+async def get_cache_stats(include_keyspace: bool = Query(True, description="Sample key counts and memory with SCAN")) -> Dict[str, Any]:
+    """Per-tier and per-prefix cache hit rates, latency and keyspace usage"""
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **await cache_service.get_cache_stats(include_keyspace=include_keyspace)
+    }
+
+@router.get("/cache/metrics", dependencies=common_dependencies, response_class=PlainTextResponse)
+async def get_cache_metrics() -> PlainTextResponse:
+    """Cache metrics in Prometheus text format"""
+    
+    return PlainTextResponse(
+        await cache_service.get_prometheus_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@router.get("/cache/semantic", dependencies=common_dependencies)
+async def get_semantic_cache_stats() -> Dict[str, Any]:
+    """Semantic response cache hit/miss/near-miss metrics"""
+    
+    try:
+        stats = resource_registry.get_semantic_cache().get_stats()
+        enabled = True
+    except Exception as e:
+        logger.error(f"Semantic cache unavailable: {e}")
+        stats = {}
+        enabled = False
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "enabled": enabled,
+        **stats
+    }
+
 @router.post("/feedback", dependencies=common_dependencies)
 async def record_feedback(feedback_data: Dict[str, Any]) -> Dict[str, str]:
     """Record user feedback for analysis"""
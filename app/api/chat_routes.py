@@ -1,6 +1,10 @@
 # Chat API endpoints
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from typing import List
+import asyncio
+import json
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -14,7 +18,10 @@ logger = get_logger(__name__)
 orchestrator = AgentOrchestrator()
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(
+    request: ChatRequest,
+    x_cache_bypass: bool = Header(False, description="Skip cached responses and regenerate")
+):
     """Main chat endpoint for customer interactions"""
     try:
         logger.info(f"Processing chat request: {request.message[:50]}...")
@@ -23,7 +30,8 @@ async def chat_endpoint(request: ChatRequest):
         response = await orchestrator.process_message(
             user_id=request.user_id,
             message=request.message,
-            conversation_id=request.conversation_id
+            conversation_id=request.conversation_id,
+            bypass_cache=x_cache_bypass
         )
         
         logger.info(f"Generated response with confidence: {response.confidence}")
@@ -33,6 +41,126 @@ async def chat_endpoint(request: ChatRequest):
         logger.error(f"Error processing chat: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    x_cache_bypass: bool = Header(False, description="Skip cached responses and regenerate")
+):
+    """Stream workflow events and response tokens as server-sent events"""
+    logger.info(f"Streaming chat request: {request.message[:50]}...")
+    
+    async def event_stream():
+        events = orchestrator.stream_message(
+            user_id=request.user_id,
+            message=request.message,
+            conversation_id=request.conversation_id,
+            bypass_cache=x_cache_bypass
+        )
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, cancelling stream")
+                    break
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """Stream chat over a WebSocket.
+    
+    Send {"message", "user_id", "conversation_id"?, "bypass_cache"?} to start a
+    response and {"type": "cancel"} to stop the one in progress. Events are
+    sent as {"event", "data"} objects, one at a time, so a slow client slows
+    generation rather than growing a buffer.
+    """
+    await websocket.accept()
+    receive = asyncio.ensure_future(websocket.receive_json())
+    
+    try:
+        while True:
+            payload = await receive
+            receive = asyncio.ensure_future(websocket.receive_json())
+            
+            if payload.get("type") == "cancel":
+                continue
+            
+            try:
+                request = ChatRequest(**payload)
+            except ValidationError as e:
+                await websocket.send_json({"event": "error", "data": {"detail": json.loads(e.json(include_url=False))}})
+                continue
+            
+            receive = await _stream_to_websocket(websocket, request, bool(payload.get("bypass_cache")), receive)
+    
+    except WebSocketDisconnect:
+        logger.info("WebSocket client disconnected")
+    finally:
+        receive.cancel()
+
+async def _stream_to_websocket(
+    websocket: WebSocket,
+    request: ChatRequest,
+    bypass_cache: bool,
+    receive: asyncio.Future
+) -> asyncio.Future:
+    """Forward one streamed response while watching for cancel messages.
+    
+    Returns the pending receive so the next request is read from it.
+    """
+    events = orchestrator.stream_message(
+        user_id=request.user_id,
+        message=request.message,
+        conversation_id=request.conversation_id,
+        bypass_cache=bypass_cache
+    )
+    next_event = None
+    
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(events.__anext__())
+            
+            done, _ = await asyncio.wait({next_event, receive}, return_when=asyncio.FIRST_COMPLETED)
+            
+            if next_event in done:
+                try:
+                    event = next_event.result()
+                except StopAsyncIteration:
+                    return receive
+                next_event = None
+                await websocket.send_json(event)
+            
+            if receive in done:
+                # Raises WebSocketDisconnect if the client went away
+                control = receive.result()
+                receive = asyncio.ensure_future(websocket.receive_json())
+                
+                if control.get("type") == "cancel":
+                    await websocket.send_json({"event": "cancelled", "data": {}})
+                    return receive
+                
+                await websocket.send_json({
+                    "event": "error",
+                    "data": {"detail": "A response is already streaming; send {\"type\": \"cancel\"} first"}
+                })
+    
+    finally:
+        if next_event is not None and not next_event.done():
+            next_event.cancel()
+            try:
+                await next_event
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await events.aclose()
+
 @router.get("/chat/history/{user_id}")
 async def get_chat_history(user_id: str, limit: int = 10):
     """Retrieve chat history for a user"""
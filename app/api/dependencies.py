@@ -4,15 +4,17 @@ FastAPI Dependencies
 Common dependencies for request validation, rate limiting, and security.
 """
 
-from fastapi import HTTPException, Depends, Request
+from fastapi import HTTPException, Depends, Header, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 import time
+import secrets
 from collections import defaultdict
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
+from app.core.config import settings
 from app.core.logger import get_logger
 from app.core.exceptions import InvalidInputError
 
@@ -73,6 +75,16 @@ async def get_current_user(
     # For demo purposes, just return the token as user_id
     return credentials.credentials
 
+async def require_admin(x_admin_key: Optional[str] = Header(None, description="Admin API key")):
+    """Allow the request only with the configured admin API key"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin API key")
+    
+    return True
+
 async def validate_message_content(message: str) -> str:
     """Validate and sanitize message content"""
     if not message or not message.strip():
@@ -112,4 +124,8 @@ common_dependencies = [
 
 chat_dependencies = common_dependencies + [
     Depends(get_current_user)
-]
\ No newline at end of file
+]
+
+admin_dependencies = common_dependencies + [
+    Depends(require_admin)
+]
@@ -5,6 +5,7 @@ System health monitoring and status endpoints.
 """
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any
 import asyncio
 import time
@@ -14,9 +15,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.api.dependencies import common_dependencies
-from app.database.chroma_client import ChromaClient
-from app.database.redis_client import RedisClient
-from app.services.huggingface_client import HuggingFaceClient
+from app.services.resource_registry import resource_registry
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -41,7 +40,7 @@ async def detailed_health_check() -> Dict[str, Any]:
     
     # Check Redis connection
     try:
-        redis_client = RedisClient()
+        redis_client = resource_registry.get_redis_client()
         await redis_client.redis.ping()
         services_status["redis"] = "connected"
     except Exception as e:
@@ -51,7 +50,7 @@ async def detailed_health_check() -> Dict[str, Any]:
     
     # Check ChromaDB
     try:
-        chroma_client = ChromaClient()
+        chroma_client = resource_registry.get_chroma_client()
         # Simple test query
         chroma_client.client.heartbeat()
         services_status["chromadb"] = "connected"
@@ -60,30 +59,62 @@ async def detailed_health_check() -> Dict[str, Any]:
         services_status["chromadb"] = "disconnected"
         overall_status = "degraded"
     
-    # Check Hugging Face API
-    try:
-        hf_client = HuggingFaceClient()
-        # Test with a simple request (timeout quickly)
-        test_result = await asyncio.wait_for(
-            hf_client.classify_text("test", ["positive", "negative"]),
-            timeout=5.0
-        )
-        services_status["huggingface"] = "available"
-    except asyncio.TimeoutError:
-        services_status["huggingface"] = "timeout"
-        overall_status = "degraded"
-    except Exception as e:
-        logger.error(f"Hugging Face health check failed: {e}")
-        services_status["huggingface"] = "unavailable"
+    # Circuit breakers in front of the inference API
+    circuits = resource_registry.get_http_client().get_circuit_states()
+    open_circuits = [endpoint for endpoint, circuit in circuits.items() if circuit["state"] != "closed"]
+    if open_circuits:
         overall_status = "degraded"
     
+    # Check Hugging Face API (with an open circuit the call would only return a fallback)
+    if open_circuits:
+        services_status["huggingface"] = "circuit_open"
+    else:
+        try:
+            hf_client = resource_registry.get_llm_client()
+            # Test with a simple request (timeout quickly)
+            test_result = await asyncio.wait_for(
+                hf_client.classify_text("test", ["positive", "negative"]),
+                timeout=5.0
+            )
+            services_status["huggingface"] = "available"
+        except asyncio.TimeoutError:
+            services_status["huggingface"] = "timeout"
+            overall_status = "degraded"
+        except Exception as e:
+            logger.error(f"Hugging Face health check failed: {e}")
+            services_status["huggingface"] = "unavailable"
+            overall_status = "degraded"
+    
     return {
         "status": overall_status,
         "timestamp": datetime.now().isoformat(),
         "services": services_status,
+        "circuits": circuits,
         "uptime_seconds": time.time() - start_time if 'start_time' in globals() else 0
     }
 
+@router.get("/circuits", dependencies=common_dependencies)
+async def get_circuit_states() -> Dict[str, Any]:
+    """Inference API circuit breaker state per model endpoint"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "circuits": resource_registry.get_http_client().get_circuit_states()
+    }
+
+@router.get("/circuits/metrics", dependencies=common_dependencies, response_class=PlainTextResponse)
+async def get_circuit_metrics() -> PlainTextResponse:
+    """Circuit breaker state and transition counters in Prometheus text format"""
+    lines = resource_registry.get_http_client().circuit_prometheus_lines()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@router.get("/resources", dependencies=common_dependencies)
+async def get_resource_stats() -> Dict[str, Any]:
+    """Load time and memory footprint of shared process-wide resources"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **resource_registry.get_stats()
+    }
+
 @router.get("/metrics", dependencies=common_dependencies)
 async def get_system_metrics() -> Dict[str, Any]:
     """Get basic system performance metrics"""
@@ -1,6 +1,6 @@
 # Application configuration settings
 from pydantic_settings  import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import secrets
 from dotenv import load_dotenv
 import os
@@ -16,12 +16,95 @@ class Settings(BaseSettings):
     HUGGINGFACE_API_KEY: Optional[str] = os.getenv("HUGGINGFACE_API_KEY")
     HUGGINGFACE_API_URL: str = "https://api-inference.huggingface.co"
     HUGGINGFACE_TIMEOUT: int = 30
+    CLASSIFICATION_MODEL: str = "facebook/bart-large-mnli"
+    GENERATION_MODEL: str = "meta-llama/Llama-2-7b-chat-hf"
+    EMBEDDINGS_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    
+    # Inference HTTP Connection Pool
+    HF_HTTP2_ENABLED: bool = True
+    HF_POOL_MAX_CONNECTIONS: int = 100
+    HF_POOL_MAX_KEEPALIVE: int = 20
+    HF_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    HF_POOL_PER_HOST_LIMIT: int = 50
+    
+    # Inference Circuit Breakers (one per model endpoint)
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_WINDOW_SECONDS: float = 30.0
+    CIRCUIT_MIN_REQUESTS: int = 10  # calls in the window before rates are judged
+    CIRCUIT_ERROR_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_SLOW_CALL_SECONDS: float = 10.0
+    CIRCUIT_SLOW_CALL_RATE_THRESHOLD: float = 0.8
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 2
+    
+    # Deadlines and Hedging (per model role)
+    REQUEST_DEADLINE_SECONDS: float = 45.0  # whole workflow; stages get what is left
+    INTENT_STAGE_DEADLINE_SECONDS: float = 10.0
+    CLASSIFICATION_TIMEOUT_SECONDS: float = 30.0
+    GENERATION_TIMEOUT_SECONDS: float = 60.0
+    CLASSIFICATION_HEDGING_ENABLED: bool = False
+    GENERATION_HEDGING_ENABLED: bool = False  # sampled generations aren't idempotent: a hedge pays for a second, different answer
+    HEDGE_QUANTILE: float = 0.95  # hedge once a call outlasts this latency quantile
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_MAX_RATE: float = 0.1  # at most this fraction of calls are hedged
+    HEDGE_WINDOW_SIZE: int = 200
+    
+    # Intent Classification
+    INTENT_CLASSIFIER_BACKEND: str = "remote"  # remote, local
+    LOCAL_CLASSIFIER_TEMPERATURE: float = 0.05
+    INTENT_BATCHING_ENABLED: bool = True
+    INTENT_BATCH_WINDOW_MS: float = 10.0
+    INTENT_BATCH_MAX_SIZE: int = 16
+    
+    # Intent Cascade (cache -> rules -> local -> remote)
+    INTENT_CASCADE_ENABLED: bool = True
+    INTENT_CACHE_TTL: int = 600  # 10 minutes
+    INTENT_CACHE_MAX_ENTRIES: int = 5000
+    INTENT_CASCADE_RULE_MIN_VOTES: int = 2
+    INTENT_CASCADE_RULE_MARGIN: int = 2
+    INTENT_CASCADE_ENTITY_WEIGHT: int = 2
+    INTENT_CASCADE_RULE_CONFIDENCE: float = 0.9
+    INTENT_CASCADE_LOCAL_THRESHOLD: float = 0.8
+    INTENT_CASCADE_SHADOW_RATE: float = 0.05
+    
+    # Prompt Context (token budgets per agent)
+    CONTEXT_TOKENIZER_MODEL: str = "hf-internal-testing/llama-tokenizer"  # ungated copy of the Llama tokenizer; "" uses GENERATION_MODEL
+    CONTEXT_TOKENS_DEFAULT: int = 512
+    CONTEXT_TOKENS_PRODUCT: int = 512
+    CONTEXT_TOKENS_REFUND: int = 640
+    CONTEXT_TOKENS_TECHNICAL: int = 640
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8  # term overlap at which chunks count as duplicates
     
     # Database Configuration
     CHROMA_PERSIST_DIRECTORY: str = "./data/chroma_db"
+    CHROMA_QUERY_WORKERS: int = 4
+    CHROMA_QUERY_TIMEOUT: float = 5.0  # seconds
+    CHROMA_MAX_QUEUE_DEPTH: int = 100  # queries waiting for a worker before new ones are rejected
+    CHROMA_BATCHING_ENABLED: bool = True
+    CHROMA_BATCH_WINDOW_MS: float = 5.0
+    CHROMA_BATCH_MAX_SIZE: int = 32
+    RETRIEVAL_BACKEND: str = "chroma"  # chroma, numpy (memory-mapped exact index exported from Chroma)
+    VECTOR_INDEX_DIRECTORY: str = "./data/vector_index"
+    VECTOR_INDEX_CHECK_INTERVAL: int = 60  # seconds between checks that the index still matches its collection
+    HYBRID_SEARCH_ENABLED: bool = True  # BM25 + vector search merged with reciprocal rank fusion
+    HYBRID_RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 20  # results taken from each retriever before fusion
+    LEXICAL_SHORTCUT_MAX_TERMS: int = 3  # keyword queries this short skip the embedding model (0 disables)
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50
+    CONVERSATION_HISTORY_MAX_MESSAGES: int = 100  # per conversation, older messages are trimmed
+    CONVERSATION_TTL: int = 86400  # 24 hours
+    CONVERSATION_WRITE_BACKGROUND: bool = False  # write history off the request path
+    CONVERSATION_WRITE_QUEUE_SIZE: int = 1000
+    CONVERSATION_MEMORY_MAX_TOKENS: int = 512  # chat history budget per prompt
+    CONVERSATION_MEMORY_MAX_CONVERSATIONS: int = 1000  # resident in process, least recently used evicted
+    CONVERSATION_MEMORY_IDLE_TTL: int = 1800  # 30 minutes
+    CONVERSATION_MEMORY_LOAD_MESSAGES: int = 20  # read from Redis when rebuilding a window
+    CHECKPOINT_BACKEND: str = "redis"  # redis, memory (LangGraph workflow state)
+    CHECKPOINT_TTL: int = 86400  # 24 hours
+    CHECKPOINT_MAX_PER_THREAD: int = 10  # older checkpoints are deleted
     
     # Security
     # SECRET_KEY: str = secrets.token_urlsafe(32)
@@ -30,6 +113,7 @@ class Settings(BaseSettings):
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8501"]
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 30
+    ADMIN_API_KEY: Optional[str] = None  # admin endpoints are disabled when unset
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -39,8 +123,42 @@ class Settings(BaseSettings):
     # Performance
     MAX_CONCURRENT_REQUESTS: int = 100
     REQUEST_TIMEOUT: int = 30
+    STREAM_MAX_BUFFERED_EVENTS: int = 64  # per streaming response; generation pauses when full
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = True  # start every agent's searches while the intent is classified
     CACHE_TTL: int = 3600  # 1 hour
     
+    # Semantic Response Cache
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_NEAR_MISS_THRESHOLD: float = 0.85
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000  # per agent
+    SEMANTIC_CACHE_TTL: int = 3600
+    
+    # Single-Flight Coalescing (identical in-flight requests share one answer)
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_DISTRIBUTED: bool = False  # coordinate workers with a Redis lock
+    SINGLE_FLIGHT_LOCK_TTL: float = 30.0
+    SINGLE_FLIGHT_WAIT_SECONDS: float = 20.0  # how long other workers wait for the holder's answer
+    SINGLE_FLIGHT_POLL_INTERVAL_MS: int = 100
+    
+    # Local (L1) Cache
+    L1_CACHE_ENABLED: bool = True
+    L1_CACHE_MAX_ENTRIES: int = 5000
+    L1_CACHE_DEFAULT_TTL: int = 60
+    L1_CACHE_PREFIX_TTLS: Dict[str, int] = {
+        "ai_resp:": 300,
+        "prod_info:": 600,
+        "kb:": 600,
+        "api_resp:": 60,
+        "order:": 30,
+        "session:": 60
+    }
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_INVALIDATION_BATCH_SIZE: int = 500  # keys per SCAN/UNLINK round-trip
+    CACHE_STATS_SAMPLE_INTERVAL: int = 30  # seconds between keyspace scans
+    CACHE_STATS_SAMPLE_SIZE: int = 50  # keys per prefix passed to MEMORY USAGE
+    CACHE_STATS_MAX_SCAN_KEYS: int = 10000  # per prefix
+    
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 60
     RATE_LIMIT_WINDOW: int = 60  # seconds
@@ -0,0 +1,68 @@
+"""
+Deadlines
+
+Per-request deadline carried in a context variable. The orchestrator opens a
+scope for the whole request and each workflow stage can narrow it; network
+calls ask for the remaining budget instead of using fixed timeouts, so a
+request that has already spent its time fails fast to a fallback.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The request's deadline passed before a call could start"""
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[float]:
+    """Run the block with at most `seconds` left (never extends an outer deadline)"""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+@contextmanager
+def shared_deadline(deadlines: Iterable[Optional[float]]) -> Iterator[Optional[float]]:
+    """Run work done on behalf of several requests until the last of them gives up
+
+    Replaces the current deadline; None if any request has no deadline at all.
+    """
+    deadlines = list(deadlines)
+    deadline = None if not deadlines or None in deadlines else max(deadlines)
+
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+def current_deadline() -> Optional[float]:
+    """Absolute (monotonic) deadline of the current scope, if any"""
+    return _deadline.get()
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current scope, or None outside any scope"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def timeout_for(stage_timeout: float) -> float:
+    """Timeout for a call: the stage's own cap, shortened to the remaining budget"""
+    left = remaining()
+    if left is None:
+        return stage_timeout
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded by {-left:.2f}s")
+    return min(stage_timeout, left)
@@ -0,0 +1,165 @@
+"""
+Keywords
+
+One Aho-Corasick automaton over every keyword list used for rule-based
+scoring (fallback intent classification, agent confidence, refund request
+type, technical issue type). A message is scanned once, in a single pass,
+and each call site reads its per-category hit count from the result instead
+of re-scanning the lowercased text for every keyword.
+
+Matching keeps the substring semantics of the original `keyword in text`
+checks, including overlapping keywords ("return" and "return policy").
+"""
+
+from collections import Counter, OrderedDict, deque
+from typing import Dict, Iterable, List, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+KEYWORD_CATEGORIES: Dict[str, List[str]] = {
+    # WorkingAgentSystem.classify_intent (checked in this order)
+    "intent.product": ["price", "cost", "plan", "feature", "product", "buy", "pricing", "subscription"],
+    "intent.refund": ["refund", "return", "money back", "cancel", "billing"],
+    "intent.technical": ["error", "bug", "problem", "issue", "help", "login", "crash", "technical"],
+
+    # Zero-shot fallback when the classifier is unavailable
+    "fallback.product": ["price", "buy", "product", "features"],
+    "fallback.refund": ["refund", "return", "money"],
+    "fallback.technical": ["error", "bug", "help", "issue"],
+
+    # Agent confidence scores
+    "confidence.product": ["price", "features", "product", "buy", "purchase", "plan"],
+    "confidence.refund": [
+        "refund", "return", "money back", "cancel order", "policy",
+        "reimburse", "charge back", "dispute", "billing", "payment"
+    ],
+    "confidence.refund.boost": ["want refund", "return policy", "money back"],
+    "confidence.technical": [
+        "error", "bug", "crash", "login", "technical", "support", "help",
+        "issue", "problem", "not working", "freeze", "stuck", "slow",
+        "api", "code", "system", "server", "connection", "timeout"
+    ],
+    "confidence.technical.boost": ["error code", "exception", "stack trace", "debug"],
+
+    # RefundAgent request type (checked in this order)
+    "refund.policy_inquiry": ["policy", "how long", "can i", "what is", "explain", "rules", "terms"],
+    "refund.request": ["want refund", "return", "cancel", "money back", "process refund", "order"],
+
+    # TechnicalAgent issue type (checked in this order)
+    "issue.login_issues": ["login", "sign in", "password", "authentication", "access denied", "locked out"],
+    "issue.app_crashes": ["crash", "freeze", "stuck", "not working", "stops responding", "hangs"],
+    "issue.payment_issues": ["payment", "billing", "card", "charge", "transaction", "declined"],
+    "issue.performance_issues": ["slow", "loading", "timeout", "lag", "performance", "speed"],
+    "issue.api_errors": ["api", "endpoint", "error code", "400", "500", "unauthorized", "forbidden"]
+}
+
+class KeywordAutomaton:
+    """Aho-Corasick multi-pattern matcher returning distinct keyword hits per category"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]], cache_size: int = 1024):
+        self.categories = list(categories)
+        self.keywords: List[str] = []
+        # keyword index -> categories it belongs to
+        self.keyword_categories: List[Tuple[str, ...]] = []
+
+        keyword_ids: Dict[str, int] = {}
+        memberships: Dict[int, List[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+                keyword_memberships = memberships.setdefault(keyword_ids[keyword], [])
+                if category not in keyword_memberships:
+                    keyword_memberships.append(category)
+        self.keyword_categories = [tuple(memberships[i]) for i in range(len(self.keywords))]
+
+        self._build(keyword_ids)
+
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Counter]" = OrderedDict()
+        self.stats = {"scans": 0, "cache_hits": 0}
+
+    def _build(self, keyword_ids: Dict[str, int]):
+        """Trie goto table, BFS failure links and merged outputs"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+
+        for keyword, keyword_id in keyword_ids.items():
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._outputs.append(())
+                state = next_state
+            self._outputs[state] += (keyword_id,)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # A state also emits every keyword that ends at its failure state
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+
+    def matches(self, text: str) -> List[str]:
+        """Distinct keywords occurring in text"""
+        return [self.keywords[keyword_id] for keyword_id in sorted(self._match_ids(text.lower()))]
+
+    def _match_ids(self, text: str) -> set:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+
+        return found
+
+    def scan(self, text: str) -> Counter:
+        """Number of distinct keywords matched per category (missing categories count 0)"""
+        text = text.lower()
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            self.stats["cache_hits"] += 1
+            return Counter(cached)
+
+        self.stats["scans"] += 1
+        hits = Counter()
+        for keyword_id in self._match_ids(text):
+            for category in self.keyword_categories[keyword_id]:
+                hits[category] += 1
+
+        # Several call sites score the same message in one request
+        self._cache[text] = hits
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return Counter(hits)
+
+    def first_match(self, text: str, categories: Iterable[str], default: str = None) -> str:
+        """First category (in the given order) with at least one hit"""
+        hits = self.scan(text)
+        return next((category for category in categories if hits[category]), default)
+
+# Global keyword engine instance
+keyword_engine = KeywordAutomaton(KEYWORD_CATEGORIES)
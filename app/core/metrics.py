@@ -0,0 +1,80 @@
+"""
+Metrics
+
+Lightweight in-process latency histograms and Prometheus text-format
+rendering for service-level instrumentation.
+"""
+
+import bisect
+from typing import Any, Dict, List, Sequence
+
+# Upper bounds in seconds, from in-process hits (~µs) to slow network calls
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labels: Dict[str, Any] = None) -> str:
+    """Render a Prometheus label set"""
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+def metric_line(name: str, value: float, labels: Dict[str, Any] = None) -> str:
+    """Single Prometheus sample line"""
+    return f"{name}{format_labels(labels)} {value}"
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cumulative, Prometheus-compatible)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        """Record one duration"""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, q: float) -> float:
+        """Bucket upper bound containing the q-th quantile, in seconds"""
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, mean and approximate percentiles in milliseconds"""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3)
+        }
+
+    def prometheus_lines(self, name: str, labels: Dict[str, Any] = None) -> List[str]:
+        """_bucket/_sum/_count sample lines"""
+        labels = labels or {}
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            lines.append(metric_line(f"{name}_bucket", cumulative, {**labels, "le": bound}))
+        lines.append(metric_line(f"{name}_bucket", self.count, {**labels, "le": "+Inf"}))
+        lines.append(metric_line(f"{name}_sum", round(self.sum, 6), labels))
+        lines.append(metric_line(f"{name}_count", self.count, labels))
+        return lines
@@ -1,78 +1,460 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import threading
+import time
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.core.config import settings
+from app.core.deadlines import timeout_for
 from app.core.logger import get_logger
+from app.core.metrics import LatencyHistogram
+from app.database.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.database.vector_index import NumpyVectorIndex
 
 logger = get_logger(__name__)
 
+# (collection, query, limit) -> search task started ahead of the agent that needs it
+SearchKey = Tuple[str, str, int]
+_prefetched_searches: ContextVar[Optional[Dict[SearchKey, asyncio.Task]]] = ContextVar("prefetched_searches", default=None)
+
+class ChromaOverloadedError(RuntimeError):
+    """Raised when the query queue is full"""
+
 class ChromaClient:
-    """ChromaDB vector database client"""
+    """ChromaDB vector database client.
+    
+    Chroma's query (embedding + HNSW search) is synchronous, so every call runs
+    on a dedicated bounded thread pool with a per-query timeout instead of on
+    the event loop. Concurrent searches against the same collection are
+    coalesced into one multi-query call, which embeds and searches the whole
+    batch at once.
+    
+    With RETRIEVAL_BACKEND=numpy, queries are answered from a memory-mapped
+    exact index exported from the collections instead of Chroma's store.
+    
+    With HYBRID_SEARCH_ENABLED, an in-process BM25 index is searched alongside
+    and the two rankings are fused; short keyword queries fully covered by the
+    BM25 vocabulary are answered lexically without embedding the query.
+    """
     
-    def __init__(self):
+    # Fields of a Chroma QueryResult that hold one row per query text
+    RESULT_FIELDS = ("ids", "documents", "metadatas", "distances")
+    
+    def __init__(
+        self,
+        max_workers: int = None,
+        query_timeout: float = None,
+        max_queue_depth: int = None,
+        batching_enabled: bool = None,
+        hybrid_search: bool = None
+    ):
         self.client = chromadb.PersistentClient(
             path=settings.CHROMA_PERSIST_DIRECTORY,
             settings=Settings(anonymized_telemetry=False)
         )
         self.products_collection = self.client.get_or_create_collection("products")
         self.faqs_collection = self.client.get_or_create_collection("faqs")
+        
+        self.max_workers = max_workers or settings.CHROMA_QUERY_WORKERS
+        self.query_timeout = query_timeout or settings.CHROMA_QUERY_TIMEOUT
+        self.max_queue_depth = max_queue_depth or settings.CHROMA_MAX_QUEUE_DEPTH
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chroma-query")
+        
+        self.batching_enabled = settings.CHROMA_BATCHING_ENABLED if batching_enabled is None else batching_enabled
+        self.query_batchers: Dict[Tuple[str, int], "MicroBatcher"] = {}
+        
+        self.vector_indexes: Dict[str, NumpyVectorIndex] = {}
+        self._vector_index_errors: Dict[str, str] = {}
+        self._next_vector_index_check = time.monotonic() + settings.VECTOR_INDEX_CHECK_INTERVAL
+        if settings.RETRIEVAL_BACKEND == "numpy":
+            self._embedding_function = DefaultEmbeddingFunction()
+            self.load_vector_indexes()
+        
+        self.hybrid_search = settings.HYBRID_SEARCH_ENABLED if hybrid_search is None else hybrid_search
+        self.lexical_indexes: Dict[str, BM25Index] = {}
+        if self.hybrid_search:
+            self.build_lexical_indexes()
+        
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "queued": 0,
+            "running": 0,
+            "max_queued": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "errors": 0,
+            "vector_queries": 0,
+            "hybrid_queries": 0,
+            "lexical_queries": 0,
+            "prefetched": 0,
+            "prefetch_hits": 0,
+            "prefetch_wasted": 0
+        }
+        self._stats_lock = threading.Lock()
+        self.queue_wait = LatencyHistogram()
+        self.query_time = LatencyHistogram()
+    
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking Chroma call on the query pool, bounded by queue depth and timeout"""
+        # The request's remaining deadline can shorten the query timeout
+        timeout = timeout_for(self.query_timeout)
+        
+        enqueued = time.perf_counter()
+        with self._stats_lock:
+            if self.stats["queued"] >= self.max_queue_depth:
+                self.stats["rejected"] += 1
+                raise ChromaOverloadedError(f"Chroma query queue full ({self.max_queue_depth} waiting)")
+            self.stats["submitted"] += 1
+            self.stats["queued"] += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        
+        def task():
+            started = time.perf_counter()
+            with self._stats_lock:
+                self.stats["queued"] -= 1
+                self.stats["running"] += 1
+                self.queue_wait.observe(started - enqueued)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.stats["running"] -= 1
+                    self.stats["completed"] += 1
+                    self.query_time.observe(time.perf_counter() - started)
+        
+        def release_if_cancelled(future: Future):
+            # A timed-out or cancelled caller cancels a job still waiting in the queue, so task() never runs
+            if future.cancelled():
+                with self._stats_lock:
+                    self.stats["queued"] -= 1
+        
+        future = self._executor.submit(task)
+        future.add_done_callback(release_if_cancelled)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # The worker thread can't be interrupted; it finishes in the background
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+    
+    def load_vector_indexes(self):
+        """Memory-map exported indexes that match their collection; other collections use Chroma
+        
+        An index is remapped when a newer export is on disk, and dropped when
+        its document count no longer matches the collection (the knowledge
+        base was reloaded without re-exporting).
+        """
+        for collection in (self.products_collection, self.faqs_collection):
+            index = self.vector_indexes.get(collection.name)
+            try:
+                version = NumpyVectorIndex.version_of(settings.VECTOR_INDEX_DIRECTORY, collection.name)
+                if index is None or index.version != version:
+                    # Same embedding function Chroma used for the stored document vectors
+                    index = NumpyVectorIndex.load(
+                        settings.VECTOR_INDEX_DIRECTORY, collection.name, self._embedding_function
+                    )
+                    logger.info(f"Loaded vector index '{collection.name}' ({len(index)} documents)")
+                
+                count = collection.count()
+                if len(index) != count:
+                    raise ValueError(f"index has {len(index)} documents, collection has {count}")
+                
+                self.vector_indexes[collection.name] = index
+                self._vector_index_errors.pop(collection.name, None)
+            except Exception as e:
+                self.vector_indexes.pop(collection.name, None)
+                # Checked periodically; only log when the reason changes
+                if self._vector_index_errors.get(collection.name) != str(e):
+                    self._vector_index_errors[collection.name] = str(e)
+                    logger.warning(f"Vector index '{collection.name}' unavailable, using Chroma: {e}")
+    
+    def _schedule_vector_index_check(self):
+        """Re-check the vector indexes against their collections every VECTOR_INDEX_CHECK_INTERVAL seconds"""
+        now = time.monotonic()
+        if settings.RETRIEVAL_BACKEND != "numpy" or now < self._next_vector_index_check:
+            return
+        
+        self._next_vector_index_check = now + settings.VECTOR_INDEX_CHECK_INTERVAL
+        # In the background on the query pool; queries keep using the current indexes meanwhile
+        self._executor.submit(self.load_vector_indexes)
     
-    async def search_products(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Search product information using vector similarity"""
+    def build_lexical_indexes(self):
+        """BM25 indexes over the documents already stored in each collection (no embedding needed)"""
+        for collection in (self.products_collection, self.faqs_collection):
+            try:
+                data = collection.get(include=["documents", "metadatas"])
+                self.lexical_indexes[collection.name] = BM25Index.from_documents(
+                    collection.name, data["ids"], data["documents"], data["metadatas"]
+                )
+            except Exception as e:
+                logger.warning(f"Lexical index '{collection.name}' unavailable, using vector search only: {e}")
+    
+    async def refresh_indexes(self):
+        """Reload the vector indexes and rebuild the lexical ones from the collections (after a knowledge base reload)"""
         try:
-            results = self.products_collection.query(
-                query_texts=[query],
-                n_results=limit
+            loop = asyncio.get_running_loop()
+            if settings.RETRIEVAL_BACKEND == "numpy":
+                await loop.run_in_executor(self._executor, self.load_vector_indexes)
+            if self.hybrid_search:
+                await loop.run_in_executor(self._executor, self.build_lexical_indexes)
+                logger.info(f"Rebuilt lexical indexes: { {name: len(index) for name, index in self.lexical_indexes.items()} }")
+        except Exception as e:
+            logger.error(f"Failed to rebuild search indexes: {e}")
+    
+    async def export_vector_indexes(self) -> Dict[str, int]:
+        """Write the NumPy index files for every collection (run after loading the knowledge base)"""
+        exported = {}
+        loop = asyncio.get_running_loop()
+        
+        for collection in (self.products_collection, self.faqs_collection):
+            exported[collection.name] = await loop.run_in_executor(
+                self._executor,
+                NumpyVectorIndex.export_from_collection,
+                collection,
+                settings.VECTOR_INDEX_DIRECTORY
             )
+        
+        return exported
+    
+    async def query_many(self, collection, queries: List[str], limit: int) -> List[Dict[str, Any]]:
+        """One vectorized query for several texts, split into a single-query result per text"""
+        self._schedule_vector_index_check()
+        index = self.vector_indexes.get(collection.name)
+        search = index.query if index is not None else collection.query
+        results = await self._run(search, query_texts=list(queries), n_results=limit)
+        
+        return [
+            {
+                field: [results[field][i]] if results.get(field) is not None else None
+                for field in self.RESULT_FIELDS
+            }
+            for i in range(len(queries))
+        ]
+    
+    async def query(self, collection, query: str, limit: int, mode: str = None) -> Dict[str, Any]:
+        """Hybrid (default), vector or lexical query without blocking the event loop"""
+        lexical_index = self.lexical_indexes.get(collection.name)
+        mode = mode or ("hybrid" if self.hybrid_search else "vector")
+        
+        if mode == "vector" or lexical_index is None:
+            self.stats["vector_queries"] += 1
+            return await self._vector_query(collection, query, limit)
+        
+        candidates = max(limit, settings.HYBRID_CANDIDATES)
+        lexical_ranking = [doc_id for doc_id, _ in lexical_index.search(query, candidates)]
+        
+        # Exact keyword lookups never touch the embedding model
+        if mode == "lexical" or (lexical_ranking and lexical_index.covers(query, settings.LEXICAL_SHORTCUT_MAX_TERMS)):
+            self.stats["lexical_queries"] += 1
+            return self._fused_result([lexical_ranking], lexical_index, {}, limit)
+        
+        try:
+            vector_results = await self._vector_query(collection, query, candidates)
+        except Exception as e:
+            if not lexical_ranking:
+                raise
+            logger.warning(f"Vector search failed, using lexical results only: {e!r}")
+            self.stats["lexical_queries"] += 1
+            return self._fused_result([lexical_ranking], lexical_index, {}, limit)
+        
+        self.stats["hybrid_queries"] += 1
+        distances = vector_results["distances"][0] if vector_results.get("distances") else [None] * len(vector_results["ids"][0])
+        vector_documents = {
+            doc_id: (document, metadata, distance)
+            for doc_id, document, metadata, distance in zip(
+                vector_results["ids"][0], vector_results["documents"][0], vector_results["metadatas"][0], distances
+            )
+        }
+        return self._fused_result(
+            [vector_results["ids"][0], lexical_ranking], lexical_index, vector_documents, limit
+        )
+    
+    def _fused_result(
+        self,
+        rankings: List[List[str]],
+        lexical_index: BM25Index,
+        vector_documents: Dict[str, Tuple[str, Dict[str, Any], Optional[float]]],
+        limit: int
+    ) -> Dict[str, Any]:
+        """Single-query result in fused order
+
+        Distances are the vector distances (None for lexical-only matches);
+        the fusion score is reported separately as fused_scores.
+        """
+        fused = reciprocal_rank_fusion(rankings, settings.HYBRID_RRF_K)[:limit]
+        
+        ids, documents, metadatas, distances, fused_scores = [], [], [], [], []
+        for doc_id, score in fused:
+            if doc_id in vector_documents:
+                document, metadata, distance = vector_documents[doc_id]
+            else:
+                (document, metadata), distance = lexical_index.get(doc_id), None
+            ids.append(doc_id)
+            documents.append(document)
+            metadatas.append(metadata or {})
+            distances.append(distance)
+            fused_scores.append(round(score, 6))
+        
+        return {
+            "ids": [ids],
+            "documents": [documents],
+            "metadatas": [metadatas],
+            "distances": [distances],
+            "fused_scores": [fused_scores]
+        }
+    
+    async def _vector_query(self, collection, query: str, limit: int) -> Dict[str, Any]:
+        if not self.batching_enabled:
+            return (await self.query_many(collection, [query], limit))[0]
+        
+        return await self._get_query_batcher(collection, limit).submit(query)
+    
+    def _get_query_batcher(self, collection, limit: int) -> "MicroBatcher":
+        """One micro-batcher per collection and result count, since a batch shares n_results"""
+        # Imported here: app.services imports the database package at load time
+        from app.services.micro_batcher import MicroBatcher
+        
+        key = (collection.name, limit)
+        
+        if key not in self.query_batchers:
+            self.query_batchers[key] = MicroBatcher(
+                batch_fn=lambda queries: self.query_many(collection, queries, limit),
+                max_batch_size=settings.CHROMA_BATCH_MAX_SIZE,
+                max_wait_ms=settings.CHROMA_BATCH_WINDOW_MS,
+                name=f"chroma[{collection.name},k={limit}]"
+            )
+        
+        return self.query_batchers[key]
+    
+    async def search(self, collection: str, query: str, limit: int, mode: str = None) -> List[Dict[str, Any]]:
+        """Search a collection by name, reusing a matching prefetched search if one was started"""
+        prefetched = _prefetched_searches.get()
+        task = prefetched.pop((collection, query, limit), None) if prefetched and mode is None else None
+        if task is not None:
+            self.stats["prefetch_hits"] += 1
+            return await task
+        
+        search = self.search_faqs if collection == "faqs" else self.search_products
+        return await search(query, limit, mode)
+    
+    @contextmanager
+    def prefetch(self, searches: List[SearchKey]) -> Iterator[Dict[SearchKey, asyncio.Task]]:
+        """Start searches now; matching search() calls inside the block await them instead of querying"""
+        # Tasks are created before the context variable is set, so they run real searches
+        tasks = {key: asyncio.ensure_future(self.search(*key)) for key in dict.fromkeys(searches)}
+        self.stats["prefetched"] += len(tasks)
+        token = _prefetched_searches.set(tasks)
+        
+        try:
+            yield tasks
+        finally:
+            _prefetched_searches.reset(token)
+            # Searches for the agents that weren't selected
+            for task in tasks.values():
+                self.stats["prefetch_wasted"] += 1
+                task.cancel()
+    
+    async def search_many(self, queries: List[str], collection: str = "products", limit: int = 5) -> List[List[Dict[str, Any]]]:
+        """Search several queries concurrently; with batching enabled they share one vectorized query"""
+        return list(await asyncio.gather(*[self.search(collection, query, limit) for query in queries]))
+    
+    async def search_products(self, query: str, limit: int = 5, mode: str = None) -> List[Dict[str, Any]]:
+        """Search product information (hybrid, vector or lexical)"""
+        try:
+            results = await self.query(self.products_collection, query, limit, mode)
+            return self._documents(results, lambda i: results['metadatas'][0][i].get('source', 'products_db'))
             
-            documents = []
-            for i, doc in enumerate(results['documents'][0]):
-                documents.append({
-                    'content': doc,
-                    'source': results['metadatas'][0][i].get('source', 'products_db'),
-                    'score': results['distances'][0][i] if results['distances'] else 1.0
-                })
-            
-            return documents
-            
+        except asyncio.TimeoutError:
+            logger.error(f"Product search timed out after {self.query_timeout}s")
+            return []
         except Exception as e:
             logger.error(f"Product search error: {e}")
             return []
     
-    async def search_faqs(self, query: str, limit: int = 3) -> List[Dict[str, Any]]:
+    async def search_faqs(self, query: str, limit: int = 3, mode: str = None) -> List[Dict[str, Any]]:
         """Search FAQ database"""
         try:
-            results = self.faqs_collection.query(
-                query_texts=[query],
-                n_results=limit
-            )
-            
-            documents = []
-            for i, doc in enumerate(results['documents'][0]):
-                documents.append({
-                    'content': doc,
-                    'source': 'faqs',
-                    'score': results['distances'][0][i] if results['distances'] else 1.0
-                })
-            
-            return documents
+            results = await self.query(self.faqs_collection, query, limit, mode)
+            return self._documents(results, lambda i: 'faqs')
             
+        except asyncio.TimeoutError:
+            logger.error(f"FAQ search timed out after {self.query_timeout}s")
+            return []
         except Exception as e:
             logger.error(f"FAQ search error: {e}")
             return []
     
+    @staticmethod
+    def _documents(results: Dict[str, Any], source: Callable[[int], str]) -> List[Dict[str, Any]]:
+        """Search result rows as documents; score stays the vector distance (1.0 when there is none)"""
+        distances = results['distances'][0] if results.get('distances') else None
+        fused_scores = results['fused_scores'][0] if results.get('fused_scores') else None
+        
+        documents = []
+        for i, doc in enumerate(results['documents'][0]):
+            distance = distances[i] if distances else None
+            document = {
+                'content': doc,
+                'source': source(i),
+                'score': distance if distance is not None else 1.0
+            }
+            if fused_scores:
+                document['fused_score'] = fused_scores[i]
+            documents.append(document)
+        
+        return documents
+    
     async def add_product(self, content: str, metadata: Dict[str, Any], doc_id: str):
         """Add product to knowledge base"""
         try:
-            self.products_collection.add(
-                documents=[content],
-                metadatas=[metadata],
-                ids=[doc_id]
+            # Writes embed the document too, so they share the pool (without the query timeout)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._executor,
+                lambda: self.products_collection.add(
+                    documents=[content],
+                    metadatas=[metadata],
+                    ids=[doc_id]
+                )
             )
+            if self.products_collection.name in self.lexical_indexes:
+                self.lexical_indexes[self.products_collection.name].add(doc_id, content, metadata)
             logger.info(f"Added product document: {doc_id}")
         except Exception as e:
-            logger.error(f"Failed to add product: {e}")
\ No newline at end of file
+            logger.error(f"Failed to add product: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Query pool depth, timeouts and latency"""
+        return {
+            **self.stats,
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "query_timeout": self.query_timeout,
+            "queue_wait": self.queue_wait.snapshot(),
+            "query_time": self.query_time.snapshot(),
+            "batching_enabled": self.batching_enabled,
+            "retrieval_backend": settings.RETRIEVAL_BACKEND,
+            "vector_indexes": {name: len(index) for name, index in self.vector_indexes.items()},
+            "hybrid_search": self.hybrid_search,
+            "lexical_indexes": {name: len(index) for name, index in self.lexical_indexes.items()},
+            "batchers": {
+                batcher.name: batcher.get_stats()
+                for batcher in self.query_batchers.values()
+            }
+        }
+    
+    def close(self):
+        """Stop the query pool without waiting for running queries"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Lexical Index
+
+In-process BM25 inverted index over the knowledge base, for the exact tokens
+dense retrieval handles poorly (plan names, error codes, order IDs), and
+reciprocal rank fusion to merge its ranking with the vector search.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Words, numbers and joined codes such as "err-500" or "v2.1"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "if", "in", "is", "it", "my", "of", "on", "or", "the",
+    "to", "was", "what", "when", "where", "which", "with", "you", "your"
+})
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased index terms, without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Merge ranked id lists; returns (id, fused score) best first"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of term -> [(document, term frequency)]"""
+
+    def __init__(self, name: str, k1: float = 1.5, b: float = 0.75):
+        self.name = name
+        self.k1 = k1
+        self.b = b
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._positions: Dict[str, int] = {}
+        self._length_norms: Optional[List[float]] = None
+
+    @classmethod
+    def from_documents(
+        cls,
+        name: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> "BM25Index":
+        """Build an index from parallel id/document/metadata lists"""
+        index = cls(name)
+        for i, (doc_id, document) in enumerate(zip(ids, documents)):
+            index.add(doc_id, document or "", (metadatas[i] if metadatas else None) or {})
+        return index
+
+    def add(self, doc_id: str, document: str, metadata: Dict[str, Any] = None):
+        """Index one document (ignored if the id is already indexed)"""
+        if doc_id in self._positions:
+            return
+
+        position = len(self.ids)
+        terms = Counter(tokenize(document))
+        for term, frequency in terms.items():
+            self.postings[term].append((position, frequency))
+
+        self._positions[doc_id] = position
+        self.ids.append(doc_id)
+        self.documents.append(document)
+        self.metadatas.append(metadata or {})
+        self.doc_lengths.append(sum(terms.values()))
+        self.total_length += self.doc_lengths[-1]
+        self._length_norms = None
+
+    def _idf(self, term: str) -> float:
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _get_length_norms(self) -> List[float]:
+        """Per-document length normalization, recomputed only after documents are added"""
+        if self._length_norms is None:
+            average_length = self.total_length / len(self.ids) or 1.0
+            self._length_norms = [
+                self.k1 * (1 - self.b + self.b * length / average_length)
+                for length in self.doc_lengths
+            ]
+        return self._length_norms
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Top documents by BM25 score as (id, score)"""
+        if not self.ids:
+            return []
+
+        length_norms = self._get_length_norms()
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for position, frequency in postings:
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + length_norms[position])
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.ids[position], score) for position, score in top]
+
+    def covers(self, query: str, max_terms: int) -> bool:
+        """Short keyword query whose every term is in the index, so lexical results suffice"""
+        terms = set(tokenize(query))
+        return 0 < len(terms) <= max_terms and all(term in self.postings for term in terms)
+
+    def get(self, doc_id: str) -> Tuple[str, Dict[str, Any]]:
+        """(document, metadata) for an indexed id"""
+        position = self._positions[doc_id]
+        return self.documents[position], self.metadatas[position]
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -37,4 +37,10 @@ class ChatResponse(BaseModel):
     confidence: float
     response_time: float
     conversation_id: str
-    suggestions: List[str] = []
\ No newline at end of file
+    suggestions: List[str] = []
+    metadata: Dict[str, Any] = {}
+
+class CacheInvalidationRequest(BaseModel):
+    cache_type: Optional[str] = None  # e.g. "ai_response", or a raw key prefix
+    identifier: Optional[str] = None  # single key within cache_type
+    tag: Optional[str] = None  # e.g. "agent:ProductAgent"
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+Redis Checkpointer
+
+LangGraph checkpoint saver backed by Redis, so conversation state is shared
+by every worker and node and expires instead of accumulating in the heap.
+
+Layout per thread and checkpoint namespace:
+    checkpoint_index:{thread}:{ns}        list of checkpoint ids, newest first, trimmed to N
+    checkpoint:{thread}:{ns}:{id}         hash of the serialized checkpoint, metadata and parent id
+    checkpoint_writes:{thread}:{ns}:{id}  hash of pending writes, one field per (task, index)
+
+Checkpoints are stored whole (channel values inline) with the graph's
+msgpack serializer; only the latest N are kept, so a conversation costs a
+bounded number of small keys, and every key carries the conversation TTL.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import redis.asyncio as redis
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata
+)
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class RedisCheckpointSaver(BaseCheckpointSaver):
+    """Async LangGraph checkpointer keeping the latest checkpoints per thread in Redis"""
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        ttl: int = None,
+        max_checkpoints: int = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        # Checkpoints are binary; the shared pool decodes responses to str, so this client has its own
+        self.redis = redis_client or redis.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS
+        )
+        self.ttl = ttl or settings.CHECKPOINT_TTL
+        self.max_checkpoints = max_checkpoints or settings.CHECKPOINT_MAX_PER_THREAD
+        self.stats = {"puts": 0, "gets": 0, "misses": 0, "trimmed": 0, "errors": 0}
+
+    @staticmethod
+    def _index_key(thread_id: str, checkpoint_ns: str) -> str:
+        return f"checkpoint_index:{thread_id}:{checkpoint_ns}"
+
+    @staticmethod
+    def _checkpoint_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"checkpoint:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    @staticmethod
+    def _writes_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"checkpoint_writes:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """The requested checkpoint, or the thread's latest when no checkpoint_id is given"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        try:
+            self.stats["gets"] += 1
+            checkpoint_id = get_checkpoint_id(config)
+            if not checkpoint_id:
+                latest = await self.redis.lindex(self._index_key(thread_id, checkpoint_ns), 0)
+                if latest is None:
+                    self.stats["misses"] += 1
+                    return None
+                checkpoint_id = latest.decode()
+
+            checkpoint_tuple = await self._load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+            if checkpoint_tuple is None:
+                self.stats["misses"] += 1
+            return checkpoint_tuple
+
+        except Exception as e:
+            # Without saved state the workflow simply starts from its input
+            self.stats["errors"] += 1
+            logger.error(f"Failed to load checkpoint for thread {thread_id}: {e}")
+            return None
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Checkpoints of a thread, newest first"""
+        if config is None:
+            # Listing across threads would mean scanning the keyspace
+            return
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        config_checkpoint_id = get_checkpoint_id(config)
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+
+        checkpoint_ids = await self.redis.lrange(self._index_key(thread_id, checkpoint_ns), 0, -1)
+        for raw_id in checkpoint_ids:
+            if limit is not None and limit <= 0:
+                break
+
+            checkpoint_id = raw_id.decode()
+            if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                continue
+            if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                continue
+
+            checkpoint_tuple = await self._load_tuple(thread_id, checkpoint_ns, checkpoint_id)
+            if checkpoint_tuple is None:
+                continue
+            if filter and not all(checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()):
+                continue
+
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        """Store a checkpoint and trim the thread to the latest N"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+        next_config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id
+            }
+        }
+
+        try:
+            checkpoint_type, checkpoint_bytes = self.serde.dumps_typed(checkpoint)
+            metadata_type, metadata_bytes = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+            index_key = self._index_key(thread_id, checkpoint_ns)
+            checkpoint_key = self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)
+
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(checkpoint_key, mapping={
+                "type": checkpoint_type,
+                "checkpoint": checkpoint_bytes,
+                "metadata_type": metadata_type,
+                "metadata": metadata_bytes,
+                "parent": config["configurable"].get("checkpoint_id") or ""
+            })
+            pipe.expire(checkpoint_key, self.ttl)
+            pipe.lpush(index_key, checkpoint_id)
+            pipe.lrange(index_key, self.max_checkpoints, -1)
+            pipe.ltrim(index_key, 0, self.max_checkpoints - 1)
+            pipe.expire(index_key, self.ttl)
+            results = await pipe.execute()
+
+            # Drop the checkpoints that fell off the index
+            trimmed = [raw_id.decode() for raw_id in results[3]]
+            if trimmed:
+                await self.redis.delete(*[
+                    key
+                    for old_id in trimmed
+                    for key in (
+                        self._checkpoint_key(thread_id, checkpoint_ns, old_id),
+                        self._writes_key(thread_id, checkpoint_ns, old_id)
+                    )
+                ])
+                self.stats["trimmed"] += len(trimmed)
+
+            self.stats["puts"] += 1
+
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to store checkpoint for thread {thread_id}: {e}")
+
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        """Store a task's pending writes against its checkpoint"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        writes_key = self._writes_key(thread_id, checkpoint_ns, config["configurable"]["checkpoint_id"])
+
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                value_type, value_bytes = self.serde.dumps_typed(value)
+                field = f"{task_id}:{write_idx}"
+                # Regular writes are idempotent per (task, index); special channels overwrite
+                payload = self._pack_write(task_id, channel, value_type, value_bytes, task_path)
+                if write_idx >= 0:
+                    pipe.hsetnx(writes_key, field, payload)
+                else:
+                    pipe.hset(writes_key, field, payload)
+            pipe.expire(writes_key, self.ttl)
+            await pipe.execute()
+
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to store pending writes for thread {thread_id}: {e}")
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and pending write of a thread"""
+        keys = []
+        for pattern in (f"checkpoint_index:{thread_id}:*", f"checkpoint:{thread_id}:*", f"checkpoint_writes:{thread_id}:*"):
+            keys.extend([key async for key in self.redis.scan_iter(match=pattern, count=500)])
+        if keys:
+            await self.redis.delete(*keys)
+
+    async def _load_tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        """Checkpoint and its pending writes in one round-trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+        pipe.hgetall(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        saved, writes = await pipe.execute()
+        if not saved:
+            return None
+
+        parent_checkpoint_id = saved[b"parent"].decode()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id
+                }
+            },
+            checkpoint=self.serde.loads_typed((saved[b"type"].decode(), saved[b"checkpoint"])),
+            metadata=self.serde.loads_typed((saved[b"metadata_type"].decode(), saved[b"metadata"])),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=self._unpack_writes(writes)
+        )
+
+    @staticmethod
+    def _pack_write(task_id: str, channel: str, value_type: str, value_bytes: bytes, task_path: str) -> bytes:
+        """Header fields NUL-separated, followed by the serialized value"""
+        header = "\0".join((task_id, channel, value_type, task_path)).encode()
+        return len(header).to_bytes(4, "big") + header + value_bytes
+
+    def _unpack_writes(self, writes: Dict[bytes, bytes]) -> List[Tuple[str, str, Any]]:
+        """Pending writes as (task_id, channel, value), ordered by task and write index"""
+        unpacked = []
+        for field, payload in writes.items():
+            task_id, _, write_idx = field.decode().rpartition(":")
+            header_length = int.from_bytes(payload[:4], "big")
+            _, channel, value_type, _ = payload[4:4 + header_length].decode().split("\0")
+            value = self.serde.loads_typed((value_type, payload[4 + header_length:]))
+            unpacked.append(((task_id, int(write_idx)), (task_id, channel, value)))
+        return [write for _, write in sorted(unpacked, key=lambda item: item[0])]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Checkpoint traffic and retention settings"""
+        return {
+            **self.stats,
+            "ttl_seconds": self.ttl,
+            "max_checkpoints_per_thread": self.max_checkpoints
+        }
+
+    async def aclose(self):
+        """Close the checkpointer's Redis connections"""
+        await self.redis.aclose()
@@ -1,6 +1,7 @@
 import redis.asyncio as redis
+import asyncio
 import json
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -14,26 +15,103 @@ logger = get_logger(__name__)
 class RedisClient:
     """Redis client for caching and session management"""
     
-    def __init__(self):
-        self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    def __init__(self, connection_pool: Optional[redis.ConnectionPool] = None):
+        if connection_pool is not None:
+            self.redis = redis.Redis(connection_pool=connection_pool)
+        else:
+            self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        
+        # Background conversation writes (see store_messages(background=True))
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
     
     async def store_message(self, message: Message):
         """Store message in conversation history"""
+        await self.store_messages([message])
+    
+    async def store_messages(self, messages: List[Message], background: bool = False):
+        """Store messages in one MULTI round-trip: LPUSH, LTRIM to the history limit, EXPIRE"""
+        if not messages:
+            return
+        
+        # A full queue falls back to an inline write, which applies backpressure
+        if background and self._enqueue_messages(messages):
+            return
+        
         try:
-            key = f"conversation:{message.conversation_id}"
-            message_data = {
-                "id": message.id,
-                "content": message.content,
-                "type": message.type.value,
-                "timestamp": message.timestamp.isoformat(),
-                "user_id": message.user_id
-            }
-            
-            await self.redis.lpush(key, json.dumps(message_data))
-            await self.redis.expire(key, 86400)  # 24 hours TTL
-            
+            await self._write_messages(messages)
         except Exception as e:
-            logger.error(f"Failed to store message: {e}")
+            logger.error(f"Failed to store messages: {e}")
+    
+    async def _write_messages(self, messages: List[Message]):
+        """Write messages for any number of conversations in a single transaction"""
+        by_conversation: Dict[str, List[str]] = {}
+        for message in messages:
+            by_conversation.setdefault(f"conversation:{message.conversation_id}", []).append(
+                json.dumps({
+                    "id": message.id,
+                    "content": message.content,
+                    "type": message.type.value,
+                    "timestamp": message.timestamp.isoformat(),
+                    "user_id": message.user_id
+                })
+            )
+        
+        pipe = self.redis.pipeline(transaction=True)
+        for key, payloads in by_conversation.items():
+            # Newest first, matching get_conversation_history
+            pipe.lpush(key, *payloads)
+            pipe.ltrim(key, 0, settings.CONVERSATION_HISTORY_MAX_MESSAGES - 1)
+            pipe.expire(key, settings.CONVERSATION_TTL)
+        await pipe.execute()
+    
+    def _enqueue_messages(self, messages: List[Message]) -> bool:
+        """Hand messages to the background writer without waiting for Redis"""
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue(maxsize=settings.CONVERSATION_WRITE_QUEUE_SIZE)
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.get_running_loop().create_task(self._run_writer())
+        
+        try:
+            self._write_queue.put_nowait(messages)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Conversation write queue full ({self._write_queue.maxsize}); writing inline")
+            return False
+    
+    async def _run_writer(self):
+        """Drain the write queue, coalescing whatever is waiting into one transaction"""
+        while True:
+            batch = await self._write_queue.get()
+            drained = 1
+            while not self._write_queue.empty() and drained < 64:
+                batch = batch + self._write_queue.get_nowait()
+                drained += 1
+            
+            try:
+                await self._write_messages(batch)
+            except Exception as e:
+                logger.error(f"Background conversation write failed ({len(batch)} messages): {e}")
+            finally:
+                for _ in range(drained):
+                    self._write_queue.task_done()
+    
+    async def flush(self, timeout: float = 5.0):
+        """Wait for queued background writes, then stop the writer"""
+        if self._writer_task is None:
+            return
+        
+        try:
+            await asyncio.wait_for(self._write_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropped {self._write_queue.qsize()} queued conversation writes on shutdown")
+        
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
     
     async def get_conversation_history(self, conversation_id: str, limit: int = 10) -> List[dict]:
         """Retrieve conversation history"""
@@ -60,4 +138,11 @@ class RedisClient:
             return await self.redis.get(key)
         except Exception as e:
             logger.error(f"Failed to get cached response: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    async def publish(self, channel: str, message: str):
+        """Publish a message on a pub/sub channel"""
+        try:
+            await self.redis.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Failed to publish to {channel}: {e}")
\ No newline at end of file
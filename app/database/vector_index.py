@@ -0,0 +1,134 @@
+"""
+Vector Index
+
+Exact nearest-neighbour search for the small knowledge base. Document
+embeddings exported from Chroma are stored as one contiguous float32 matrix
+on disk and memory-mapped, so every worker process shares the same pages. A
+top-k lookup is one matrix-vector product plus argpartition, with no HNSW or
+SQLite metadata layer in the path.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+class NumpyVectorIndex:
+    """Brute-force top-k over a memory-mapped, L2-normalized embedding matrix"""
+
+    def __init__(
+        self,
+        name: str,
+        vectors: np.ndarray,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embedding_function: Callable[[List[str]], Sequence[Sequence[float]]],
+        version: int = 0
+    ):
+        self.name = name
+        # Modification time of the exported matrix, to notice a newer export
+        self.version = version
+        self.vectors = vectors
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.embedding_function = embedding_function
+
+    @staticmethod
+    def _paths(directory: str, name: str) -> Tuple[Path, Path]:
+        base = Path(directory)
+        return base / f"{name}.npy", base / f"{name}.json"
+
+    @classmethod
+    def version_of(cls, directory: str, name: str) -> int:
+        """Version stamp of the index currently on disk"""
+        matrix_path, _ = cls._paths(directory, name)
+        return matrix_path.stat().st_mtime_ns
+
+    @classmethod
+    def export_from_collection(cls, collection, directory: str) -> int:
+        """Write a collection's embeddings and documents to disk; returns the document count"""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        vectors = _normalize_rows(np.asarray(data["embeddings"], dtype=np.float32).reshape(len(data["ids"]), -1))
+
+        matrix_path, documents_path = cls._paths(directory, collection.name)
+        matrix_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Replace atomically so running workers keep their mapping of the old file
+        matrix_tmp = matrix_path.with_suffix(".tmp.npy")
+        documents_tmp = documents_path.with_suffix(".tmp.json")
+        np.save(matrix_tmp, np.ascontiguousarray(vectors))
+        with open(documents_tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "ids": data["ids"],
+                "documents": data["documents"],
+                "metadatas": data["metadatas"]
+            }, f)
+        os.replace(documents_tmp, documents_path)
+        os.replace(matrix_tmp, matrix_path)
+
+        logger.info(f"Exported vector index '{collection.name}': {len(data['ids'])} documents")
+        return len(data["ids"])
+
+    @classmethod
+    def load(cls, directory: str, name: str, embedding_function: Callable) -> "NumpyVectorIndex":
+        """Memory-map a previously exported index"""
+        matrix_path, documents_path = cls._paths(directory, name)
+        version = matrix_path.stat().st_mtime_ns
+        vectors = np.load(matrix_path, mmap_mode="r")
+        with open(documents_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if vectors.shape[0] != len(data["ids"]):
+            raise ValueError(f"Vector index '{name}' is inconsistent: {vectors.shape[0]} vectors, {len(data['ids'])} documents")
+
+        return cls(name, vectors, data["ids"], data["documents"], data["metadatas"], embedding_function, version)
+
+    def query(
+        self,
+        query_texts: List[str] = None,
+        n_results: int = 5,
+        query_embeddings: Sequence[Sequence[float]] = None
+    ) -> Dict[str, List[List[Any]]]:
+        """Chroma-compatible query result, nearest first, with squared L2 distances"""
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(list(query_texts))
+
+        k = min(n_results, len(self.ids))
+        if k == 0:
+            empty = [[] for _ in query_embeddings]
+            return {"ids": empty, "documents": empty, "metadatas": empty, "distances": empty}
+
+        queries = _normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        similarities = queries @ self.vectors.T
+
+        # Unordered top-k per row, then sort just those k
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_similarities = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_similarities, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_similarities = np.take_along_axis(top_similarities, order, axis=1)
+
+        # For unit vectors ||a - b||^2 = 2 - 2cos, the same scale Chroma's default l2 space reports
+        distances = np.maximum(2.0 - 2.0 * top_similarities, 0.0)
+
+        return {
+            "ids": [[self.ids[i] for i in row] for row in top],
+            "documents": [[self.documents[i] for i in row] for row in top],
+            "metadatas": [[self.metadatas[i] for i in row] for row in top],
+            "distances": distances.tolist()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
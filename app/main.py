@@ -36,20 +36,43 @@ Working FastAPI application - Customer Service AI
 Simplified version that works without Redis
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 import time
 import uuid
 import asyncio
+import sys
 from datetime import datetime
 
+from app.core.keywords import keyword_engine
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    # Load the prompt tokenizer in a worker thread before serving, so no request loads it on the event loop
+    from app.services.resource_registry import resource_registry
+    await resource_registry.load_tokenizer()
+    
+    yield
+    
+    # Only close services that something in this process actually loaded
+    cache_module = sys.modules.get("app.services.cache_service")
+    if cache_module is not None:
+        await cache_module.cache_service.aclose()
+    
+    registry_module = sys.modules.get("app.services.resource_registry")
+    if registry_module is not None:
+        await registry_module.resource_registry.aclose()
+
 # Create FastAPI app
 app = FastAPI(
     title="Smart Customer Service AI",
     description="Intelligent multi-agent customer service system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -100,21 +123,16 @@ class WorkingAgentSystem:
     
     async def classify_intent(self, message: str) -> str:
         """Simple intent classification"""
-        message_lower = message.lower()
+        hits = keyword_engine.scan(message)
         
-        # Product keywords
-        product_keywords = ["price", "cost", "plan", "feature", "product", "buy", "pricing", "subscription"]
-        if any(word in message_lower for word in product_keywords):
+        # Product, then refund, then technical keywords
+        if hits["intent.product"]:
             return "ProductAgent"
         
-        # Refund keywords
-        refund_keywords = ["refund", "return", "money back", "cancel", "billing"]
-        if any(word in message_lower for word in refund_keywords):
+        if hits["intent.refund"]:
             return "RefundAgent"
         
-        # Technical keywords
-        technical_keywords = ["error", "bug", "problem", "issue", "help", "login", "crash", "technical"]
-        if any(word in message_lower for word in technical_keywords):
+        if hits["intent.technical"]:
             return "TechnicalAgent"
         
         # Default
@@ -472,37 +490,6 @@ async def health_check():
         }
     }
 
-@app.post("/api/v1/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    """Main chat endpoint"""
-    try:
-        if not agent_system:
-            raise HTTPException(status_code=500, detail="Agent system not initialized")
-        
-        response = await agent_system.process_message(request)
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chat processing error: {str(e)}")
-
-@app.get("/api/v1/chat/history/{user_id}")
-async def get_chat_history(user_id: str):
-    """Get chat history"""
-    try:
-        history = conversation_storage.get(user_id, [])
-        return {
-            "user_id": user_id,
-            "total_conversations": len(history),
-            "history": history[-10:],  # Last 10 conversations
-            "status": "success"
-        }
-    except Exception as e:
-        return {
-            "user_id": user_id,
-            "error": str(e),
-            "history": [],
-            "status": "error"
-        }
-
 @app.get("/api/v1/analytics/metrics/overview")
 async def get_metrics():
     """Get system metrics"""
@@ -539,6 +526,16 @@ async def get_metrics():
             "status": "error"
         }
 
+# Mount the full API (chat through the agent orchestrator, health details,
+# analytics, admin). Routes defined above are registered first, so they keep
+# serving the paths both define. A router that fails to import fails startup
+# rather than silently leaving its endpoints unmounted.
+from app.api import ROUTERS
+
+for router, prefix, tag in ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
+print("✅ API routers mounted")
+
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting Customer Service AI...")
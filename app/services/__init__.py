@@ -9,18 +9,20 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.services.huggingface_client import HuggingFaceClient
 from app.services.external_apis import ExternalAPIClient
-from app.services.cache_service import CacheService
+from app.services.cache_service import CacheService, cache_service
+from app.services.resource_registry import ResourceRegistry, resource_registry
 
 # Service instances
-hf_client = HuggingFaceClient()
+hf_client = resource_registry.get_llm_client()
 external_api_client = ExternalAPIClient()
-cache_service = CacheService()
 
 __all__ = [
     "HuggingFaceClient",
     "ExternalAPIClient",
     "CacheService",
+    "ResourceRegistry",
     "hf_client",
     "external_api_client", 
-    "cache_service"
+    "cache_service",
+    "resource_registry"
 ]
\ No newline at end of file
@@ -2,17 +2,27 @@
 Cache Service
 
 Intelligent caching for API responses, AI model outputs, and frequently accessed data.
+Lookups go through an in-process L1 cache before Redis (L2); writes and
+invalidations are broadcast over Redis pub/sub so other workers drop their
+L1 copies.
 """
 
+import asyncio
 import json
 import hashlib
-from typing import Any, Optional, Dict, List
+import time
+import uuid
+from typing import Any, Optional, Dict, List, Set
 from datetime import datetime, timedelta
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
+from app.core.metrics import LatencyHistogram, metric_line
 from app.database.redis_client import RedisClient
+from app.services.local_cache import LocalCache
+from app.services.resource_registry import resource_registry
+from app.services.semantic_cache import SemanticCache, normalize_query
 from app.core.logger import get_logger
 from app.core.config import settings
 
@@ -21,8 +31,14 @@ logger = get_logger(__name__)
 class CacheService:
     """Intelligent caching service"""
     
-    def __init__(self):
-        self.redis_client = RedisClient()
+    TAG_PREFIX = "cache_tag:"
+    # Cache types derived from knowledge base content
+    KNOWLEDGE_BASE_CACHE_TYPES = ["ai_response", "product_info", "knowledge_base"]
+    
+    def __init__(self, redis_client: Optional[RedisClient] = None, semantic_cache: Optional[SemanticCache] = None):
+        self.redis_client = redis_client or resource_registry.get_redis_client()
+        self._semantic_cache = semantic_cache
+        self._semantic_cache_unavailable = False
         self.default_ttl = settings.CACHE_TTL
         self.cache_prefixes = {
             "ai_response": "ai_resp:",
@@ -32,11 +48,243 @@ class CacheService:
             "api_response": "api_resp:",
             "knowledge_base": "kb:"
         }
+        
+        self.local_cache = LocalCache(
+            max_entries=settings.L1_CACHE_MAX_ENTRIES,
+            prefix_ttls=settings.L1_CACHE_PREFIX_TTLS,
+            default_ttl=settings.L1_CACHE_DEFAULT_TTL,
+            on_evict=lambda key: self._count(key, "evictions")
+        ) if settings.L1_CACHE_ENABLED else None
+        self.instance_id = uuid.uuid4().hex
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self._index_refreshes: Set[asyncio.Task] = set()
+        
+        # Instrumentation
+        self.l2_stats = {"hits": 0, "misses": 0}
+        self.prefix_stats = {
+            name: {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "errors": 0}
+            for name in [*self.cache_prefixes, "other"]
+        }
+        self.latency = {
+            ("get", "l1"): LatencyHistogram(),
+            ("get", "l2"): LatencyHistogram(),
+            ("set", "l2"): LatencyHistogram()
+        }
+        self._keyspace_sample: Optional[Dict[str, Any]] = None
+        self._keyspace_sampled_at = 0.0
     
     def _generate_cache_key(self, prefix: str, identifier: str) -> str:
         """Generate cache key with prefix"""
         return f"{self.cache_prefixes.get(prefix, prefix)}{identifier}"
     
+    def _prefix_name(self, cache_key: str) -> str:
+        """Cache type a key belongs to, for per-prefix metrics"""
+        for name, prefix in self.cache_prefixes.items():
+            if cache_key.startswith(prefix):
+                return name
+        return "other"
+    
+    def _count(self, cache_key: str, counter: str):
+        self.prefix_stats[self._prefix_name(cache_key)][counter] += 1
+    
+    def _get_semantic_cache(self) -> Optional[SemanticCache]:
+        """Semantic layer for AI responses, loaded on first use"""
+        if not settings.SEMANTIC_CACHE_ENABLED or self._semantic_cache_unavailable:
+            return None
+        
+        if self._semantic_cache is None:
+            try:
+                self._semantic_cache = resource_registry.get_semantic_cache()
+            except Exception as e:
+                logger.warning(f"Semantic cache disabled: {e}")
+                self._semantic_cache_unavailable = True
+        
+        return self._semantic_cache
+    
+    async def _get(self, cache_key: str) -> Optional[Any]:
+        """Read through L1 then Redis, filling L1 on a Redis hit"""
+        self._ensure_invalidation_listener()
+        
+        start = time.perf_counter()
+        if self.local_cache:
+            value = self.local_cache.get(cache_key)
+            if value is not None:
+                self.latency[("get", "l1")].observe(time.perf_counter() - start)
+                self._count(cache_key, "hits")
+                # Shallow copy so callers can't mutate the shared L1 entry
+                return dict(value) if isinstance(value, dict) else value
+        
+        try:
+            cached_data = await self.redis_client.redis.get(cache_key)
+            value = json.loads(cached_data) if cached_data is not None else None
+        except Exception as e:
+            self._count(cache_key, "errors")
+            logger.error(f"Failed to read cache key {cache_key}: {e}")
+            return None
+        finally:
+            self.latency[("get", "l2")].observe(time.perf_counter() - start)
+        
+        if value is None:
+            self.l2_stats["misses"] += 1
+            self._count(cache_key, "misses")
+            return None
+        
+        self.l2_stats["hits"] += 1
+        self._count(cache_key, "hits")
+        if self.local_cache:
+            self.local_cache.set(cache_key, value)
+            return dict(value) if isinstance(value, dict) else value
+        
+        return value
+    
+    def _tag_key(self, tag: str) -> str:
+        """Redis set holding the cache keys written with a tag"""
+        return f"{self.TAG_PREFIX}{tag}"
+    
+    async def _set(self, cache_key: str, value: Any, ttl: int, tags: List[str] = None):
+        """Write to Redis and L1, then tell other workers to drop their copy"""
+        self._count(cache_key, "sets")
+        
+        start = time.perf_counter()
+        try:
+            pipe = self.redis_client.redis.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, json.dumps(value))
+            for tag in tags or []:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, cache_key)
+                # The tag set lives as long as its longest-lived member
+                pipe.expire(tag_key, ttl, nx=True)
+                pipe.expire(tag_key, ttl, gt=True)
+            await pipe.execute()
+            stored = True
+        except Exception as e:
+            self._count(cache_key, "errors")
+            logger.error(f"Failed to write cache key {cache_key}: {e}")
+            stored = False
+        finally:
+            self.latency[("set", "l2")].observe(time.perf_counter() - start)
+        
+        if self.local_cache:
+            # Still useful to this worker while Redis is unavailable (bounded by the L1 TTL)
+            self.local_cache.set(cache_key, value, ttl=ttl)
+            if stored:
+                await self._publish_invalidation(keys=[cache_key])
+    
+    async def _publish_invalidation(
+        self,
+        keys: List[str] = None,
+        prefixes: List[str] = None,
+        agents: List[str] = None,
+        knowledge_base: bool = False
+    ):
+        """Broadcast an L1 invalidation (or a knowledge base reload) to the other workers"""
+        await self.redis_client.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            json.dumps({
+                "origin": self.instance_id,
+                "keys": keys or [],
+                "prefixes": prefixes or [],
+                "agents": agents or [],
+                "knowledge_base": knowledge_base
+            })
+        )
+    
+    def _apply_invalidation(self, data: Any):
+        """Drop L1 entries named in an invalidation message from another worker"""
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed cache invalidation message: {data!r}")
+            return
+        
+        if payload.get("origin") == self.instance_id:
+            return
+        
+        self._drop_local(payload.get("keys", []), payload.get("prefixes", []), payload.get("agents", []))
+        if payload.get("knowledge_base"):
+            self._refresh_search_indexes()
+    
+    def _drop_local(self, keys: List[str] = None, prefixes: List[str] = None, agents: List[str] = None):
+        """Remove keys, prefixes and whole agents from this worker's in-process caches"""
+        if self.local_cache:
+            for key in keys or []:
+                self.local_cache.delete(key)
+            for prefix in prefixes or []:
+                self.local_cache.delete_prefix(prefix)
+        
+        # Semantic entries remember the exact key they were stored under
+        if self._semantic_cache is not None:
+            ai_prefix = self.cache_prefixes["ai_response"]
+            if ai_prefix in (prefixes or []):
+                self._semantic_cache.clear()
+                return
+            for agent_name in agents or []:
+                self._semantic_cache.clear(agent_name)
+            ai_keys = [key for key in keys or [] if key.startswith(ai_prefix)]
+            if ai_keys:
+                self._semantic_cache.discard(ai_keys)
+    
+    def _refresh_search_indexes(self):
+        """Rebuild this worker's in-process search indexes in the background"""
+        chroma_client = resource_registry.get_loaded("chroma_client")
+        if chroma_client is None:
+            return
+        
+        task = asyncio.ensure_future(chroma_client.refresh_indexes())
+        self._index_refreshes.add(task)
+        task.add_done_callback(self._index_refreshes.discard)
+    
+    def _ensure_invalidation_listener(self):
+        """Start the pub/sub listener on first use inside an event loop"""
+        # Runs without an L1 too: knowledge base reloads still rebuild the search indexes
+        if self._invalidation_task is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        self._invalidation_task = loop.create_task(self._listen_for_invalidations())
+    
+    async def _listen_for_invalidations(self):
+        """Apply invalidations published by other workers, reconnecting on failure"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis_client.redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._apply_invalidation(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected: {e}")
+                # Invalidations may have been missed while disconnected
+                if self.local_cache:
+                    self.local_cache.clear()
+                await asyncio.sleep(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+    
+    async def aclose(self):
+        """Stop the invalidation listener and pending index rebuilds"""
+        for task in list(self._index_refreshes):
+            task.cancel()
+        
+        if self._invalidation_task is not None:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._invalidation_task = None
+    
     def _hash_content(self, content: Any) -> str:
         """Create hash of content for cache key"""
         if isinstance(content, (dict, list)):
@@ -47,23 +295,29 @@ class CacheService:
         return hashlib.md5(content_str.encode()).hexdigest()[:16]
     
     async def get_ai_response_cache(self, agent_name: str, message: str, context: Dict = None) -> Optional[Dict[str, Any]]:
-        """Get cached AI response"""
+        """Get cached AI response (exact key in Redis, then semantic nearest neighbour)"""
         try:
             # Create cache key based on agent, message, and context
             cache_content = {
                 "agent": agent_name,
-                "message": message.lower().strip(),
+                "message": normalize_query(message),
                 "context": context or {}
             }
             
             cache_hash = self._hash_content(cache_content)
             cache_key = self._generate_cache_key("ai_response", cache_hash)
             
-            cached_data = await self.redis_client.get_cached_response(cache_key)
+            cached_data = await self._get(cache_key)
             
             if cached_data:
                 logger.info(f"Cache hit for AI response: {agent_name}")
-                return json.loads(cached_data)
+                return {**cached_data, "cache_layer": "exact"}
+            
+            semantic_cache = self._get_semantic_cache()
+            if semantic_cache:
+                cached_response = await semantic_cache.lookup(agent_name, message)
+                if cached_response:
+                    return {**cached_response, "cache_layer": "semantic"}
             
             return None
             
@@ -77,13 +331,14 @@ class CacheService:
         message: str, 
         response: Dict[str, Any], 
         context: Dict = None,
-        ttl: int = None
+        ttl: int = None,
+        tags: List[str] = None
     ) -> bool:
-        """Cache AI response"""
+        """Cache AI response (tagged with the agent name for targeted invalidation)"""
         try:
             cache_content = {
                 "agent": agent_name,
-                "message": message.lower().strip(),
+                "message": normalize_query(message),
                 "context": context or {}
             }
             
@@ -97,12 +352,17 @@ class CacheService:
                 "cache_key": cache_key
             }
             
-            await self.redis_client.cache_response(
-                cache_key, 
-                json.dumps(cached_response),
-                ttl or self.default_ttl
+            await self._set(
+                cache_key,
+                cached_response,
+                ttl or self.default_ttl,
+                tags=[f"agent:{agent_name}", *(tags or [])]
             )
             
+            semantic_cache = self._get_semantic_cache()
+            if semantic_cache:
+                await semantic_cache.store(agent_name, message, cached_response, ttl=ttl)
+            
             logger.info(f"Cached AI response for {agent_name}")
             return True
             
@@ -114,11 +374,11 @@ class CacheService:
         """Get cached product information"""
         try:
             cache_key = self._generate_cache_key("product_info", product_id)
-            cached_data = await self.redis_client.get_cached_response(cache_key)
+            cached_data = await self._get(cache_key)
             
             if cached_data:
                 logger.info(f"Cache hit for product: {product_id}")
-                return json.loads(cached_data)
+                return cached_data
             
             return None
             
@@ -126,7 +386,13 @@ class CacheService:
             logger.error(f"Failed to get product cache: {e}")
             return None
     
-    async def cache_product_info(self, product_id: str, product_data: Dict[str, Any], ttl: int = None) -> bool:
+    async def cache_product_info(
+        self,
+        product_id: str,
+        product_data: Dict[str, Any],
+        ttl: int = None,
+        tags: List[str] = None
+    ) -> bool:
         """Cache product information"""
         try:
             cache_key = self._generate_cache_key("product_info", product_id)
@@ -138,11 +404,7 @@ class CacheService:
                 "product_id": product_id
             }
             
-            await self.redis_client.cache_response(
-                cache_key,
-                json.dumps(cached_data),
-                ttl or (self.default_ttl * 2)  # Products cache longer
-            )
+            await self._set(cache_key, cached_data, ttl or (self.default_ttl * 2), tags=tags)  # Products cache longer
             
             logger.info(f"Cached product info: {product_id}")
             return True
@@ -155,10 +417,10 @@ class CacheService:
         """Get cached user session data"""
         try:
             cache_key = self._generate_cache_key("user_session", user_id)
-            cached_data = await self.redis_client.get_cached_response(cache_key)
+            cached_data = await self._get(cache_key)
             
             if cached_data:
-                return json.loads(cached_data)
+                return cached_data
             
             return None
             
@@ -181,11 +443,7 @@ class CacheService:
             # Sessions have shorter TTL
             session_ttl = 30 * 60  # 30 minutes
             
-            await self.redis_client.cache_response(
-                cache_key,
-                json.dumps(cached_session),
-                session_ttl
-            )
+            await self._set(cache_key, cached_session, session_ttl)
             
             return True
             
@@ -197,8 +455,10 @@ class CacheService:
         """Invalidate specific cache entry"""
         try:
             cache_key = self._generate_cache_key(cache_type, identifier)
-            # Redis delete would go here
-            # await self.redis_client.delete(cache_key)
+            await self.redis_client.redis.unlink(cache_key)
+            
+            self._drop_local(keys=[cache_key])
+            await self._publish_invalidation(keys=[cache_key])
             
             logger.info(f"Invalidated cache: {cache_key}")
             return True
@@ -207,31 +467,259 @@ class CacheService:
             logger.error(f"Failed to invalidate cache: {e}")
             return False
     
-    async def get_cache_stats(self) -> Dict[str, Any]:
+    async def _unlink_batch(self, keys: List[str]) -> int:
+        """UNLINK a bounded batch of keys in one pipeline round-trip"""
+        pipe = self.redis_client.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.unlink(key)
+        removed = sum(await pipe.execute())
+        
+        self._drop_local(keys=keys)
+        # Give other requests a turn between batches of a large flush
+        await asyncio.sleep(0)
+        return removed
+    
+    async def invalidate_prefix(self, cache_type: str) -> int:
+        """Delete every key of a cache type (or raw prefix) with SCAN + batched UNLINK"""
+        prefix = self.cache_prefixes.get(cache_type, cache_type)
+        if not prefix:
+            raise ValueError("Refusing to invalidate an empty prefix")
+        
+        batch_size = settings.CACHE_INVALIDATION_BATCH_SIZE
+        removed = 0
+        
+        try:
+            batch = []
+            async for key in self.redis_client.redis.scan_iter(match=f"{prefix}*", count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    removed += await self._unlink_batch(batch)
+                    batch = []
+            if batch:
+                removed += await self._unlink_batch(batch)
+        finally:
+            # Even a partial flush must not leave stale entries in any worker's L1
+            self._drop_local(prefixes=[prefix])
+            await self._publish_invalidation(prefixes=[prefix])
+        
+        logger.info(f"Invalidated {removed} keys with prefix {prefix}")
+        return removed
+    
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key written with a tag, then the tag set itself"""
+        tag_key = self._tag_key(tag)
+        batch_size = settings.CACHE_INVALIDATION_BATCH_SIZE
+        removed = 0
+        
+        # An agent tag covers that agent's whole semantic index, including entries the tag set no longer lists
+        agents = [tag[len("agent:"):]] if tag.startswith("agent:") else []
+        
+        try:
+            batch = []
+            async for key in self.redis_client.redis.sscan_iter(tag_key, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    removed += await self._unlink_batch(batch)
+                    await self._publish_invalidation(keys=batch)
+                    batch = []
+            if batch:
+                removed += await self._unlink_batch(batch)
+                await self._publish_invalidation(keys=batch)
+            
+            await self.redis_client.redis.unlink(tag_key)
+        finally:
+            if agents:
+                self._drop_local(agents=agents)
+                await self._publish_invalidation(agents=agents)
+        
+        logger.info(f"Invalidated {removed} keys tagged {tag}")
+        return removed
+    
+    async def invalidate_knowledge_base(self) -> Dict[str, int]:
+        """Flush every cache type derived from knowledge base content and rebuild the search indexes"""
+        try:
+            return {
+                cache_type: await self.invalidate_prefix(cache_type)
+                for cache_type in self.KNOWLEDGE_BASE_CACHE_TYPES
+            }
+        finally:
+            self._refresh_search_indexes()
+            await self._publish_invalidation(knowledge_base=True)
+    
+    async def sample_keyspace(self, max_age: float = None) -> Dict[str, Any]:
+        """Key counts and memory per prefix, sampled with SCAN and MEMORY USAGE"""
+        max_age = settings.CACHE_STATS_SAMPLE_INTERVAL if max_age is None else max_age
+        if self._keyspace_sample is not None and time.monotonic() - self._keyspace_sampled_at < max_age:
+            return self._keyspace_sample
+        
+        redis = self.redis_client.redis
+        prefixes = {}
+        
+        for name, prefix in self.cache_prefixes.items():
+            keys = 0
+            sample = []
+            truncated = False
+            
+            async for key in redis.scan_iter(match=f"{prefix}*", count=500):
+                keys += 1
+                if len(sample) < settings.CACHE_STATS_SAMPLE_SIZE:
+                    sample.append(key)
+                if keys >= settings.CACHE_STATS_MAX_SCAN_KEYS:
+                    truncated = True
+                    break
+            
+            memory_bytes = 0
+            if sample:
+                pipe = redis.pipeline(transaction=False)
+                for key in sample:
+                    pipe.memory_usage(key)
+                usages = [usage for usage in await pipe.execute() if usage is not None]
+                if usages:
+                    # Extrapolate the sampled average to every counted key
+                    memory_bytes = sum(usages) / len(usages) * keys
+            
+            prefixes[name] = {
+                "prefix": prefix,
+                "keys": keys,
+                "keys_truncated": truncated,
+                "memory_mb": round(memory_bytes / 1024 / 1024, 3)
+            }
+        
+        info = await redis.info()
+        self._keyspace_sample = {
+            "prefixes": prefixes,
+            "total_keys": sum(p["keys"] for p in prefixes.values()),
+            "memory_usage_mb": round(sum(p["memory_mb"] for p in prefixes.values()), 3),
+            "redis_used_memory_mb": round(info.get("used_memory", 0) / 1024 / 1024, 3),
+            "redis_evicted_keys": info.get("evicted_keys", 0),
+            "redis_expired_keys": info.get("expired_keys", 0),
+            "sampled_at": datetime.now().isoformat()
+        }
+        self._keyspace_sampled_at = time.monotonic()
+        return self._keyspace_sample
+    
+    def _latency_stats(self) -> Dict[str, Any]:
+        return {
+            f"{operation}_{tier}": histogram.snapshot()
+            for (operation, tier), histogram in self.latency.items()
+        }
+    
+    def _prefix_hit_rates(self) -> Dict[str, Any]:
+        prefixes = {}
+        for name, counters in self.prefix_stats.items():
+            lookups = counters["hits"] + counters["misses"]
+            prefixes[name] = {
+                **counters,
+                "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0
+            }
+        return prefixes
+    
+    async def get_cache_stats(self, include_keyspace: bool = True) -> Dict[str, Any]:
         """Get cache performance statistics"""
         try:
-            # Mock cache statistics
+            l2_lookups = self.l2_stats["hits"] + self.l2_stats["misses"]
+            l2 = {
+                **self.l2_stats,
+                "hit_rate": round(self.l2_stats["hits"] / l2_lookups, 3) if l2_lookups else 0.0
+            }
+            
+            if self.local_cache:
+                l1 = self.local_cache.get_stats()
+                # Every lookup goes through L1 first; Redis only sees L1 misses
+                lookups = l1["hits"] + l1["misses"]
+                hits = l1["hits"] + self.l2_stats["hits"]
+            else:
+                l1 = {"enabled": False}
+                lookups = l2_lookups
+                hits = self.l2_stats["hits"]
+            
+            hit_rate = round(hits / lookups, 3) if lookups else 0.0
             stats = {
-                "total_keys": 1234,
-                "hit_rate": 0.847,
-                "miss_rate": 0.153,
-                "memory_usage_mb": 45.7,
-                "avg_response_time_ms": 2.3,
-                "cache_types": {
-                    "ai_response": {"keys": 456, "hit_rate": 0.82},
-                    "product_info": {"keys": 123, "hit_rate": 0.91},
-                    "user_session": {"keys": 234, "hit_rate": 0.95},
-                    "api_response": {"keys": 321, "hit_rate": 0.78}
+                "lookups": lookups,
+                "hit_rate": hit_rate,
+                "miss_rate": round(1 - hit_rate, 3) if lookups else 0.0,
+                "tiers": {
+                    "l1": l1,
+                    "l2": l2
                 },
+                "cache_types": self._prefix_hit_rates(),
+                "latency": self._latency_stats(),
                 "last_updated": datetime.now().isoformat()
             }
             
+            if self._semantic_cache is not None:
+                stats["tiers"]["semantic"] = self._semantic_cache.get_stats()
+            
+            if include_keyspace:
+                try:
+                    stats["keyspace"] = await self.sample_keyspace()
+                except Exception as e:
+                    logger.warning(f"Keyspace sampling failed: {e}")
+                    stats["keyspace"] = {"error": str(e)}
+            
             return stats
             
         except Exception as e:
             logger.error(f"Failed to get cache stats: {e}")
             return {}
     
+    async def get_prometheus_metrics(self) -> str:
+        """Cache metrics in Prometheus text exposition format"""
+        lines = [
+            "# HELP cache_operations_total Cache operations by cache type and outcome",
+            "# TYPE cache_operations_total counter"
+        ]
+        for name, counters in self.prefix_stats.items():
+            for outcome, value in counters.items():
+                lines.append(metric_line("cache_operations_total", value, {"cache_type": name, "outcome": outcome}))
+        
+        lines += [
+            "# HELP cache_tier_lookups_total Lookups answered per cache tier",
+            "# TYPE cache_tier_lookups_total counter"
+        ]
+        if self.local_cache:
+            for outcome in ("hits", "misses"):
+                lines.append(metric_line("cache_tier_lookups_total", self.local_cache.stats[outcome], {"tier": "l1", "outcome": outcome}))
+        for outcome in ("hits", "misses"):
+            lines.append(metric_line("cache_tier_lookups_total", self.l2_stats[outcome], {"tier": "l2", "outcome": outcome}))
+        
+        if self.local_cache:
+            lines += [
+                "# HELP cache_l1_entries Entries held in the in-process cache",
+                "# TYPE cache_l1_entries gauge",
+                metric_line("cache_l1_entries", self.local_cache.get_stats()["entries"])
+            ]
+        
+        lines += [
+            "# HELP cache_operation_duration_seconds Cache get/set latency",
+            "# TYPE cache_operation_duration_seconds histogram"
+        ]
+        for (operation, tier), histogram in self.latency.items():
+            lines += histogram.prometheus_lines("cache_operation_duration_seconds", {"operation": operation, "tier": tier})
+        
+        try:
+            keyspace = await self.sample_keyspace()
+            lines += [
+                "# HELP cache_keys Keys per cache type (sampled with SCAN)",
+                "# TYPE cache_keys gauge"
+            ]
+            lines += [
+                metric_line("cache_keys", prefix["keys"], {"cache_type": name})
+                for name, prefix in keyspace["prefixes"].items()
+            ]
+            lines += [
+                "# HELP cache_memory_bytes Estimated memory per cache type (sampled with MEMORY USAGE)",
+                "# TYPE cache_memory_bytes gauge"
+            ]
+            lines += [
+                metric_line("cache_memory_bytes", int(prefix["memory_mb"] * 1024 * 1024), {"cache_type": name})
+                for name, prefix in keyspace["prefixes"].items()
+            ]
+        except Exception as e:
+            logger.warning(f"Keyspace sampling failed: {e}")
+        
+        return "\n".join(lines) + "\n"
+    
     async def warm_cache(self, cache_items: List[Dict[str, Any]]) -> int:
         """Warm up cache with frequently accessed data"""
         try:
@@ -246,11 +734,7 @@ class CacheService:
                 if cache_type and identifier and data:
                     cache_key = self._generate_cache_key(cache_type, identifier)
                     
-                    await self.redis_client.cache_response(
-                        cache_key,
-                        json.dumps(data),
-                        ttl
-                    )
+                    await self._set(cache_key, data, ttl)
                     
                     cached_count += 1
             
@@ -262,17 +746,42 @@ class CacheService:
             return 0
     
     async def clear_expired_cache(self) -> int:
-        """Clear expired cache entries"""
+        """Clear expired L1 entries and prune tag sets of keys Redis has already expired"""
         try:
-            # Redis automatically handles TTL expiration
-            # This method would implement custom cleanup logic
-            
-            logger.info("Cleared expired cache entries")
-            return 0  # Number of cleared entries
+            # Redis expires the cache keys themselves; what's left behind is local
+            # entries past their TTL and tag set members pointing at missing keys
+            cleared = self.local_cache.purge_expired() if self.local_cache else 0
+            
+            redis = self.redis_client.redis
+            batch_size = settings.CACHE_INVALIDATION_BATCH_SIZE
+            
+            async for tag_key in redis.scan_iter(match=f"{self.TAG_PREFIX}*", count=batch_size):
+                batch = []
+                async for member in redis.sscan_iter(tag_key, count=batch_size):
+                    batch.append(member)
+                    if len(batch) >= batch_size:
+                        cleared += await self._prune_tag_members(tag_key, batch)
+                        batch = []
+                if batch:
+                    cleared += await self._prune_tag_members(tag_key, batch)
+            
+            logger.info(f"Cleared {cleared} expired cache entries")
+            return cleared
             
         except Exception as e:
             logger.error(f"Failed to clear expired cache: {e}")
             return 0
 
+    async def _prune_tag_members(self, tag_key: str, members: List[str]) -> int:
+        """Remove members whose cache key no longer exists"""
+        pipe = self.redis_client.redis.pipeline(transaction=False)
+        for member in members:
+            pipe.exists(member)
+        dead = [member for member, exists in zip(members, await pipe.execute()) if not exists]
+        
+        if dead:
+            await self.redis_client.redis.srem(tag_key, *dead)
+        return len(dead)
+
 # Global cache service instance
 cache_service = CacheService()
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Circuit Breaker
+
+Per-endpoint breaker for the inference API. A rolling window of recent calls
+tracks the error rate and the slow-call rate; when either crosses its
+threshold the circuit opens and callers fail fast to their local fallbacks
+instead of queueing behind timeouts. After a cool-down a few trial calls are
+let through (half-open) to decide whether to close it again.
+"""
+
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import metric_line
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling error and latency window"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = None,
+        min_requests: int = None,
+        error_rate_threshold: float = None,
+        slow_call_seconds: float = None,
+        slow_call_rate_threshold: float = None,
+        open_seconds: float = None,
+        half_open_max_calls: int = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.window_seconds = window_seconds or settings.CIRCUIT_WINDOW_SECONDS
+        self.min_requests = min_requests or settings.CIRCUIT_MIN_REQUESTS
+        self.error_rate_threshold = error_rate_threshold or settings.CIRCUIT_ERROR_RATE_THRESHOLD
+        self.slow_call_seconds = slow_call_seconds or settings.CIRCUIT_SLOW_CALL_SECONDS
+        self.slow_call_rate_threshold = slow_call_rate_threshold or settings.CIRCUIT_SLOW_CALL_RATE_THRESHOLD
+        self.open_seconds = open_seconds or settings.CIRCUIT_OPEN_SECONDS
+        self.half_open_max_calls = half_open_max_calls or settings.CIRCUIT_HALF_OPEN_MAX_CALLS
+        self._clock = clock
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        # (timestamp, failed, slow) per finished call, oldest first
+        self._window: deque = deque()
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        # Identifies the current half-open period, so probes from an earlier one are told apart
+        self._half_open_period = 0
+
+        self.transitions: Counter = Counter()
+        self.stats = {"calls": 0, "failures": 0, "slow_calls": 0, "short_circuited": 0}
+
+    def before_call(self) -> Optional[int]:
+        """Reserve a call, or raise CircuitOpenError to fail fast
+
+        Returns the half-open period when the call is admitted as a trial
+        call, None otherwise; pass it back to after_call.
+        """
+        now = self._clock()
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+        if self.state == OPEN or (
+            self.state == HALF_OPEN and self._half_open_in_flight >= self.half_open_max_calls
+        ):
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError(self.name, max(self.open_seconds - (now - self.opened_at), 0.0))
+
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight += 1
+            return self._half_open_period
+        return None
+
+    def after_call(self, failed: Optional[bool], latency: float, probe: Optional[int] = None):
+        """Record a call's outcome; None releases the reservation without judging the endpoint
+
+        probe is what before_call returned; only trial calls of the current
+        half-open period free a trial slot or decide whether to close.
+        """
+        is_probe = self.state == HALF_OPEN and probe == self._half_open_period
+        if is_probe:
+            self._half_open_in_flight -= 1
+        if failed is None:
+            return
+
+        now = self._clock()
+        slow = latency >= self.slow_call_seconds
+        self.stats["calls"] += 1
+        self.stats["failures"] += failed
+        self.stats["slow_calls"] += slow
+
+        if self.state == HALF_OPEN:
+            if not is_probe:
+                # Admitted before the circuit opened (or in an earlier trial period)
+                return
+            if failed or slow:
+                self._open(now)
+            else:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._transition(CLOSED)
+            return
+
+        if self.state == OPEN:
+            # A call admitted before the circuit opened
+            return
+
+        self._window.append((now, failed, slow))
+        self._prune(now)
+        if len(self._window) >= self.min_requests:
+            error_rate, slow_rate = self._rates()
+            if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._open(now)
+
+    def _prune(self, now: float):
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def _rates(self):
+        total = len(self._window)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, failed, _ in self._window if failed)
+        slow = sum(1 for _, _, slow in self._window if slow)
+        return failures / total, slow / total
+
+    def _open(self, now: float):
+        self.opened_at = now
+        self._transition(OPEN)
+
+    def _transition(self, new_state: str):
+        old_state = self.state
+        error_rate, slow_rate = self._rates()
+        self.state = new_state
+        self.transitions[(old_state, new_state)] += 1
+
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        if new_state == HALF_OPEN:
+            self._half_open_period += 1
+        if new_state == CLOSED:
+            self._window.clear()
+
+        log = logger.info if new_state == CLOSED else logger.warning
+        log(
+            f"Circuit '{self.name}' {old_state} -> {new_state} "
+            f"(error rate {error_rate:.0%}, slow-call rate {slow_rate:.0%})"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current state, window rates and transition counts"""
+        self._prune(self._clock())
+        error_rate, slow_rate = self._rates()
+        return {
+            "state": self.state,
+            **self.stats,
+            "window_calls": len(self._window),
+            "error_rate": round(error_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "retry_after_seconds": (
+                round(max(self.open_seconds - (self._clock() - self.opened_at), 0.0), 1)
+                if self.state == OPEN else 0.0
+            ),
+            "transitions": {f"{old}->{new}": count for (old, new), count in self.transitions.items()}
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        """State gauge plus transition and short-circuit counters"""
+        labels = {"breaker": self.name}
+        lines = [
+            metric_line("circuit_breaker_state", STATE_VALUES[self.state], labels),
+            metric_line("circuit_breaker_short_circuited_total", self.stats["short_circuited"], labels)
+        ]
+        for (old, new), count in self.transitions.items():
+            lines.append(metric_line(
+                "circuit_breaker_transitions_total", count, {**labels, "from": old, "to": new}
+            ))
+        return lines
@@ -0,0 +1,151 @@
+"""
+Context Builder
+
+Packs retrieved documents and static knowledge into a per-agent token budget
+before they reach the generator, whose latency grows with prompt length.
+Tokens are counted with the generation model's tokenizer when it is
+available locally, near-duplicate chunks are dropped, and the highest
+scoring chunks are kept.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.database.lexical_index import tokenize
+from app.services.conversation_memory import estimate_tokens
+
+logger = get_logger(__name__)
+
+def document_chunks(documents: List[Dict[str, Any]], label: str = None) -> List[Dict[str, Any]]:
+    """Chunks for retrieved documents, scored in (0, 1] so closer matches (lower distance) rank higher"""
+    return [
+        {
+            "text": f"{label}: {doc['content']}" if label else doc["content"],
+            "score": 1.0 / (1.0 + max(float(doc.get("score", 1.0)), 0.0))
+        }
+        for doc in documents
+        if doc.get("content")
+    ]
+
+class ContextBuilder:
+    """Token-budgeted, deduplicated context assembly"""
+
+    def __init__(self, tokenizer=None, dedup_threshold: float = None):
+        self.tokenizer = tokenizer
+        self._estimate_logged = False
+        self.dedup_threshold = settings.CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+            "requests": 0,
+            "context_tokens": 0,
+            "prompts": 0,
+            "prompt_tokens": 0,
+            "chunks_kept": 0,
+            "chunks_dropped": 0,
+            "duplicates": 0
+        })
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens under the generation model's tokenizer (estimated when it isn't loaded)"""
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            if not self._estimate_logged:
+                self._estimate_logged = True
+                logger.warning("No tokenizer loaded yet, estimating prompt token counts")
+            return estimate_tokens(text)
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def set_tokenizer(self, tokenizer):
+        """Count with this tokenizer from now on (it is loaded off the request path)"""
+        self.tokenizer = tokenizer
+        logger.info(f"Counting prompt tokens with {getattr(tokenizer, 'name_or_path', 'the loaded tokenizer')}")
+
+    def budget_for(self, agent_type: str) -> int:
+        """Configured context budget for an agent"""
+        return getattr(settings, f"CONTEXT_TOKENS_{agent_type.upper()}", settings.CONTEXT_TOKENS_DEFAULT)
+
+    def build(self, agent_type: str, chunks: List[Dict[str, Any]], budget: int = None) -> str:
+        """Join the best chunks that fit the budget, in their original order
+
+        Each chunk is {"text", "score"} with an optional "pinned" flag; pinned
+        chunks (authoritative policy or solution text) are considered first.
+        """
+        budget = budget or self.budget_for(agent_type)
+        stats = self.stats[agent_type]
+
+        ranked = sorted(
+            range(len(chunks)),
+            key=lambda i: (not chunks[i].get("pinned"), -chunks[i].get("score", 0.0))
+        )
+
+        selected, selected_terms = [], []
+        used_tokens = duplicates = dropped = 0
+        for i in ranked:
+            text = chunks[i]["text"].strip()
+            if not text:
+                continue
+
+            terms = set(tokenize(text))
+            if self._is_duplicate(terms, selected_terms):
+                duplicates += 1
+                continue
+
+            tokens = self.count_tokens(text)
+            if used_tokens + tokens > budget:
+                # A smaller, lower-scoring chunk may still fit
+                dropped += 1
+                continue
+
+            selected.append(i)
+            selected_terms.append(terms)
+            used_tokens += tokens
+
+        stats["requests"] += 1
+        stats["context_tokens"] += used_tokens
+        stats["chunks_kept"] += len(selected)
+        stats["chunks_dropped"] += dropped
+        stats["duplicates"] += duplicates
+
+        logger.info(
+            f"Context for {agent_type}: {used_tokens}/{budget} tokens, {len(selected)} chunks "
+            f"({dropped} over budget, {duplicates} duplicates)"
+        )
+        return "\n\n".join(chunks[i]["text"].strip() for i in sorted(selected))
+
+    def _is_duplicate(self, terms: set, selected_terms: List[set]) -> bool:
+        """Mostly contained in (or containing) a chunk already selected"""
+        if not terms:
+            return False
+        for other in selected_terms:
+            if other and len(terms & other) / min(len(terms), len(other)) >= self.dedup_threshold:
+                return True
+        return False
+
+    def record_prompt(self, agent_type: str, prompt_tokens: int, context_tokens: int, history_tokens: int):
+        """Log the size of a prompt sent to the generator"""
+        self.stats[agent_type]["prompts"] += 1
+        self.stats[agent_type]["prompt_tokens"] += prompt_tokens
+        logger.info(
+            f"Prompt tokens for {agent_type}: {prompt_tokens} "
+            f"(context {context_tokens}, history {history_tokens})"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Average context and prompt size per agent"""
+        agents = {}
+        for agent_type, stats in self.stats.items():
+            agents[agent_type] = {
+                **stats,
+                "budget": self.budget_for(agent_type),
+                "avg_context_tokens": round(stats["context_tokens"] / max(stats["requests"], 1), 1),
+                "avg_prompt_tokens": round(stats["prompt_tokens"] / max(stats["prompts"], 1), 1)
+            }
+        return {
+            "tokenizer": getattr(self.tokenizer, "name_or_path", None) or "estimate",
+            "agents": agents
+        }
@@ -0,0 +1,154 @@
+"""
+Conversation Memory
+
+Per-conversation chat history for the LLM chains. Each conversation keeps a
+window of its most recent turns, trimmed to a token budget, in a bounded
+in-process LRU; idle conversations are evicted and rebuilt from the Redis
+conversation history on their next turn. Prompt size therefore stays flat
+however much traffic the process has served.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.local_cache import LocalCache
+
+logger = get_logger(__name__)
+
+_current_conversation: ContextVar[Optional[str]] = ContextVar("conversation_id", default=None)
+
+ROLE_PREFIXES = {"user": "Human", "assistant": "Assistant"}
+
+@contextmanager
+def bind_conversation(conversation_id: str) -> Iterator[str]:
+    """Make conversation_id the memory scope for LLM calls in this context"""
+    token = _current_conversation.set(conversation_id)
+    try:
+        yield conversation_id
+    finally:
+        _current_conversation.reset(token)
+
+def current_conversation_id() -> Optional[str]:
+    """Conversation bound to the current request, if any"""
+    return _current_conversation.get()
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), matching HuggingFaceAPILLM.get_num_tokens"""
+    return max(1, len(text) // 4)
+
+class ConversationMemoryStore:
+    """Token-bounded history windows keyed by conversation_id"""
+
+    def __init__(
+        self,
+        redis_client=None,
+        max_tokens: int = None,
+        max_conversations: int = None,
+        idle_ttl: int = None
+    ):
+        self.redis_client = redis_client
+        self.max_tokens = max_tokens or settings.CONVERSATION_MEMORY_MAX_TOKENS
+        # Each window is a list of {"role", "content", "tokens"} turns, oldest first
+        self._windows = LocalCache(
+            max_entries=max_conversations or settings.CONVERSATION_MEMORY_MAX_CONVERSATIONS,
+            default_ttl=idle_ttl or settings.CONVERSATION_MEMORY_IDLE_TTL
+        )
+        self.stats = {"loads": 0, "load_errors": 0, "trimmed_messages": 0}
+
+    async def get_window(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Recent turns for a conversation, loading them from Redis on an in-process miss"""
+        window = self._windows.get(conversation_id)
+        if window is not None:
+            return window
+
+        window = []
+        if self.redis_client is not None:
+            try:
+                # Stored newest first
+                history = await self.redis_client.get_conversation_history(
+                    conversation_id, settings.CONVERSATION_MEMORY_LOAD_MESSAGES
+                )
+                window = [
+                    self._turn(message["type"], message["content"])
+                    for message in reversed(history)
+                    if message.get("type") in ROLE_PREFIXES
+                ]
+                self.stats["loads"] += 1
+            except Exception as e:
+                self.stats["load_errors"] += 1
+                logger.warning(f"Failed to load memory for conversation {conversation_id}: {e}")
+
+        self._trim(window)
+        self._windows.set(conversation_id, window)
+        return window
+
+    async def add_turn(self, conversation_id: str, question: str, answer: str):
+        """Append a question/answer pair and trim the window to the token budget"""
+        window = await self.get_window(conversation_id)
+        window.append(self._turn("user", question))
+        window.append(self._turn("assistant", answer))
+        self._trim(window)
+        # Re-setting refreshes the idle TTL and the LRU position
+        self._windows.set(conversation_id, window)
+
+    async def format_history(self, conversation_id: Optional[str]) -> str:
+        """Window rendered as Human/Assistant lines for the prompt templates"""
+        if not conversation_id:
+            return ""
+        window = await self.get_window(conversation_id)
+        return "\n".join(f"{ROLE_PREFIXES[turn['role']]}: {turn['content']}" for turn in window)
+
+    async def get_pairs(self, conversation_id: Optional[str]) -> List[Tuple[str, str]]:
+        """Window as (human, assistant) pairs, the chat_history format of ConversationalRetrievalChain"""
+        if not conversation_id:
+            return []
+        window = await self.get_window(conversation_id)
+        pairs = []
+        pending_question = None
+        for turn in window:
+            if turn["role"] == "user":
+                pending_question = turn["content"]
+            elif pending_question is not None:
+                pairs.append((pending_question, turn["content"]))
+                pending_question = None
+        return pairs
+
+    def peek(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """In-process window without touching Redis (empty if not resident)"""
+        return self._windows.get(conversation_id) or []
+
+    def clear(self, conversation_id: str = None):
+        """Drop one conversation's window, or every window"""
+        if conversation_id is None:
+            self._windows.clear()
+        else:
+            self._windows.delete(conversation_id)
+
+    def _trim(self, window: List[Dict[str, Any]]):
+        """Drop the oldest turns until the window fits the token budget"""
+        total = sum(turn["tokens"] for turn in window)
+        dropped = 0
+        while dropped < len(window) and total > self.max_tokens:
+            total -= window[dropped]["tokens"]
+            dropped += 1
+        if dropped:
+            del window[:dropped]
+            self.stats["trimmed_messages"] += dropped
+
+    @staticmethod
+    def _turn(role: str, content: str) -> Dict[str, Any]:
+        return {"role": role, "content": content, "tokens": estimate_tokens(content)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resident conversations, Redis reloads and trimming"""
+        return {
+            **self.stats,
+            "max_tokens": self.max_tokens,
+            "conversations": self._windows.get_stats()
+        }
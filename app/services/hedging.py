@@ -0,0 +1,97 @@
+"""
+Request Hedging
+
+Tail-latency hedging for remote inference. If a call hasn't answered by the
+observed latency quantile of its model, a second identical call is sent and
+whichever returns first wins; the other is cancelled. A rate budget keeps
+hedges to a small fraction of traffic so a slow backend isn't doubled.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+class Hedger:
+    """Hedges calls to one model once they outlast its recent latency quantile"""
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        quantile: float = None,
+        min_samples: int = None,
+        max_hedge_rate: float = None,
+        window_size: int = None
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.quantile = quantile or settings.HEDGE_QUANTILE
+        self.min_samples = min_samples or settings.HEDGE_MIN_SAMPLES
+        self.max_hedge_rate = settings.HEDGE_MAX_RATE if max_hedge_rate is None else max_hedge_rate
+        # Recent successful latencies, so the hedge delay follows current conditions
+        self._samples: deque = deque(maxlen=window_size or settings.HEDGE_WINDOW_SIZE)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "hedges_skipped_budget": 0}
+
+    def hedge_delay(self) -> Optional[float]:
+        """Observed latency quantile, or None until there are enough samples"""
+        if not self.enabled or len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(self.quantile * len(ordered)), len(ordered) - 1)]
+
+    async def call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run make_call(), hedging with a second attempt if the first is slow"""
+        self.stats["calls"] += 1
+        start_time = time.perf_counter()
+        delay = self.hedge_delay()
+
+        attempts = [asyncio.ensure_future(make_call())]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    if self.stats["hedged"] < self.max_hedge_rate * self.stats["calls"]:
+                        self.stats["hedged"] += 1
+                        attempts.append(asyncio.ensure_future(make_call()))
+                    else:
+                        self.stats["hedges_skipped_budget"] += 1
+
+            # First successful attempt wins; fail only if every attempt fails
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not attempts[0]:
+                            self.stats["hedge_wins"] += 1
+                        self._samples.append(time.perf_counter() - start_time)
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+
+        finally:
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge counts and the current hedge delay"""
+        delay = self.hedge_delay()
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "samples": len(self._samples),
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None
+        }
@@ -0,0 +1,231 @@
+"""
+Pooled HTTP Client
+
+Long-lived keep-alive httpx client for Hugging Face inference calls.
+Reuses TCP/TLS connections across requests and tracks pool utilization.
+Each model endpoint sits behind its own circuit breaker.
+"""
+
+import asyncio
+import time
+import httpx
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.circuit_breaker import CircuitBreaker
+
+logger = get_logger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+def is_failure_status(status_code: int) -> bool:
+    """Responses that count against an endpoint's circuit (server errors, model loading, throttling)"""
+    return status_code >= 500 or status_code == 429
+
+class PooledHTTPClient:
+    """Shared httpx.AsyncClient with connection limits and reuse counters"""
+
+    def __init__(
+        self,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        per_host_limit: int = None,
+        http2: bool = None,
+        circuit_breaker_enabled: bool = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.HF_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.HF_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=keepalive_expiry or settings.HF_POOL_KEEPALIVE_EXPIRY
+        )
+        self.per_host_limit = per_host_limit or settings.HF_POOL_PER_HOST_LIMIT
+
+        http2 = settings.HF_HTTP2_ENABLED if http2 is None else http2
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.circuit_breaker_enabled = (
+            settings.CIRCUIT_BREAKER_ENABLED if circuit_breaker_enabled is None else circuit_breaker_enabled
+        )
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "connections_opened": 0,
+            "tls_handshakes": 0,
+            "host_limit_waits": 0
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the underlying client on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=settings.HUGGINGFACE_TIMEOUT
+            )
+            logger.info(f"Created pooled HTTP client (http2={self.http2}, limits={self.limits})")
+        return self._client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Per-host concurrency limit on top of the global pool limit"""
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    def _get_breaker(self, url: str) -> Optional[CircuitBreaker]:
+        """Circuit breaker for a model endpoint (keyed by URL path)"""
+        if not self.circuit_breaker_enabled:
+            return None
+        endpoint = urlsplit(url).path.strip("/")
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker(endpoint)
+        return self.breakers[endpoint]
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        """httpcore trace hook used to count new connections"""
+        if event_name == "connection.connect_tcp.complete":
+            self.stats["connections_opened"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self.stats["tls_handshakes"] += 1
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """POST through the shared pool; raises CircuitOpenError while the endpoint's circuit is open"""
+        breaker = self._get_breaker(url)
+        probe = breaker.before_call() if breaker is not None else None
+        
+        start_time = time.perf_counter()
+        failed = None
+        try:
+            response = await self._post(url, **kwargs)
+            failed = is_failure_status(response.status_code)
+            return response
+        except asyncio.CancelledError:
+            # The caller gave up; that says nothing about the endpoint
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            if breaker is not None:
+                breaker.after_call(failed, time.perf_counter() - start_time, probe)
+
+    async def _post(self, url: str, **kwargs) -> httpx.Response:
+        semaphore = self._get_host_semaphore(url)
+        if semaphore.locked():
+            self.stats["host_limit_waits"] += 1
+
+        async with semaphore:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+            try:
+                return await self._get_client().post(
+                    url,
+                    extensions={"trace": self._trace},
+                    **kwargs
+                )
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+
+    @asynccontextmanager
+    async def stream_post(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """POST through the shared pool, yielding the response before the body is read"""
+        breaker = self._get_breaker(url)
+        probe = breaker.before_call() if breaker is not None else None
+        
+        start_time = time.perf_counter()
+        failed = None
+        try:
+            async with self._stream_post(url, **kwargs) as response:
+                # Judge the endpoint on its response headers; latency is time to first byte
+                failed = is_failure_status(response.status_code)
+                latency = time.perf_counter() - start_time
+                yield response
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if failed is None:
+                failed = True
+                latency = time.perf_counter() - start_time
+            raise
+        finally:
+            if breaker is not None:
+                breaker.after_call(failed, latency if failed is not None else 0.0, probe)
+
+    @asynccontextmanager
+    async def _stream_post(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        semaphore = self._get_host_semaphore(url)
+        if semaphore.locked():
+            self.stats["host_limit_waits"] += 1
+
+        async with semaphore:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+            try:
+                async with self._get_client().stream(
+                    "POST",
+                    url,
+                    extensions={"trace": self._trace},
+                    **kwargs
+                ) as response:
+                    yield response
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool utilization and connection reuse counters"""
+        requests = self.stats["requests"]
+        reused = max(requests - self.stats["connections_opened"], 0)
+
+        return {
+            **self.stats,
+            "connection_reuse_rate": round(reused / requests, 3) if requests else 0.0,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "per_host_limit": self.per_host_limit,
+            "circuits": self.get_circuit_states()
+        }
+
+    def get_circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state per model endpoint"""
+        return {endpoint: breaker.get_stats() for endpoint, breaker in self.breakers.items()}
+
+    def circuit_prometheus_lines(self) -> List[str]:
+        """Circuit breaker metrics in Prometheus text format"""
+        return [line for breaker in self.breakers.values() for line in breaker.prometheus_lines()]
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Closed pooled HTTP client")
+        self._client = None
@@ -5,13 +5,21 @@ Uses actual LangChain components for LLM integration
 
 import httpx
 import asyncio
-from typing import Dict, List, Any, Optional
+import json
+from typing import AsyncIterator, Dict, List, Any, Optional
 from langchain_huggingface import HuggingFacePipeline
 from langchain.chains import ConversationalRetrievalChain, LLMChain
-from langchain.memory import ConversationBufferMemory, ConversationSummaryBufferMemory
 from langchain.prompts import PromptTemplate
 from langchain.schema import BaseRetriever, Document
-from langchain.callbacks.base import BaseCallbackHandler
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForLLMRun,
+    CallbackManagerForRetrieverRun
+)
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
 from langchain.vectorstores import Chroma
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -22,34 +30,77 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.core.config import settings
+from app.core.keywords import keyword_engine
 from app.core.logger import get_logger
 from app.database.chroma_client import ChromaClient
+from app.services.context_builder import ContextBuilder
+from app.services.conversation_memory import ConversationMemoryStore, current_conversation_id
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.hedging import Hedger
+from app.core.deadlines import DeadlineExceeded, timeout_for
+from app.services.http_client import PooledHTTPClient
+from app.services.intent_classifier import EmbeddingIntentClassifier
+from app.services.micro_batcher import MicroBatcher
+from app.services.streaming import StreamSink, current_sink
 
 logger = get_logger(__name__)
 
-class StreamingCallbackHandler(BaseCallbackHandler):
-    """Callback handler for streaming responses"""
+class StreamingCallbackHandler(AsyncCallbackHandler):
+    """Callback handler for streaming responses, forwarding tokens to the client's stream"""
     
-    def __init__(self):
+    def __init__(self, sink: Optional[StreamSink] = None):
+        self.sink = sink
         self.tokens = []
     
-    def on_llm_new_token(self, token: str, **kwargs) -> None:
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
         self.tokens.append(token)
+        if self.sink is not None:
+            # Waits while the client's buffer is full, pausing generation
+            await self.sink.emit("token", {"text": token})
+
+def _run_sync(coro):
+    """Run a coroutine from synchronous code (scripts, worker threads).
+    
+    Refuses inside a running event loop, where a nested loop would block every
+    other request; async callers must use the a* methods instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    coro.close()
+    raise RuntimeError("Synchronous LangChain call inside the event loop; use the async API (ainvoke/arun)")
 
 class ChromaRetriever(BaseRetriever):
-    """Custom retriever for ChromaDB integration"""
+    """Custom retriever for ChromaDB integration (async-native)"""
     
-    def __init__(self, chroma_client: ChromaClient, collection_name: str = "products"):
-        self.chroma_client = chroma_client
-        self.collection_name = collection_name
+    chroma_client: Any
+    collection_name: str = "products"
+    k: int = 5
     
-    def get_relevant_documents(self, query: str) -> List[Document]:
+    def __init__(self, chroma_client: ChromaClient, collection_name: str = "products", **kwargs):
+        super().__init__(chroma_client=chroma_client, collection_name=collection_name, **kwargs)
+    
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        """Synchronous entry point for callers outside the event loop"""
+        return _run_sync(self._search(query))
+    
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
         """Retrieve relevant documents from ChromaDB"""
+        return await self._search(query)
+    
+    async def _search(self, query: str) -> List[Document]:
         try:
             if self.collection_name == "products":
-                results = asyncio.run(self.chroma_client.search_products(query, limit=5))
+                results = await self.chroma_client.search_products(query, limit=self.k)
             else:
-                results = asyncio.run(self.chroma_client.search_faqs(query, limit=5))
+                results = await self.chroma_client.search_faqs(query, limit=self.k)
             
             documents = []
             for result in results:
@@ -68,10 +119,75 @@ class ChromaRetriever(BaseRetriever):
             logger.error(f"ChromaRetriever error: {e}")
             return []
 
+class HuggingFaceAPILLM(LLM):
+    """LangChain LLM backed by the Hugging Face inference API (async-native, streaming)"""
+    
+    client: Any
+    max_length: int = 150
+    
+    @property
+    def _llm_type(self) -> str:
+        return "huggingface_inference_api"
+    
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.client.models["generation"], "max_length": self.max_length}
+    
+    @staticmethod
+    def _apply_stop(text: str, stop: Optional[List[str]]) -> str:
+        for sequence in stop or []:
+            text = text.split(sequence)[0]
+        return text
+    
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        """Synchronous entry point for callers outside the event loop"""
+        return _run_sync(self._acall(prompt, stop=stop, **kwargs))
+    
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        # _generate_with_api streams tokens to the client itself when the request is streaming
+        text = await self.client._generate_with_api(prompt, max_length=kwargs.get("max_length", self.max_length))
+        return self._apply_stop(text, stop)
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[GenerationChunk]:
+        async for token in self.client._stream_with_api(prompt, kwargs.get("max_length", self.max_length)):
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+    
+    def get_num_tokens(self, text: str) -> int:
+        # Rough estimate (~4 characters per token); avoids downloading and running a tokenizer on the event loop
+        return max(1, len(text) // 4)
+
 class LangChainHuggingFaceClient:
     """LangChain-powered Hugging Face client"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        embeddings: Optional[HuggingFaceEmbeddings] = None,
+        chroma_client: Optional[ChromaClient] = None,
+        http_client: Optional[PooledHTTPClient] = None,
+        conversation_memory: Optional[ConversationMemoryStore] = None,
+        context_builder: Optional[ContextBuilder] = None
+    ):
         self.api_url = settings.HUGGINGFACE_API_URL
         self.api_key = settings.HUGGINGFACE_API_KEY
         self.headers = {
@@ -81,17 +197,32 @@ class LangChainHuggingFaceClient:
         
         # Models configuration
         self.models = {
-            "classification": "facebook/bart-large-mnli",
-            "generation": "meta-llama/Llama-2-7b-chat-hf",
-            "embeddings": "sentence-transformers/all-MiniLM-L6-v2"
+            "classification": settings.CLASSIFICATION_MODEL,
+            "generation": settings.GENERATION_MODEL,
+            "embeddings": settings.EMBEDDINGS_MODEL
         }
         
-        # Initialize LangChain components
+        # Initialize LangChain components (shared resources may be injected)
         self.llm = None
-        self.embeddings = None
-        self.memory = None
+        self.embeddings = embeddings
+        self.memory = conversation_memory or ConversationMemoryStore()
+        self.context_builder = context_builder or ContextBuilder()
         self.chains = {}
-        self.chroma_client = ChromaClient()
+        self.local_classifier = None
+        self.classification_batchers = {}
+        self.chroma_client = chroma_client or ChromaClient()
+        self.http_client = http_client or PooledHTTPClient()
+        
+        # Per-role timeout caps (shortened by the request deadline) and tail-latency hedging
+        self.timeouts = {
+            "classification": settings.CLASSIFICATION_TIMEOUT_SECONDS,
+            "generation": settings.GENERATION_TIMEOUT_SECONDS
+        }
+        # One hedger (latency window and hedge budget) per role; each role calls a single model endpoint
+        self.hedgers = {
+            "classification": Hedger("classification", enabled=settings.CLASSIFICATION_HEDGING_ENABLED),
+            "generation": Hedger("generation", enabled=settings.GENERATION_HEDGING_ENABLED)
+        }
         
         # Initialize components
         self._initialize_components()
@@ -99,19 +230,21 @@ class LangChainHuggingFaceClient:
     def _initialize_components(self):
         """Initialize LangChain components"""
         try:
-            # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name=self.models["embeddings"],
-                model_kwargs={'device': 'cpu'}
-            )
+            # Initialize embeddings unless a shared model was injected
+            if self.embeddings is None:
+                self.embeddings = HuggingFaceEmbeddings(
+                    model_name=self.models["embeddings"],
+                    model_kwargs={'device': 'cpu'}
+                )
             
-            # Initialize memory
-            self.memory = ConversationBufferMemory(
-                memory_key="chat_history",
-                return_messages=True,
-                output_key="answer"
-            )
+            # Local zero-shot classifier shares the embeddings model
+            self.local_classifier = EmbeddingIntentClassifier(self.embeddings)
             
+        except Exception as e:
+            # Generation goes through the API and doesn't need local embeddings
+            logger.error(f"Failed to load embeddings model: {e}")
+        
+        try:
             # Initialize LLM (using API for better performance)
             self.llm = self._create_api_llm()
             
@@ -123,22 +256,9 @@ class LangChainHuggingFaceClient:
         except Exception as e:
             logger.error(f"Failed to initialize LangChain components: {e}")
     
-    def _create_api_llm(self):
+    def _create_api_llm(self) -> HuggingFaceAPILLM:
         """Create LLM using Hugging Face API"""
-        
-        class HuggingFaceAPILLM:
-            """Custom LLM class for Hugging Face API"""
-            
-            def __init__(self, client):
-                self.client = client
-            
-            def __call__(self, prompt: str) -> str:
-                return asyncio.run(self.client._generate_with_api(prompt))
-            
-            async def agenerate(self, prompt: str) -> str:
-                return await self.client._generate_with_api(prompt)
-        
-        return HuggingFaceAPILLM(self)
+        return HuggingFaceAPILLM(client=self)
     
     def _initialize_chains(self):
         """Initialize various LangChain chains"""
@@ -164,7 +284,6 @@ class LangChainHuggingFaceClient:
         self.chains["product"] = LLMChain(
             llm=self.llm,
             prompt=product_prompt,
-            memory=self.memory,
             verbose=True
         )
         
@@ -189,7 +308,6 @@ class LangChainHuggingFaceClient:
         self.chains["refund"] = LLMChain(
             llm=self.llm,
             prompt=refund_prompt,
-            memory=self.memory,
             verbose=True
         )
         
@@ -214,62 +332,136 @@ class LangChainHuggingFaceClient:
         self.chains["technical"] = LLMChain(
             llm=self.llm,
             prompt=technical_prompt,
-            memory=self.memory,
             verbose=True
         )
     
     async def classify_text(self, text: str, candidate_labels: List[str]) -> Dict[str, Any]:
-        """Classify text using BART model with LangChain"""
+        """Classify text, micro-batched with other concurrent requests when enabled"""
+        if settings.INTENT_BATCHING_ENABLED:
+            batcher = self._get_classification_batcher(candidate_labels)
+            return await batcher.submit(text)
+        
+        results = await self.classify_texts([text], candidate_labels)
+        return results[0]
+    
+    async def classify_texts(self, texts: List[str], candidate_labels: List[str]) -> List[Dict[str, Any]]:
+        """Classify a batch of texts with one call to the configured backend (remote BART or local embeddings)"""
+        try:
+            if settings.INTENT_CLASSIFIER_BACKEND == "local" and self.local_classifier:
+                results = await self.local_classifier.aclassify_batch(texts, candidate_labels)
+            else:
+                results = await self._classify_with_api(texts, candidate_labels)
+            
+            # Log classification for monitoring
+            logger.info(f"Classification results ({len(texts)} texts): {results}")
+            
+            return results
+        
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            # Fail fast: the embedding classifier when it is loaded, keywords otherwise
+            logger.warning(f"Classification short-circuited: {e}")
+            if self.local_classifier:
+                try:
+                    results = await self.local_classifier.aclassify_batch(texts, candidate_labels)
+                    # Flagged so callers don't take these for the configured backend's answer
+                    return [{**result, "fallback": True, "backend": "local"} for result in results]
+                except Exception as local_error:
+                    logger.error(f"Local classification fallback failed: {local_error}")
+            return [self._fallback_classification(text, candidate_labels) for text in texts]
+                
+        except httpx.HTTPError as e:
+            logger.error(f"HF classification error: {e}")
+            return [self._fallback_classification(text, candidate_labels) for text in texts]
+        
+        except Exception as e:
+            logger.error(f"Unexpected error in classification: {e}")
+            return [self._fallback_classification(text, candidate_labels) for text in texts]
+    
+    def _get_classification_batcher(self, candidate_labels: List[str]) -> MicroBatcher:
+        """One micro-batcher per label set, since a batch must share candidate labels"""
+        labels_key = tuple(candidate_labels)
+        
+        if labels_key not in self.classification_batchers:
+            self.classification_batchers[labels_key] = MicroBatcher(
+                batch_fn=lambda texts: self.classify_texts(texts, list(labels_key)),
+                max_batch_size=settings.INTENT_BATCH_MAX_SIZE,
+                max_wait_ms=settings.INTENT_BATCH_WINDOW_MS,
+                name=f"classification[{','.join(labels_key)}]"
+            )
+        
+        return self.classification_batchers[labels_key]
+    
+    def get_classification_stats(self) -> Dict[str, Any]:
+        """Per-batcher metrics for intent classification"""
+        return {
+            "backend": settings.INTENT_CLASSIFIER_BACKEND,
+            "batching_enabled": settings.INTENT_BATCHING_ENABLED,
+            "batchers": {
+                batcher.name: batcher.get_stats()
+                for batcher in self.classification_batchers.values()
+            }
+        }
+    
+    async def _classify_with_api(self, texts: List[str], candidate_labels: List[str]) -> List[Dict[str, Any]]:
+        """Zero-shot classification using the BART model on the inference API"""
         url = f"{self.api_url}/models/{self.models['classification']}"
         
+        # The zero-shot pipeline accepts a list of inputs and returns one result per input
         payload = {
-            "inputs": text,
+            "inputs": texts if len(texts) > 1 else texts[0],
             "parameters": {
                 "candidate_labels": candidate_labels
             }
         }
         
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                # Log classification for monitoring
-                logger.info(f"Classification result: {result}")
-                
-                return result
-                
-        except httpx.HTTPError as e:
-            logger.error(f"HF classification error: {e}")
-            return self._fallback_classification(text, candidate_labels)
+        async def attempt():
+            response = await self.http_client.post(
+                url,
+                headers=self.headers,
+                json=payload,
+                timeout=timeout_for(self.timeouts["classification"])
+            )
+            response.raise_for_status()
+            return response.json()
         
-        except Exception as e:
-            logger.error(f"Unexpected error in classification: {e}")
-            return self._fallback_classification(text, candidate_labels)
+        result = await self.hedgers["classification"].call(attempt)
+        
+        return result if isinstance(result, list) else [result]
     
-    async def generate_with_rag(self, query: str, agent_type: str = "product", context: str = "") -> str:
-        """Generate response using RAG with LangChain"""
+    async def generate_with_rag(
+        self,
+        query: str,
+        agent_type: str = "product",
+        context: str = "",
+        conversation_id: Optional[str] = None
+    ) -> str:
+        """Generate response using RAG with LangChain, with the conversation's bounded history"""
         try:
             # Get relevant documents if context not provided
             if not context:
                 retriever = ChromaRetriever(self.chroma_client, collection_name="products")
-                docs = retriever.get_relevant_documents(query)
+                docs = await retriever.ainvoke(query)
                 context = "\n".join([doc.page_content for doc in docs[:3]])
             
             # Get appropriate chain
             chain = self.chains.get(agent_type, self.chains["product"])
             
+            # History is per conversation; the turn itself is recorded by the caller
+            chat_history = await self.memory.format_history(conversation_id or current_conversation_id())
+            self.context_builder.record_prompt(
+                agent_type,
+                prompt_tokens=self.context_builder.count_tokens(
+                    chain.prompt.format(question=query, context=context, chat_history=chat_history)
+                ),
+                context_tokens=self.context_builder.count_tokens(context),
+                history_tokens=self.context_builder.count_tokens(chat_history)
+            )
+            
             # Generate response
             response = await chain.arun(
                 question=query,
                 context=context,
-                chat_history=self.memory.chat_memory.messages
+                chat_history=chat_history
             )
             
             return response.strip()
@@ -281,14 +473,6 @@ class LangChainHuggingFaceClient:
     async def generate_conversational_response(self, query: str, conversation_id: str) -> str:
         """Generate response with conversation memory"""
         try:
-            # Create conversation-specific memory
-            conversation_memory = ConversationSummaryBufferMemory(
-                llm=self.llm,
-                max_token_limit=1000,
-                memory_key="chat_history",
-                return_messages=True
-            )
-            
             # Get retriever for context
             retriever = ChromaRetriever(self.chroma_client)
             
@@ -296,25 +480,25 @@ class LangChainHuggingFaceClient:
             qa_chain = ConversationalRetrievalChain.from_llm(
                 llm=self.llm,
                 retriever=retriever,
-                memory=conversation_memory,
                 return_source_documents=True,
                 verbose=True
             )
             
-            # Generate response
-            result = await qa_chain.arun({"question": query})
+            # Generate response (arun can't be used with return_source_documents)
+            result = await qa_chain.ainvoke({
+                "question": query,
+                "chat_history": await self.memory.get_pairs(conversation_id)
+            })
+            await self.memory.add_turn(conversation_id, query, result["answer"])
             
-            return result
+            return result["answer"]
             
         except Exception as e:
             logger.error(f"Conversational generation error: {e}")
             return self._fallback_response(query)
     
-    async def _generate_with_api(self, prompt: str, max_length: int = 150) -> str:
-        """Generate response using Hugging Face API"""
-        url = f"{self.api_url}/models/{self.models['generation']}"
-        
-        payload = {
+    def _generation_payload(self, prompt: str, max_length: int) -> Dict[str, Any]:
+        return {
             "inputs": prompt,
             "parameters": {
                 "max_length": max_length,
@@ -324,26 +508,77 @@ class LangChainHuggingFaceClient:
                 "repetition_penalty": 1.1
             }
         }
+    
+    async def _stream_with_api(self, prompt: str, max_length: int = 150) -> AsyncIterator[str]:
+        """Yield tokens from the Hugging Face streaming (server-sent events) API"""
+        url = f"{self.api_url}/models/{self.models['generation']}"
+        payload = {**self._generation_payload(prompt, max_length), "stream": True}
         
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60.0
-                )
-                response.raise_for_status()
-                result = response.json()
+        # Not hedged: once tokens reach the client a second attempt can't replace them
+        timeout = timeout_for(self.timeouts["generation"])
+        async with self.http_client.stream_post(url, headers=self.headers, json=payload, timeout=timeout) as response:
+            response.raise_for_status()
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                
+                chunk = json.loads(line[len("data:"):])
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
                 
-                if isinstance(result, list) and len(result) > 0:
-                    generated_text = result[0].get("generated_text", "")
-                    # Remove the prompt from response
-                    if prompt in generated_text:
-                        generated_text = generated_text.replace(prompt, "").strip()
-                    return generated_text
-                else:
-                    return "I apologize, but I couldn't generate a proper response."
+                token = chunk.get("token") or {}
+                if token.get("text") and not token.get("special"):
+                    yield token["text"]
+    
+    async def _generate_with_api(self, prompt: str, max_length: int = 150) -> str:
+        """Generate response using Hugging Face API (token-streamed when the request is streaming)"""
+        sink = current_sink()
+        if sink is not None:
+            handler = StreamingCallbackHandler(sink)
+            try:
+                async for token in self._stream_with_api(prompt, max_length):
+                    await handler.on_llm_new_token(token)
+                return "".join(handler.tokens).strip()
+            
+            except (CircuitOpenError, DeadlineExceeded) as e:
+                logger.warning(f"Generation short-circuited: {e}")
+                return self._fallback_response(prompt)
+            
+            except Exception as e:
+                logger.error(f"HF streaming generation error: {e}")
+                if handler.tokens:
+                    return "".join(handler.tokens).strip()
+                # Nothing reached the client yet, so a regular request is still safe
+        
+        url = f"{self.api_url}/models/{self.models['generation']}"
+        payload = self._generation_payload(prompt, max_length)
+        
+        async def attempt():
+            response = await self.http_client.post(
+                url,
+                headers=self.headers,
+                json=payload,
+                timeout=timeout_for(self.timeouts["generation"])
+            )
+            response.raise_for_status()
+            return response.json()
+        
+        try:
+            result = await self.hedgers["generation"].call(attempt)
+            
+            if isinstance(result, list) and len(result) > 0:
+                generated_text = result[0].get("generated_text", "")
+                # Remove the prompt from response
+                if prompt in generated_text:
+                    generated_text = generated_text.replace(prompt, "").strip()
+                return generated_text
+            else:
+                return "I apologize, but I couldn't generate a proper response."
+        
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning(f"Generation short-circuited: {e}")
+            return self._fallback_response(prompt)
                     
         except httpx.HTTPError as e:
             logger.error(f"HF generation error: {e}")
@@ -370,22 +605,23 @@ class LangChainHuggingFaceClient:
     
     def _fallback_classification(self, text: str, labels: List[str]) -> Dict[str, Any]:
         """Simple keyword-based fallback classification"""
-        text_lower = text.lower()
+        hits = keyword_engine.scan(text)
         scores = []
         
         for label in labels:
-            if "product" in label and any(word in text_lower for word in ["price", "buy", "product", "features"]):
+            if "product" in label and hits["fallback.product"]:
                 scores.append(0.8)
-            elif "refund" in label and any(word in text_lower for word in ["refund", "return", "money"]):
+            elif "refund" in label and hits["fallback.refund"]:
                 scores.append(0.8)
-            elif "technical" in label and any(word in text_lower for word in ["error", "bug", "help", "issue"]):
+            elif "technical" in label and hits["fallback.technical"]:
                 scores.append(0.8)
             else:
                 scores.append(0.2)
         
         return {
             "labels": labels,
-            "scores": scores
+            "scores": scores,
+            "fallback": True
         }
     
     def _fallback_response(self, prompt: str) -> str:
@@ -399,16 +635,13 @@ class LangChainHuggingFaceClient:
         else:
             return "Thank you for your question. Could you please provide more details so I can assist you better?"
     
-    def clear_memory(self):
-        """Clear conversation memory"""
-        if self.memory:
-            self.memory.clear()
+    def clear_memory(self, conversation_id: str = None):
+        """Clear one conversation's memory, or all of it"""
+        self.memory.clear(conversation_id)
     
-    def get_memory_summary(self) -> str:
-        """Get summary of conversation memory"""
-        if isinstance(self.memory, ConversationSummaryBufferMemory):
-            return self.memory.moving_summary_buffer
-        return ""
+    def get_memory_summary(self, conversation_id: str) -> str:
+        """Resident history window of a conversation"""
+        return "\n".join(turn["content"] for turn in self.memory.peek(conversation_id))
 
 # For backward compatibility
 HuggingFaceClient = LangChainHuggingFaceClient
\ No newline at end of file
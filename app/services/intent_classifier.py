@@ -0,0 +1,121 @@
+"""
+Local Intent Classifier
+
+In-process zero-shot intent classification on CPU. Each candidate label is
+represented by a handful of prototype phrases; a message is scored by cosine
+similarity to the closest prototype of every label using the shared
+sentence-transformers embeddings model. Returns the same {labels, scores}
+shape as the Hugging Face zero-shot inference API.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Prototype phrases per intent label
+INTENT_PROTOTYPES = {
+    "product_inquiry": [
+        "How much does the premium plan cost?",
+        "What features are included in your plans?",
+        "Can you compare the standard and premium plans?",
+        "I want to buy a subscription",
+        "Tell me about your products and pricing"
+    ],
+    "refund_request": [
+        "I want a refund for my order",
+        "How do I return a product and get my money back?",
+        "What is your refund policy?",
+        "Please cancel my order and refund the payment",
+        "I was charged twice, I need a refund"
+    ],
+    "technical_issue": [
+        "I can't log into my account",
+        "The app keeps crashing",
+        "I'm getting an error when calling the API",
+        "The website is very slow and pages time out",
+        "Something is broken and not working"
+    ],
+    "general_question": [
+        "Hi, what can you help me with?",
+        "I have a question",
+        "How do I contact customer support?",
+        "What are your business hours?",
+        "Hello there"
+    ]
+}
+
+class EmbeddingIntentClassifier:
+    """Zero-shot classifier based on similarity to label prototypes"""
+
+    def __init__(self, embeddings, prototypes: Dict[str, List[str]] = None, temperature: float = None):
+        self.embeddings = embeddings
+        self.prototypes = prototypes or INTENT_PROTOTYPES
+        self.temperature = temperature or settings.LOCAL_CLASSIFIER_TEMPERATURE
+        self._prototype_vectors: Dict[str, np.ndarray] = {}
+        # Single worker: the embedding model already parallelizes internally
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-classifier")
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into L2-normalized float32 rows"""
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _get_prototype_vectors(self, label: str) -> np.ndarray:
+        """Prototype matrix for a label, embedded once and cached"""
+        if label not in self._prototype_vectors:
+            # Unknown labels fall back to the label name itself as a prototype
+            phrases = self.prototypes.get(label) or [label.replace("_", " ")]
+            self._prototype_vectors[label] = self._embed(phrases)
+        return self._prototype_vectors[label]
+
+    def classify_batch(self, texts: List[str], candidate_labels: List[str]) -> List[Dict[str, Any]]:
+        """Classify many texts with a single embedding pass"""
+        if not texts:
+            return []
+
+        text_vectors = self._embed(texts)
+
+        # similarities[i, j] = best prototype match of text i for label j
+        similarities = np.stack(
+            [
+                (text_vectors @ self._get_prototype_vectors(label).T).max(axis=1)
+                for label in candidate_labels
+            ],
+            axis=1
+        )
+
+        logits = similarities / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        results = []
+        for text, row in zip(texts, probabilities):
+            order = np.argsort(-row)
+            results.append({
+                "sequence": text,
+                "labels": [candidate_labels[i] for i in order],
+                "scores": [float(row[i]) for i in order]
+            })
+
+        return results
+
+    async def aclassify_batch(self, texts: List[str], candidate_labels: List[str]) -> List[Dict[str, Any]]:
+        """Classify many texts without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.classify_batch, texts, candidate_labels)
+
+    async def classify(self, text: str, candidate_labels: List[str]) -> Dict[str, Any]:
+        """Classify a single text"""
+        results = await self.aclassify_batch([text], candidate_labels)
+        return results[0]
@@ -0,0 +1,226 @@
+"""
+Intent Router
+
+Confidence cascade in front of the remote zero-shot classifier. Cheap tiers
+decide first and only ambiguous messages escalate:
+
+    cache  - exact match on the normalized message (previous local/remote decision)
+    rules  - keyword engine hits plus regex entity hits (order IDs, error codes)
+    local  - embedding prototype classifier, when the embeddings model is loaded
+    remote - BART zero-shot on the inference API (micro-batched)
+
+A sample of fast-path decisions is re-checked against the remote classifier
+in the background, giving each tier an agreement rate to tune thresholds on.
+"""
+
+import asyncio
+import contextvars
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.keywords import keyword_engine
+from app.core.logger import get_logger
+from app.core.metrics import LatencyHistogram
+from app.services.local_cache import LocalCache
+from app.services.semantic_cache import normalize_query
+
+logger = get_logger(__name__)
+
+TIERS = ("cache", "rules", "local", "remote")
+
+# Keyword engine category voting for each intent
+KEYWORD_INTENTS = {
+    "product_inquiry": "intent.product",
+    "refund_request": "intent.refund",
+    "technical_issue": "intent.technical"
+}
+
+# Entities that pin an intent down on their own
+ENTITY_PATTERNS = {
+    "refund_request": re.compile(r"\b(?:ord|order)[\s#:-]*\d{3,}\b", re.IGNORECASE),
+    "technical_issue": re.compile(
+        r"\b(?:error|status|code|http)\s*[45]\d\d\b|\b[45]\d\d\s+error\b|\bexception\b|\btraceback\b",
+        re.IGNORECASE
+    )
+}
+
+class IntentCascade:
+    """Tiered intent classifier with per-tier hit rate, latency and shadow accuracy"""
+
+    def __init__(self, llm_client, shadow_rate: float = None):
+        self.llm_client = llm_client
+        self.shadow_rate = settings.INTENT_CASCADE_SHADOW_RATE if shadow_rate is None else shadow_rate
+        self.cache = LocalCache(
+            max_entries=settings.INTENT_CACHE_MAX_ENTRIES,
+            default_ttl=settings.INTENT_CACHE_TTL
+        )
+
+        self.stats = {
+            tier: {"decisions": 0, "shadow_checks": 0, "shadow_agreements": 0}
+            for tier in TIERS
+        }
+        self.latency = {tier: LatencyHistogram() for tier in TIERS}
+        self._shadow_tasks = set()
+        self._random = random.Random()
+
+    async def classify(self, message: str, labels: List[str]) -> Tuple[Dict[str, float], str]:
+        """Intent scores and the tier that decided them"""
+        start = time.perf_counter()
+
+        if not settings.INTENT_CASCADE_ENABLED:
+            return self._decide("remote", await self._classify_remote(message, labels), start), "remote"
+
+        cache_key = f"{'|'.join(labels)}:{normalize_query(message)}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return self._decide("cache", cached, start, message, labels), "cache"
+
+        scores = self._classify_rules(message, labels)
+        if scores is not None:
+            return self._decide("rules", scores, start, message, labels), "rules"
+
+        scores = await self._classify_local(message, labels)
+        if scores is not None:
+            self.cache.set(cache_key, scores)
+            return self._decide("local", scores, start, message, labels), "local"
+
+        result = await self.llm_client.classify_text(text=message, candidate_labels=labels)
+        scores = dict(zip(result["labels"], result["scores"]))
+        # Keyword and local fallbacks stand in for a failed API call and shouldn't stick
+        if not result.get("fallback"):
+            self.cache.set(cache_key, scores)
+        return self._decide("remote", scores, start), "remote"
+
+    def _decide(
+        self,
+        tier: str,
+        scores: Dict[str, float],
+        start: float,
+        message: str = None,
+        labels: List[str] = None
+    ) -> Dict[str, float]:
+        """Record a decision and maybe schedule a shadow check against the remote classifier"""
+        self.stats[tier]["decisions"] += 1
+        self.latency[tier].observe(time.perf_counter() - start)
+
+        if (
+            message is not None
+            and self.shadow_rate
+            # With the local backend there is no remote classifier to compare against
+            and settings.INTENT_CLASSIFIER_BACKEND != "local"
+            and self._random.random() < self.shadow_rate
+        ):
+            # A fresh context: the check outlives the request and must not inherit its deadline
+            task = contextvars.Context().run(
+                asyncio.ensure_future,
+                self._shadow_check(tier, message, labels, max(scores, key=scores.get))
+            )
+            self._shadow_tasks.add(task)
+            task.add_done_callback(self._shadow_tasks.discard)
+
+        return scores
+
+    def rule_votes(self, message: str) -> Dict[str, int]:
+        """Keyword hits per intent, with entity matches weighted in"""
+        hits = keyword_engine.scan(message)
+        votes = {intent: hits[category] for intent, category in KEYWORD_INTENTS.items()}
+
+        for intent, pattern in ENTITY_PATTERNS.items():
+            if pattern.search(message):
+                votes[intent] += settings.INTENT_CASCADE_ENTITY_WEIGHT
+
+        return votes
+
+    def _classify_rules(self, message: str, labels: List[str]) -> Optional[Dict[str, float]]:
+        """Scores when one intent clearly dominates the rule votes, else None"""
+        votes = sorted(self.rule_votes(message).items(), key=lambda item: item[1], reverse=True)
+        (best_intent, best_votes), (_, runner_up_votes) = votes[0], votes[1]
+
+        if (
+            best_intent not in labels
+            or best_votes < settings.INTENT_CASCADE_RULE_MIN_VOTES
+            or best_votes - runner_up_votes < settings.INTENT_CASCADE_RULE_MARGIN
+        ):
+            return None
+
+        confidence = settings.INTENT_CASCADE_RULE_CONFIDENCE
+        remainder = (1.0 - confidence) / max(len(labels) - 1, 1)
+        return {label: confidence if label == best_intent else remainder for label in labels}
+
+    async def _classify_local(self, message: str, labels: List[str]) -> Optional[Dict[str, float]]:
+        """Embedding classifier scores when confident, else None"""
+        local_classifier = getattr(self.llm_client, "local_classifier", None)
+        # With the local backend the "remote" tier already is this classifier
+        if local_classifier is None or settings.INTENT_CLASSIFIER_BACKEND == "local":
+            return None
+
+        try:
+            result = (await local_classifier.aclassify_batch([message], labels))[0]
+        except Exception as e:
+            logger.warning(f"Local intent classification failed: {e}")
+            return None
+
+        scores = dict(zip(result["labels"], result["scores"]))
+        if max(scores.values()) < settings.INTENT_CASCADE_LOCAL_THRESHOLD:
+            return None
+        return scores
+
+    async def _classify_remote(self, message: str, labels: List[str]) -> Dict[str, float]:
+        result = await self.llm_client.classify_text(text=message, candidate_labels=labels)
+        return dict(zip(result["labels"], result["scores"]))
+
+    async def _shadow_check(self, tier: str, message: str, labels: List[str], decided_intent: str):
+        """Compare a fast-path decision with what the remote classifier would have said"""
+        try:
+            result = await self.llm_client.classify_text(text=message, candidate_labels=labels)
+            # A degraded answer (circuit open, keyword or local fallback) says nothing about the remote tier
+            if result.get("fallback"):
+                return
+            remote_scores = dict(zip(result["labels"], result["scores"]))
+            remote_intent = max(remote_scores, key=remote_scores.get)
+            self.stats[tier]["shadow_checks"] += 1
+            self.stats[tier]["shadow_agreements"] += remote_intent == decided_intent
+            if remote_intent != decided_intent:
+                logger.info(f"Intent {tier} tier disagreed with remote: {decided_intent} vs {remote_intent}")
+        except Exception as e:
+            logger.warning(f"Intent shadow check failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tier decisions, hit rate, latency and agreement with the remote classifier"""
+        total = sum(tier_stats["decisions"] for tier_stats in self.stats.values())
+
+        tiers = {}
+        for tier, tier_stats in self.stats.items():
+            checks = tier_stats["shadow_checks"]
+            tiers[tier] = {
+                **tier_stats,
+                "hit_rate": round(tier_stats["decisions"] / total, 3) if total else 0.0,
+                "accuracy": round(tier_stats["shadow_agreements"] / checks, 3) if checks else None,
+                "latency": self.latency[tier].snapshot()
+            }
+
+        return {
+            "enabled": settings.INTENT_CASCADE_ENABLED,
+            "decisions": total,
+            "remote_calls_avoided": total - self.stats["remote"]["decisions"],
+            "shadow_rate": self.shadow_rate,
+            "thresholds": {
+                "rule_min_votes": settings.INTENT_CASCADE_RULE_MIN_VOTES,
+                "rule_margin": settings.INTENT_CASCADE_RULE_MARGIN,
+                "entity_weight": settings.INTENT_CASCADE_ENTITY_WEIGHT,
+                "local_threshold": settings.INTENT_CASCADE_LOCAL_THRESHOLD
+            },
+            "tiers": tiers,
+            "cache": self.cache.get_stats()
+        }
+
+    def close(self):
+        """Cancel shadow checks still waiting on the remote classifier"""
+        for task in list(self._shadow_tasks):
+            task.cancel()
@@ -0,0 +1,125 @@
+"""
+Local Cache
+
+Bounded in-process LRU cache with per-prefix TTLs, used as the L1 tier in
+front of Redis. Values are stored already deserialized so hot keys skip both
+the network round-trip and json.loads.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class LocalCache:
+    """LRU cache with expiry, sized by entry count"""
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        prefix_ttls: Dict[str, int] = None,
+        default_ttl: int = 60,
+        on_evict: Optional[Callable[[str], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.prefix_ttls = prefix_ttls or {}
+        self.default_ttl = default_ttl
+        self.on_evict = on_evict
+        # key -> (value, expires_at), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+    def ttl_for(self, key: str) -> int:
+        """TTL configured for the longest matching key prefix"""
+        matches = [prefix for prefix in self.prefix_ttls if key.startswith(prefix)]
+        if not matches:
+            return self.default_ttl
+        return self.prefix_ttls[max(matches, key=len)]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live value or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: int = None):
+        """Store a value; ttl is capped by the prefix TTL"""
+        local_ttl = self.ttl_for(key)
+        if ttl is not None:
+            local_ttl = min(local_ttl, ttl)
+        if local_ttl <= 0:
+            return
+
+        self._entries[key] = (value, time.monotonic() + local_ttl)
+        self._entries.move_to_end(key)
+        self.stats["sets"] += 1
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+            if self.on_evict:
+                self.on_evict(evicted_key)
+
+    def delete(self, key: str) -> bool:
+        """Remove a single key"""
+        if self._entries.pop(key, None) is not None:
+            self.stats["invalidations"] += 1
+            return True
+        return False
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with prefix"""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        self.stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def purge_expired(self) -> int:
+        """Remove every entry past its TTL"""
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+        self.stats["expirations"] += len(expired)
+        return len(expired)
+
+    def clear(self):
+        """Remove everything"""
+        self.stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and occupancy"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries
+        }
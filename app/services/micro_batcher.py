@@ -0,0 +1,140 @@
+"""
+Micro-Batcher
+
+Collects concurrent single-item requests for a short window (or until a
+maximum batch size is reached), runs one batched call and fans the results
+back out to the waiting callers.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.deadlines import current_deadline, shared_deadline
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+class MicroBatcher:
+    """Asyncio micro-batching scheduler with per-batch metrics"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+        history_size: int = 1000
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+
+        # (item, future, enqueued at, caller's deadline)
+        self._pending: List[Tuple[Any, asyncio.Future, float, Optional[float]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.stats = {
+            "batches": 0,
+            "items": 0,
+            "failed_batches": 0,
+            "max_batch_size_seen": 0
+        }
+        # (batch size, max wait seconds, inference seconds) for recent batches
+        self._history: Deque[Tuple[int, float, float]] = deque(maxlen=history_size)
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter(), current_deadline()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Dispatch pending items as one or more batches"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future, float, Optional[float]]]):
+        """Run the batch function and resolve every waiting future"""
+        started = time.perf_counter()
+        max_wait = max(started - enqueued for _, _, enqueued, _ in batch)
+        items = [item for item, _, _, _ in batch]
+
+        try:
+            # The task runs in whichever caller's context flushed it; give the batch
+            # the latest member's deadline instead of that one caller's
+            with shared_deadline(deadline for _, _, _, deadline in batch):
+                results = await self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name}: batch function returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            logger.error(f"{self.name} batch of {len(items)} failed: {e}")
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            # Cancelled (e.g. on shutdown): don't leave the callers waiting forever
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.cancel()
+            raise
+        finally:
+            inference_time = time.perf_counter() - started
+            self.stats["batches"] += 1
+            self.stats["items"] += len(items)
+            self.stats["max_batch_size_seen"] = max(self.stats["max_batch_size_seen"], len(items))
+            self._history.append((len(items), max_wait, inference_time))
+
+        for (_, future, _, _), result in zip(batch, results):
+            # Callers may have been cancelled while the batch was running
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch size, queueing delay and inference time over recent batches"""
+        history = list(self._history)
+        sizes = [size for size, _, _ in history]
+        waits = [wait for _, wait, _ in history]
+        inference = [duration for _, _, duration in history]
+
+        def _avg(values: List[float]) -> float:
+            return sum(values) / len(values) if values else 0.0
+
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "window_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "recent": {
+                "batches": len(history),
+                "avg_batch_size": round(_avg(sizes), 2),
+                "avg_wait_ms": round(_avg(waits) * 1000, 2),
+                "max_wait_ms": round(max(waits, default=0.0) * 1000, 2),
+                "avg_inference_ms": round(_avg(inference) * 1000, 2),
+                "max_inference_ms": round(max(inference, default=0.0) * 1000, 2)
+            }
+        }
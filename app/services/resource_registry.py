@@ -0,0 +1,290 @@
+"""
+Resource Registry
+
+Process-wide owner of the heavyweight shared resources: the embeddings model,
+the LangChain LLM client, the intent cascade, the conversation memory, the
+ChromaDB client, the Redis connection pool, the LangGraph checkpointer, the
+single-flight table and the inference HTTP connection pool.
+Agents receive these by injection instead of building their own copies.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import psutil
+import redis.asyncio as redis
+from langchain.embeddings import HuggingFaceEmbeddings
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+from transformers import AutoTokenizer, PreTrainedTokenizerBase
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.database.chroma_client import ChromaClient
+from app.database.redis_checkpointer import RedisCheckpointSaver
+from app.database.redis_client import RedisClient
+from app.services.context_builder import ContextBuilder
+from app.services.conversation_memory import ConversationMemoryStore
+from app.services.http_client import PooledHTTPClient
+from app.services.huggingface_client import LangChainHuggingFaceClient
+from app.services.intent_router import IntentCascade
+from app.services.semantic_cache import SemanticCache
+from app.services.single_flight import SingleFlight
+
+logger = get_logger(__name__)
+
+class ResourceRegistry:
+    """Lazily loads shared resources once per process and tracks their cost"""
+
+    def __init__(self):
+        self._resources: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._process = psutil.Process(os.getpid())
+        # [seconds, bytes] spent on nested loads, one frame per load in progress
+        self._loading: List[List[float]] = []
+
+    def _get_or_load(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return a cached resource, loading it on first access"""
+        if name in self._resources:
+            return self._resources[name]
+
+        with self._lock:
+            if name in self._resources:
+                return self._resources[name]
+
+            rss_before = self._process.memory_info().rss
+            start_time = time.perf_counter()
+            nested = [0.0, 0]
+            self._loading.append(nested)
+
+            try:
+                resource = factory()
+            except Exception as e:
+                logger.error(f"Failed to load shared resource '{name}': {e}")
+                self._stats[name] = {
+                    "status": "failed",
+                    "error": str(e),
+                    "load_time_seconds": round(time.perf_counter() - start_time - nested[0], 3)
+                }
+                raise
+            finally:
+                self._loading.pop()
+                total_time = time.perf_counter() - start_time
+                total_bytes = self._process.memory_info().rss - rss_before
+                # The enclosing load only pays for what it loaded itself
+                if self._loading:
+                    self._loading[-1][0] += total_time
+                    self._loading[-1][1] += total_bytes
+
+            load_time = total_time - nested[0]
+            memory_mb = (total_bytes - nested[1]) / 1024 / 1024
+
+            self._resources[name] = resource
+            self._stats[name] = {
+                "status": "loaded",
+                "load_time_seconds": round(load_time, 3),
+                "memory_mb": round(memory_mb, 1),
+                "loaded_at": datetime.now().isoformat()
+            }
+
+            logger.info(f"Loaded shared resource '{name}' in {load_time:.2f}s (+{memory_mb:.1f} MB RSS)")
+            return resource
+
+    def get_loaded(self, name: str) -> Optional[Any]:
+        """A resource something already loaded, without loading it"""
+        return self._resources.get(name)
+
+    def get_embeddings(self) -> HuggingFaceEmbeddings:
+        """Shared sentence-transformers embeddings model"""
+        return self._get_or_load(
+            "embeddings",
+            lambda: HuggingFaceEmbeddings(
+                model_name=settings.EMBEDDINGS_MODEL,
+                model_kwargs={'device': 'cpu'}
+            )
+        )
+
+    def get_chroma_client(self) -> ChromaClient:
+        """Shared ChromaDB client"""
+        return self._get_or_load("chroma_client", ChromaClient)
+
+    def get_redis_pool(self) -> redis.ConnectionPool:
+        """Shared Redis connection pool"""
+        return self._get_or_load(
+            "redis_pool",
+            lambda: redis.ConnectionPool.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS
+            )
+        )
+
+    def get_redis_client(self) -> RedisClient:
+        """Shared Redis client backed by the shared pool"""
+        return self._get_or_load(
+            "redis_client",
+            lambda: RedisClient(connection_pool=self.get_redis_pool())
+        )
+
+    def get_checkpointer(self) -> BaseCheckpointSaver:
+        """LangGraph checkpointer; Redis keeps workflow state shared across workers"""
+        if settings.CHECKPOINT_BACKEND == "redis":
+            return self._get_or_load("checkpointer", RedisCheckpointSaver)
+        return self._get_or_load("checkpointer", MemorySaver)
+
+    def get_http_client(self) -> PooledHTTPClient:
+        """Shared keep-alive HTTP pool for inference API calls"""
+        return self._get_or_load("http_client", PooledHTTPClient)
+
+    def get_llm_client(self) -> LangChainHuggingFaceClient:
+        """Shared LangChain client wired to the shared embeddings, Chroma and HTTP clients"""
+        return self._get_or_load(
+            "llm_client",
+            lambda: LangChainHuggingFaceClient(
+                embeddings=self._get_optional_embeddings(),
+                chroma_client=self.get_chroma_client(),
+                http_client=self.get_http_client(),
+                conversation_memory=self.get_conversation_memory(),
+                context_builder=self.get_context_builder()
+            )
+        )
+
+    def get_tokenizer(self) -> PreTrainedTokenizerBase:
+        """Tokenizer of the generation model, for prompt budgeting"""
+        return self._get_or_load(
+            "tokenizer",
+            lambda: AutoTokenizer.from_pretrained(settings.CONTEXT_TOKENIZER_MODEL or settings.GENERATION_MODEL)
+        )
+
+    def get_context_builder(self) -> ContextBuilder:
+        """Shared token-budgeted context builder"""
+        return self._get_or_load(
+            "context_builder",
+            lambda: ContextBuilder(tokenizer=self._resources.get("tokenizer"))
+        )
+
+    async def load_tokenizer(self):
+        """Load the tokenizer in a worker thread and hand it to the context builder
+
+        Called at startup; until it finishes (or if it fails) token counts are estimated.
+        """
+        tokenizer = await asyncio.to_thread(self._get_optional_tokenizer)
+        if tokenizer is None:
+            logger.warning("Tokenizer unavailable, prompt token counts will be estimated")
+            return
+        self.get_context_builder().set_tokenizer(tokenizer)
+
+    def get_conversation_memory(self) -> ConversationMemoryStore:
+        """Shared per-conversation history windows, reloaded from Redis after eviction"""
+        return self._get_or_load(
+            "conversation_memory",
+            lambda: ConversationMemoryStore(redis_client=self.get_redis_client())
+        )
+
+    def get_intent_router(self) -> IntentCascade:
+        """Shared intent cascade in front of the LLM client's classifier"""
+        return self._get_or_load(
+            "intent_router",
+            lambda: IntentCascade(self.get_llm_client())
+        )
+
+    def get_semantic_cache(self) -> SemanticCache:
+        """Shared semantic response cache built on the shared embeddings model"""
+        return self._get_or_load(
+            "semantic_cache",
+            lambda: SemanticCache(self.get_embeddings())
+        )
+
+    def get_single_flight(self) -> SingleFlight:
+        """Shared table of in-flight requests, so duplicates across orchestrators coalesce"""
+        return self._get_or_load(
+            "single_flight",
+            lambda: SingleFlight(redis_client=self.get_redis_client())
+        )
+
+    def _get_optional_embeddings(self) -> Optional[HuggingFaceEmbeddings]:
+        """Embeddings for the LLM client; the client still works without them"""
+        try:
+            return self.get_embeddings()
+        except Exception:
+            return None
+
+    def _get_optional_tokenizer(self) -> Optional[PreTrainedTokenizerBase]:
+        """Tokenizer for the context builder, which falls back to an estimate without it"""
+        try:
+            return self.get_tokenizer()
+        except Exception:
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Load time and memory footprint per resource"""
+        http_client = self._resources.get("http_client")
+        chroma_client = self._resources.get("chroma_client")
+        conversation_memory = self._resources.get("conversation_memory")
+        checkpointer = self._resources.get("checkpointer")
+        context_builder = self._resources.get("context_builder")
+        single_flight = self._resources.get("single_flight")
+        
+        return {
+            "resources": dict(self._stats),
+            "http_pool": http_client.get_stats() if http_client else {},
+            "chroma_pool": chroma_client.get_stats() if chroma_client else {},
+            "conversation_memory": conversation_memory.get_stats() if conversation_memory else {},
+            "checkpointer": checkpointer.get_stats() if isinstance(checkpointer, RedisCheckpointSaver) else {},
+            "prompt_context": context_builder.get_stats() if context_builder else {},
+            "single_flight": single_flight.get_stats() if single_flight else {},
+            "total_load_time_seconds": round(
+                sum(stat.get("load_time_seconds", 0) for stat in self._stats.values()), 3
+            ),
+            "total_memory_mb": round(
+                sum(stat.get("memory_mb", 0) for stat in self._stats.values()), 1
+            ),
+            "process_rss_mb": round(self._process.memory_info().rss / 1024 / 1024, 1)
+        }
+
+    async def aclose(self):
+        """Release network resources held by the registry"""
+        http_client = self._resources.get("http_client")
+        if http_client is not None:
+            try:
+                await http_client.aclose()
+            except Exception as e:
+                logger.error(f"Failed to close HTTP client: {e}")
+        
+        intent_router = self._resources.get("intent_router")
+        if intent_router is not None:
+            intent_router.close()
+        
+        chroma_client = self._resources.get("chroma_client")
+        if chroma_client is not None:
+            chroma_client.close()
+        
+        redis_client = self._resources.get("redis_client")
+        if redis_client is not None:
+            try:
+                await redis_client.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush queued Redis writes: {e}")
+        
+        checkpointer = self._resources.get("checkpointer")
+        if isinstance(checkpointer, RedisCheckpointSaver):
+            try:
+                await checkpointer.aclose()
+            except Exception as e:
+                logger.error(f"Failed to close checkpointer: {e}")
+        
+        pool = self._resources.get("redis_pool")
+        if pool is not None:
+            try:
+                await pool.disconnect()
+            except Exception as e:
+                logger.error(f"Failed to close Redis pool: {e}")
+
+# Global registry instance
+resource_registry = ResourceRegistry()
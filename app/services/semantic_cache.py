@@ -0,0 +1,215 @@
+"""
+Semantic Response Cache
+
+In-process nearest-neighbour cache of agent responses keyed by query
+embedding, so paraphrases of the same question ("what's the price of
+premium?" / "how much is premium plan") share one entry. Each agent has a
+fixed-capacity float32 matrix of normalized query vectors with LRU and TTL
+eviction, which bounds memory at capacity x embedding dimension per agent.
+"""
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Tokens that change the answer even when the wording is similar (order IDs, codes, emails)
+ENTITY_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+|\b\w*\d\w*\b")
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return " ".join(query.lower().split()).rstrip(" ?!.")
+
+def extract_entity_key(query: str) -> str:
+    """Entities that must match exactly for a cached response to be reused"""
+    return "|".join(sorted(set(ENTITY_PATTERN.findall(query.lower()))))
+
+class _AgentIndex:
+    """Fixed-capacity vector index for one agent"""
+
+    def __init__(self, capacity: int, dimension: int):
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.entity_keys = [""] * capacity
+        # slot -> entry, ordered from least to most recently used
+        self.entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.free_slots = list(range(capacity - 1, -1, -1))
+
+    def release(self, slot: int):
+        self.valid[slot] = False
+        self.entries.pop(slot, None)
+        self.free_slots.append(slot)
+
+class SemanticCache:
+    """Per-agent embedding similarity cache with TTL/LRU eviction and hit metrics"""
+
+    def __init__(
+        self,
+        embeddings,
+        similarity_threshold: float = None,
+        near_miss_threshold: float = None,
+        max_entries_per_agent: int = None,
+        ttl: int = None
+    ):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold or settings.SEMANTIC_CACHE_THRESHOLD
+        self.near_miss_threshold = near_miss_threshold or settings.SEMANTIC_CACHE_NEAR_MISS_THRESHOLD
+        self.max_entries_per_agent = max_entries_per_agent or settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.SEMANTIC_CACHE_TTL
+
+        self._indexes: Dict[str, _AgentIndex] = {}
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-cache")
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "near_misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+    async def _embed(self, query: str) -> np.ndarray:
+        """Normalized query vector, memoized for the lookup/store pair of a request"""
+        key = normalize_query(query)
+        if key in self._query_vectors:
+            self._query_vectors.move_to_end(key)
+            return self._query_vectors[key]
+
+        loop = asyncio.get_running_loop()
+        vector = np.asarray(
+            await loop.run_in_executor(self._executor, self.embeddings.embed_query, key),
+            dtype=np.float32
+        )
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+
+        self._query_vectors[key] = vector
+        if len(self._query_vectors) > 256:
+            self._query_vectors.popitem(last=False)
+
+        return vector
+
+    def _get_index(self, agent_name: str, dimension: int) -> _AgentIndex:
+        if agent_name not in self._indexes:
+            self._indexes[agent_name] = _AgentIndex(self.max_entries_per_agent, dimension)
+        return self._indexes[agent_name]
+
+    def _nearest(self, index: _AgentIndex, vector: np.ndarray, entity_key: str) -> Tuple[Optional[int], float]:
+        """Best matching live slot with the same entity key"""
+        candidates = index.valid & np.array([key == entity_key for key in index.entity_keys])
+        if not candidates.any():
+            return None, 0.0
+
+        similarities = np.where(candidates, index.vectors @ vector, -1.0)
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    async def lookup(self, agent_name: str, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a semantically equivalent query, if any"""
+        try:
+            vector = await self._embed(query)
+            index = self._get_index(agent_name, vector.shape[0])
+            entity_key = extract_entity_key(query)
+            slot, similarity = self._nearest(index, vector, entity_key)
+
+            # Expired matches are released until the best remaining one is live
+            now = time.time()
+            while slot is not None and index.entries[slot]["expires_at"] < now:
+                index.release(slot)
+                self.stats["expirations"] += 1
+                slot, similarity = self._nearest(index, vector, entity_key)
+
+            if slot is not None and similarity >= self.similarity_threshold:
+                index.entries.move_to_end(slot)
+                self.stats["hits"] += 1
+                logger.info(f"Semantic cache hit for {agent_name} (similarity: {similarity:.3f})")
+                return {
+                    **index.entries[slot]["response"],
+                    "cache_similarity": similarity
+                }
+
+            if slot is not None and similarity >= self.near_miss_threshold:
+                self.stats["near_misses"] += 1
+            else:
+                self.stats["misses"] += 1
+            return None
+
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed: {e}")
+            return None
+
+    async def store(self, agent_name: str, query: str, response: Dict[str, Any], ttl: int = None) -> bool:
+        """Cache a response, replacing an equivalent entry or evicting the least recently used one"""
+        try:
+            vector = await self._embed(query)
+            index = self._get_index(agent_name, vector.shape[0])
+            entity_key = extract_entity_key(query)
+
+            slot, similarity = self._nearest(index, vector, entity_key)
+            if slot is None or similarity < self.similarity_threshold:
+                if not index.free_slots:
+                    lru_slot = next(iter(index.entries))
+                    index.release(lru_slot)
+                    self.stats["evictions"] += 1
+                slot = index.free_slots.pop()
+
+            index.vectors[slot] = vector
+            index.valid[slot] = True
+            index.entity_keys[slot] = entity_key
+            index.entries[slot] = {
+                "query": query,
+                "response": response,
+                "expires_at": time.time() + (ttl or self.ttl)
+            }
+            index.entries.move_to_end(slot)
+
+            self.stats["stores"] += 1
+            return True
+
+        except Exception as e:
+            logger.error(f"Semantic cache store failed: {e}")
+            return False
+
+    def discard(self, cache_keys: List[str]) -> int:
+        """Drop the entries stored for these exact-cache keys"""
+        cache_keys = set(cache_keys)
+        removed = 0
+        for index in self._indexes.values():
+            for slot in [slot for slot, entry in index.entries.items() if entry["response"].get("cache_key") in cache_keys]:
+                index.release(slot)
+                removed += 1
+        return removed
+
+    def clear(self, agent_name: str = None):
+        """Drop cached entries for one agent or all agents"""
+        if agent_name:
+            self._indexes.pop(agent_name, None)
+        else:
+            self._indexes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/near-miss counters and memory footprint"""
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["near_misses"]
+
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "similarity_threshold": self.similarity_threshold,
+            "near_miss_threshold": self.near_miss_threshold,
+            "entries": {agent: len(index.entries) for agent, index in self._indexes.items()},
+            "max_entries_per_agent": self.max_entries_per_agent,
+            "memory_mb": round(
+                sum(index.vectors.nbytes for index in self._indexes.values()) / 1024 / 1024, 2
+            )
+        }
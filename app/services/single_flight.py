@@ -0,0 +1,191 @@
+"""
+Single-Flight Coalescing
+
+Identical requests that arrive while one is already being answered wait for
+that answer instead of running their own workflow. In-process duplicates
+share one task; with distributed mode on, a short Redis lock elects one
+worker per key and the others poll for the result it publishes (the
+response cache), running the work themselves only if it never appears.
+
+The shared execution belongs to no single request: it streams to nobody and
+sees no conversation history (callers that stream tokens don't coalesce),
+and waiters give up on it after a bounded wait.
+"""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.database.redis_client import RedisClient
+from app.services.conversation_memory import bind_conversation
+from app.services.streaming import bind_sink
+
+logger = get_logger(__name__)
+
+# Delete the lock only if this worker still holds it
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one execution"""
+
+    def __init__(
+        self,
+        redis_client: Optional[RedisClient] = None,
+        distributed: bool = None,
+        lock_ttl: float = None,
+        wait_timeout: float = None,
+        poll_interval: float = None
+    ):
+        self.redis_client = redis_client
+        self.distributed = settings.SINGLE_FLIGHT_DISTRIBUTED if distributed is None else distributed
+        self.lock_ttl = lock_ttl or settings.SINGLE_FLIGHT_LOCK_TTL
+        self.wait_timeout = wait_timeout or settings.SINGLE_FLIGHT_WAIT_SECONDS
+        self.poll_interval = poll_interval or settings.SINGLE_FLIGHT_POLL_INTERVAL_MS / 1000
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "leaders": 0,
+            "coalesced_local": 0,
+            "coalesced_remote": 0,
+            "local_wait_timeouts": 0,
+            "remote_wait_timeouts": 0,
+            "lock_errors": 0
+        }
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"singleflight:{hashlib.sha1(key.encode()).hexdigest()}"
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        remote_result: Optional[Callable[[], Awaitable[Optional[Any]]]] = None
+    ) -> Tuple[Any, bool]:
+        """Result of fn() for this key and whether it was shared from another request
+
+        remote_result looks up what another worker's execution published; it
+        is only used in distributed mode.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            try:
+                result, _ = await asyncio.wait_for(asyncio.shield(task), self.wait_timeout)
+                self.stats["coalesced_local"] += 1
+                return result, True
+            except asyncio.TimeoutError:
+                # The shared run is stuck; stop sending new duplicates to it and answer ourselves
+                self.stats["local_wait_timeouts"] += 1
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+                logger.warning(f"Single-flight wait timed out after {self.wait_timeout}s, running locally")
+                return await fn(), False
+
+        # A separate task, so a cancelled leader doesn't cancel everyone waiting on it
+        task = asyncio.ensure_future(self._lead(key, fn, remote_result))
+        self._inflight[key] = task
+
+        def forget(done: asyncio.Task):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    async def _lead(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        remote_result: Optional[Callable[[], Awaitable[Optional[Any]]]]
+    ) -> Tuple[Any, bool]:
+        # The task copied the first caller's context; detach it from that request's
+        # stream (which may have no reader left) and from its conversation history
+        with bind_sink(None), bind_conversation(None):
+            return await self._execute(key, fn, remote_result)
+
+    async def _execute(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        remote_result: Optional[Callable[[], Awaitable[Optional[Any]]]]
+    ) -> Tuple[Any, bool]:
+        token = None
+        if self.distributed and self.redis_client is not None:
+            token = await self._acquire(key)
+            if token is None and remote_result is not None:
+                result = await self._wait_for_remote(key, remote_result)
+                if result is not None:
+                    self.stats["coalesced_remote"] += 1
+                    return result, True
+
+        self.stats["leaders"] += 1
+        try:
+            return await fn(), False
+        finally:
+            if token:
+                await self._release(key, token)
+
+    async def _acquire(self, key: str) -> Optional[str]:
+        """Lock token, None if another worker holds the key, "" if Redis is unavailable"""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis_client.redis.set(
+                self._lock_key(key), token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+            return token if acquired else None
+        except Exception as e:
+            # Coalescing across workers is an optimisation; run locally without it
+            self.stats["lock_errors"] += 1
+            logger.error(f"Single-flight lock error: {e}")
+            return ""
+
+    async def _release(self, key: str, token: str):
+        try:
+            await self.redis_client.redis.eval(RELEASE_SCRIPT, 1, self._lock_key(key), token)
+        except Exception as e:
+            self.stats["lock_errors"] += 1
+            logger.error(f"Single-flight unlock error: {e}")
+
+    async def _wait_for_remote(
+        self,
+        key: str,
+        remote_result: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """Poll for the holder's result until it appears, the lock is gone or the wait times out"""
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                result = await remote_result()
+                if result is not None:
+                    return result
+                if not await self.redis_client.redis.exists(self._lock_key(key)):
+                    # The holder finished without publishing (e.g. a fallback answer)
+                    return None
+            self.stats["remote_wait_timeouts"] += 1
+        except Exception as e:
+            self.stats["lock_errors"] += 1
+            logger.error(f"Single-flight wait error: {e}")
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Executions, coalesced requests and keys currently in flight"""
+        coalesced = self.stats["coalesced_local"] + self.stats["coalesced_remote"]
+        return {
+            **self.stats,
+            "coalesced": coalesced,
+            "coalesced_rate": round(coalesced / max(coalesced + self.stats["leaders"], 1), 3),
+            "in_flight": len(self._inflight),
+            "distributed": self.distributed
+        }
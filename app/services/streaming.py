@@ -0,0 +1,75 @@
+"""
+Response Streaming
+
+Per-request event channel between the LangGraph workflow and the streaming
+chat endpoints. The endpoint binds a StreamSink to a context variable; the
+workflow nodes and the LLM client publish events into it only when one is
+bound, so the regular request/response path is unaffected.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_current_sink: ContextVar[Optional["StreamSink"]] = ContextVar("stream_sink", default=None)
+
+class StreamSink:
+    """Bounded event queue; producers wait when the client falls behind"""
+
+    def __init__(self, max_buffered_events: int = None):
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=max_buffered_events or settings.STREAM_MAX_BUFFERED_EVENTS
+        )
+        self.tokens_emitted = 0
+
+    async def emit(self, event: str, data: Dict[str, Any]):
+        """Queue an event, waiting for the consumer if the buffer is full"""
+        if event == "token":
+            self.tokens_emitted += 1
+        await self._queue.put({"event": event, "data": data})
+
+    async def close(self):
+        """Signal the end of the stream"""
+        await self._queue.put(None)
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield events until the stream is closed"""
+        while True:
+            event = await self._queue.get()
+            if event is None:
+                return
+            yield event
+
+@contextmanager
+def bind_sink(sink: StreamSink) -> Iterator[StreamSink]:
+    """Route events emitted in this context (and tasks it spawns) to sink"""
+    token = _current_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _current_sink.reset(token)
+
+def current_sink() -> Optional[StreamSink]:
+    """Sink bound to the current request, if it is streaming"""
+    return _current_sink.get()
+
+async def emit_event(event: str, data: Dict[str, Any]):
+    """Publish a workflow event if the current request is streaming"""
+    sink = _current_sink.get()
+    if sink is not None:
+        await sink.emit(event, data)
+
+async def emit_full_response(text: str):
+    """Send a complete response as one token when nothing was streamed (cache hits, templates, fallbacks)"""
+    sink = _current_sink.get()
+    if sink is not None and not sink.tokens_emitted and text:
+        await sink.emit("token", {"text": text})
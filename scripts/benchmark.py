@@ -0,0 +1,391 @@
+"""
+Benchmark Script
+
+Latency and accuracy benchmarks for performance-sensitive components.
+
+Usage:
+    python scripts/benchmark.py intent [--rounds N]
+    python scripts/benchmark.py batching [--users N]
+    python scripts/benchmark.py chroma [--queries N] [--concurrency N]
+    python scripts/benchmark.py chroma-batch [--users N [N ...]]
+    python scripts/benchmark.py retrieval [--rounds N] [--k N]
+    python scripts/benchmark.py keywords [--sizes N [N ...]] [--rounds N]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.logger import get_logger, setup_logging
+
+setup_logging()
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+TEST_CONVERSATIONS = PROJECT_ROOT / "data" / "sample_data" / "test_conversations.json"
+
+def load_labelled_messages() -> List[Tuple[str, str]]:
+    """(first user message, expected agent) pairs from the sample conversations"""
+    with open(TEST_CONVERSATIONS, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    samples = []
+    for scenario in data.get("test_scenarios", []):
+        messages = scenario.get("conversation", {}).get("messages", [])
+        user_messages = [m["content"] for m in messages if m.get("role") == "user"]
+        if user_messages:
+            samples.append((user_messages[0], scenario["expected_agent"]))
+
+    return samples
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/mean in milliseconds"""
+    if not latencies:
+        return {}
+
+    ordered = sorted(latencies)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[p95_index] * 1000, 2),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2)
+    }
+
+def print_report(title: str, results: Dict[str, Any]):
+    """Print benchmark results"""
+    print(f"\n📊 {title}")
+    print("=" * 50)
+    print(json.dumps(results, indent=2))
+
+async def benchmark_intent(rounds: int):
+    """Remote BART vs local embedding classifier on the sample conversations"""
+    from app.agents.orchestrator import INTENT_AGENT_MAPPING
+    from app.agents.router_agent import RouterAgent
+    from app.services.resource_registry import resource_registry
+
+    client = resource_registry.get_llm_client()
+    labels = RouterAgent.INTENT_LABELS
+    samples = load_labelled_messages()
+
+    backends: Dict[str, Callable] = {"remote": client._classify_with_api}
+    if client.local_classifier:
+        backends["local"] = client.local_classifier.aclassify_batch
+    else:
+        print("⚠️  Local classifier unavailable (embeddings model failed to load)")
+
+    report = {}
+    for backend_name, classify in backends.items():
+        latencies, correct, errors = [], 0, 0
+
+        for _ in range(rounds):
+            for message, expected_agent in samples:
+                start = time.perf_counter()
+                try:
+                    result = (await classify([message], labels))[0]
+                except Exception as e:
+                    errors += 1
+                    logger.warning(f"{backend_name} classification failed: {e}")
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+                predicted_agent = INTENT_AGENT_MAPPING.get(result["labels"][0], "ProductAgent")
+                correct += predicted_agent == expected_agent
+
+        completed = len(latencies)
+        report[backend_name] = {
+            "samples": completed,
+            "errors": errors,
+            "accuracy": round(correct / completed, 3) if completed else None,
+            **summarize_latencies(latencies)
+        }
+
+    print_report("Intent classification: remote vs local", report)
+    await resource_registry.aclose()
+
+async def benchmark_batching(users: int):
+    """Concurrent classify_text calls through the micro-batcher"""
+    from app.agents.router_agent import RouterAgent
+    from app.services.resource_registry import resource_registry
+
+    client = resource_registry.get_llm_client()
+    labels = RouterAgent.INTENT_LABELS
+    messages = [message for message, _ in load_labelled_messages()]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client.classify_text(messages[i % len(messages)], labels)
+        for i in range(users)
+    ])
+    elapsed = time.perf_counter() - start
+
+    print_report(f"Intent classification: {users} concurrent users", {
+        "wall_time_ms": round(elapsed * 1000, 2),
+        **client.get_classification_stats()
+    })
+    await resource_registry.aclose()
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> List[float]:
+    """How late the event loop wakes a sleeping coroutine (seconds, per tick)"""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(time.perf_counter() - start - interval, 0.0))
+    return lags
+
+async def benchmark_chroma(queries: int, concurrency: int):
+    """Event-loop lag while Chroma queries run inline vs on the query pool"""
+    from app.database.chroma_client import ChromaClient
+
+    client = ChromaClient()
+    messages = [message for message, _ in load_labelled_messages()]
+    workload = [messages[i % len(messages)] for i in range(queries)]
+
+    async def inline_query(query: str):
+        # Previous behaviour: the synchronous query ran directly on the event loop
+        client.products_collection.query(query_texts=[query], n_results=5)
+
+    async def pooled_query(query: str):
+        await client.query(client.products_collection, query, 5)
+
+    report = {}
+    for mode, search in [("inline", inline_query), ("pooled", pooled_query)]:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def run_one(query: str):
+            async with semaphore:
+                start = time.perf_counter()
+                await search(query)
+                latencies.append(time.perf_counter() - start)
+
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_loop_lag(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*[run_one(query) for query in workload])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        lags = await lag_task
+
+        report[mode] = {
+            "wall_time_ms": round(elapsed * 1000, 2),
+            "query": summarize_latencies(latencies),
+            "loop_lag": {
+                **summarize_latencies(lags),
+                "max_ms": round(max(lags, default=0.0) * 1000, 2)
+            }
+        }
+
+    report["pool"] = client.get_stats()
+    client.close()
+    print_report(f"Chroma queries: {queries} queries, concurrency {concurrency}", report)
+
+async def benchmark_chroma_batching(user_counts: List[int]):
+    """Per-query vs coalesced Chroma searches at increasing concurrency"""
+    from app.database.chroma_client import ChromaClient
+
+    messages = [message for message, _ in load_labelled_messages()]
+    report = {}
+
+    for users in user_counts:
+        workload = [messages[i % len(messages)] for i in range(users)]
+        report[f"{users}_users"] = {}
+
+        for mode, batching_enabled in [("per_query", False), ("batched", True)]:
+            # Deep enough queue that the unbatched run measures latency, not rejections
+            client = ChromaClient(batching_enabled=batching_enabled, max_queue_depth=max(users, 100))
+            latencies = []
+
+            async def run_one(query: str):
+                start = time.perf_counter()
+                await client.search_products(query, limit=5)
+                latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*[run_one(query) for query in workload])
+            elapsed = time.perf_counter() - start
+
+            stats = client.get_stats()
+            batches = [batcher["recent"] for batcher in stats["batchers"].values()]
+            report[f"{users}_users"][mode] = {
+                "wall_time_ms": round(elapsed * 1000, 2),
+                "queries_per_second": round(users / elapsed, 1) if elapsed else None,
+                "chroma_calls": stats["completed"],
+                "avg_batch_size": round(users / stats["completed"], 2) if stats["completed"] else None,
+                "avg_batch_query_ms": batches[0]["avg_inference_ms"] if batches else None,
+                "timeouts": stats["timeouts"],
+                **summarize_latencies(latencies)
+            }
+            client.close()
+
+    print_report("Chroma searches: per-query vs coalesced", report)
+
+def benchmark_retrieval(rounds: int, k: int):
+    """Chroma vs the memory-mapped NumPy index: query latency and top-k agreement"""
+    import tempfile
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    from app.database.chroma_client import ChromaClient
+    from app.database.vector_index import NumpyVectorIndex
+
+    client = ChromaClient()
+    messages = [message for message, _ in load_labelled_messages()]
+    embedding_function = DefaultEmbeddingFunction()
+    report = {}
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        for collection in (client.products_collection, client.faqs_collection):
+            documents = NumpyVectorIndex.export_from_collection(collection, index_dir)
+            index = NumpyVectorIndex.load(index_dir, collection.name, embedding_function)
+
+            # Embedding dominates both paths, so time the search on precomputed query vectors too
+            query_embeddings = embedding_function(messages)
+            chroma_latencies, numpy_latencies, search_latencies, overlaps = [], [], [], []
+
+            for _ in range(rounds):
+                for message, query_embedding in zip(messages, query_embeddings):
+                    start = time.perf_counter()
+                    chroma_results = collection.query(query_texts=[message], n_results=k)
+                    chroma_latencies.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    numpy_results = index.query(query_texts=[message], n_results=k)
+                    numpy_latencies.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    collection.query(query_embeddings=[query_embedding], n_results=k)
+                    chroma_search = time.perf_counter() - start
+                    start = time.perf_counter()
+                    index.query(query_embeddings=[query_embedding], n_results=k)
+                    search_latencies.append((chroma_search, time.perf_counter() - start))
+
+                    # The NumPy index is exact, so this is Chroma's HNSW recall against it
+                    expected = set(numpy_results["ids"][0])
+                    overlaps.append(len(expected & set(chroma_results["ids"][0])) / len(expected) if expected else 1.0)
+
+            report[collection.name] = {
+                "documents": documents,
+                "k": k,
+                "chroma": summarize_latencies(chroma_latencies),
+                "numpy": summarize_latencies(numpy_latencies),
+                "search_only": {
+                    "chroma": summarize_latencies([chroma for chroma, _ in search_latencies]),
+                    "numpy": summarize_latencies([numpy_search for _, numpy_search in search_latencies])
+                },
+                "chroma_recall_at_k": round(statistics.mean(overlaps), 3) if overlaps else None
+            }
+
+    client.close()
+    print_report(f"Retrieval: Chroma vs NumPy index ({rounds} rounds)", report)
+
+def benchmark_keywords(sizes: List[int], rounds: int):
+    """Per-keyword substring scans vs one Aho-Corasick pass, for growing keyword sets"""
+    import random
+    from app.core.keywords import KEYWORD_CATEGORIES, KeywordAutomaton
+
+    messages = [message for message, _ in load_labelled_messages()]
+    base_keywords = sorted({keyword for keywords in KEYWORD_CATEGORIES.values() for keyword in keywords})
+    vocabulary = sorted({word.strip(".,?!").lower() for message in messages for word in message.split()})
+    rng = random.Random(0)
+    report = {}
+
+    for size in sizes:
+        # Real keywords plus synthetic phrases from the message vocabulary; half get a
+        # numeric suffix so the set keeps growing with patterns that never match
+        keywords = list(base_keywords)
+        seen = set(keywords)
+        while len(keywords) < size:
+            phrase = " ".join(rng.sample(vocabulary, rng.choice([1, 2])))
+            if phrase in seen or rng.random() < 0.5:
+                phrase = f"{phrase}{len(keywords)}"
+            seen.add(phrase)
+            keywords.append(phrase)
+        categories = {f"category_{i}": keywords[i::8] for i in range(8)}
+
+        def naive_scan(text: str) -> Dict[str, int]:
+            text = text.lower()
+            return {
+                category: sum(1 for keyword in category_keywords if keyword in text)
+                for category, category_keywords in categories.items()
+            }
+
+        build_start = time.perf_counter()
+        automaton = KeywordAutomaton(categories, cache_size=0)
+        build_time = time.perf_counter() - build_start
+
+        timings = {}
+        for mode, scan in [("substring", naive_scan), ("automaton", automaton.scan)]:
+            latencies = []
+            for _ in range(rounds):
+                for message in messages:
+                    start = time.perf_counter()
+                    scan(message)
+                    latencies.append(time.perf_counter() - start)
+            timings[mode] = {
+                **summarize_latencies(latencies),
+                "mean_us": round(statistics.mean(latencies) * 1e6, 2)
+            }
+
+        report[f"{size}_keywords"] = {
+            "automaton_states": len(automaton._goto),
+            "build_ms": round(build_time * 1000, 2),
+            **timings,
+            "speedup": round(timings["substring"]["mean_us"] / timings["automaton"]["mean_us"], 2)
+        }
+
+    print_report(f"Keyword scoring: {len(messages)} messages x {rounds} rounds", report)
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description="Customer Service AI benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    intent_parser = subparsers.add_parser("intent", help="Intent classifier latency and accuracy")
+    intent_parser.add_argument("--rounds", type=int, default=3)
+
+    batching_parser = subparsers.add_parser("batching", help="Micro-batched classification under concurrency")
+    batching_parser.add_argument("--users", type=int, default=50)
+
+    chroma_parser = subparsers.add_parser("chroma", help="Event-loop lag under concurrent vector searches")
+    chroma_parser.add_argument("--queries", type=int, default=200)
+    chroma_parser.add_argument("--concurrency", type=int, default=20)
+
+    chroma_batch_parser = subparsers.add_parser("chroma-batch", help="Throughput of coalesced vector searches")
+    chroma_batch_parser.add_argument("--users", type=int, nargs="+", default=[10, 50, 200])
+
+    retrieval_parser = subparsers.add_parser("retrieval", help="Chroma vs memory-mapped NumPy index")
+    retrieval_parser.add_argument("--rounds", type=int, default=5)
+    retrieval_parser.add_argument("--k", type=int, default=5)
+
+    keywords_parser = subparsers.add_parser("keywords", help="Substring scans vs Aho-Corasick keyword automaton")
+    keywords_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    keywords_parser.add_argument("--rounds", type=int, default=200)
+
+    args = parser.parse_args()
+
+    print("🚀 Customer Service AI Benchmarks")
+
+    if args.benchmark == "intent":
+        asyncio.run(benchmark_intent(args.rounds))
+    elif args.benchmark == "batching":
+        asyncio.run(benchmark_batching(args.users))
+    elif args.benchmark == "chroma":
+        asyncio.run(benchmark_chroma(args.queries, args.concurrency))
+    elif args.benchmark == "chroma-batch":
+        asyncio.run(benchmark_chroma_batching(args.users))
+    elif args.benchmark == "retrieval":
+        benchmark_retrieval(args.rounds, args.k)
+    elif args.benchmark == "keywords":
+        benchmark_keywords(args.sizes, args.rounds)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -224,6 +224,38 @@ class KnowledgeBaseLoader:
         
         return results
     
+    async def export_vector_index(self) -> Dict[str, int]:
+        """Write the memory-mapped NumPy index used by RETRIEVAL_BACKEND=numpy"""
+        try:
+            exported = await self.chroma_client.export_vector_indexes()
+            logger.info(f"Exported vector indexes: {exported}")
+            return exported
+            
+        except Exception as e:
+            logger.error(f"Vector index export failed: {e}")
+            return {}
+    
+    async def invalidate_caches(self) -> Dict[str, int]:
+        """Flush cached responses built from the previous knowledge base"""
+        try:
+            # Imported here so loading still works without the cache stack
+            from app.services.cache_service import cache_service
+        except Exception as e:
+            logger.error(f"Cache service unavailable: {e}")
+            return {}
+        
+        try:
+            removed = await cache_service.invalidate_knowledge_base()
+            logger.info(f"Invalidated stale caches: {removed}")
+            return removed
+            
+        except Exception as e:
+            logger.error(f"Cache invalidation failed: {e}")
+            return {}
+        
+        finally:
+            await cache_service.aclose()
+    
     async def verify_data(self) -> bool:
         """Verify loaded data by testing searches"""
         logger.info("Verifying loaded data...")
@@ -267,6 +299,22 @@ async def main():
     total = sum(results.values())
     print(f"\nTotal: {total} items loaded")
     
+    # Exact in-memory index for the numpy retrieval backend
+    print("\n🧮 Exporting vector index...")
+    exported = await loader.export_vector_index()
+    if exported:
+        print(f"Exported {sum(exported.values())} document vectors")
+    else:
+        print("⚠️  Vector index export failed (see logs)")
+    
+    # Answers cached from the old knowledge base are now stale
+    print("\n🧹 Invalidating cached responses...")
+    removed = await loader.invalidate_caches()
+    if removed:
+        print(f"Removed {sum(removed.values())} cache entries")
+    else:
+        print("⚠️  Cache invalidation failed (see logs)")
+    
     # Verify data
     print("\n🔍 Verifying data...")
     if await loader.verify_data():
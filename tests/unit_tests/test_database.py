@@ -18,4 +18,430 @@ async def test_redis_cache():
     client = RedisClient()
     await client.cache_response("test_key", "test_value", 60)
     cached = await client.get_cached_response("test_key")
-    assert cached == "test_value"
\ No newline at end of file
+    assert cached == "test_value"
+
+class RecordingRedis:
+    def __init__(self):
+        self.transactions = []
+    
+    def pipeline(self, transaction=True):
+        commands = []
+        redis = self
+        
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: commands.append((name, *args))
+            
+            async def execute(self):
+                redis.transactions.append(commands)
+                return []
+        
+        return Pipeline()
+
+
+@pytest.mark.asyncio
+async def test_store_messages_single_round_trip():
+    from app.core.config import settings
+    from app.database.models import Message, MessageType
+    
+    client = RedisClient()
+    client.redis = RecordingRedis()
+    messages = [
+        Message(content="hi", type=MessageType.USER, user_id="u1", conversation_id="c1"),
+        Message(content="hello", type=MessageType.ASSISTANT, user_id="u1", conversation_id="c1")
+    ]
+    
+    await client.store_messages(messages)
+    
+    assert len(client.redis.transactions) == 1
+    commands = client.redis.transactions[0]
+    assert [command[0] for command in commands] == ["lpush", "ltrim", "expire"]
+    assert len(commands[0]) == 4  # both messages in one LPUSH
+    assert commands[1] == ("ltrim", "conversation:c1", 0, settings.CONVERSATION_HISTORY_MAX_MESSAGES - 1)
+    
+    # Background writes coalesce queued batches and are drained by flush()
+    await client.store_messages(messages, background=True)
+    await client.store_messages(messages, background=True)
+    await client.flush()
+    assert len(client.redis.transactions) == 2
+    assert len(client.redis.transactions[1][0]) == 6
+
+
+@pytest.mark.asyncio
+async def test_chroma_query_runs_off_event_loop():
+    import asyncio
+    import threading
+    
+    client = ChromaClient(max_workers=2, query_timeout=0.2, max_queue_depth=1)
+    
+    def slow_query(**kwargs):
+        assert threading.current_thread() is not threading.main_thread()
+        threading.Event().wait(0.5)
+    
+    # A slow query times out without stalling other coroutines
+    ticks = 0
+    async def ticker():
+        nonlocal ticks
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            ticks += 1
+    
+    results = await asyncio.gather(
+        client._run(slow_query),
+        ticker(),
+        return_exceptions=True
+    )
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert ticks == 10
+    assert client.get_stats()["timeouts"] == 1
+    client.close()
+    
+    # Jobs that time out while still queued behind a busy worker don't leak queue depth
+    client = ChromaClient(max_workers=1, query_timeout=0.05, max_queue_depth=5)
+    results = await asyncio.gather(*[client._run(slow_query) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    await asyncio.sleep(0.6)
+    assert client.stats["queued"] == 0
+    assert client.stats["running"] == 0
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_chroma_coalesces_concurrent_searches():
+    class FakeCollection:
+        name = "products"
+        
+        def __init__(self):
+            self.calls = []
+        
+        def query(self, query_texts, n_results):
+            self.calls.append(list(query_texts))
+            return {
+                "ids": [[f"{text}-{i}" for i in range(n_results)] for text in query_texts],
+                "documents": [[f"doc for {text}"] * n_results for text in query_texts],
+                "metadatas": [[{"source": "catalog"}] * n_results for _ in query_texts],
+                "distances": [[0.1] * n_results for _ in query_texts],
+                "embeddings": None
+            }
+    
+    client = ChromaClient(batching_enabled=True, hybrid_search=False)
+    client.products_collection = FakeCollection()
+    
+    results = await client.search_many(["premium", "basic", "enterprise"], limit=2)
+    
+    # One vectorized query, results split back per caller in order
+    assert client.products_collection.calls == [["premium", "basic", "enterprise"]]
+    assert [docs[0]["content"] for docs in results] == ["doc for premium", "doc for basic", "doc for enterprise"]
+    assert all(len(docs) == 2 and docs[0]["source"] == "catalog" for docs in results)
+    assert client.get_stats()["batchers"]["chroma[products,k=2]"]["items"] == 3
+    client.close()
+
+
+def test_numpy_vector_index_matches_exact_search(tmp_path):
+    import numpy as np
+    from app.database.vector_index import NumpyVectorIndex
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    
+    class FakeCollection:
+        name = "products"
+        
+        def get(self, include):
+            return {
+                "ids": [f"doc-{i}" for i in range(50)],
+                "embeddings": vectors,
+                "documents": [f"document {i}" for i in range(50)],
+                "metadatas": [{"source": "products_db"} for _ in range(50)]
+            }
+    
+    assert NumpyVectorIndex.export_from_collection(FakeCollection(), str(tmp_path)) == 50
+    
+    # Queries are embedded to a perturbed copy of documents 7 and 31
+    embed = lambda texts: [vectors[int(text)] + 0.01 for text in texts]
+    index = NumpyVectorIndex.load(str(tmp_path), "products", embed)
+    assert isinstance(index.vectors, np.memmap)
+    
+    results = index.query(query_texts=["7", "31"], n_results=3)
+    assert [row[0] for row in results["ids"]] == ["doc-7", "doc-31"]
+    assert results["documents"][0][0] == "document 7"
+    assert all(row == sorted(row) for row in results["distances"])
+    
+    # Top-k agrees with a full sort of the exact similarities
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = (vectors[7] + 0.01) / np.linalg.norm(vectors[7] + 0.01)
+    expected = [f"doc-{i}" for i in np.argsort(-(unit @ query))[:3]]
+    assert results["ids"][0] == expected
+
+
+@pytest.mark.asyncio
+async def test_vector_index_follows_collection_changes(tmp_path, monkeypatch):
+    import numpy as np
+    from app.core.config import settings
+    from app.database.vector_index import NumpyVectorIndex
+    
+    monkeypatch.setattr(settings, "RETRIEVAL_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "VECTOR_INDEX_DIRECTORY", str(tmp_path))
+    
+    class FakeCollection:
+        name = "products"
+        
+        def __init__(self, size):
+            self.size = size
+            self.queries = 0
+        
+        def count(self):
+            return self.size
+        
+        def get(self, include):
+            return {
+                "ids": [f"doc-{i}" for i in range(self.size)],
+                "embeddings": np.eye(self.size, 4, dtype=np.float32),
+                "documents": [f"document {i}" for i in range(self.size)],
+                "metadatas": [{"source": "numpy"} for _ in range(self.size)]
+            }
+        
+        def query(self, query_texts, n_results):
+            self.queries += 1
+            return {"ids": [["doc-0"]], "documents": [["document 0"]], "metadatas": [{}], "distances": [[0.0]]}
+    
+    collection = FakeCollection(2)
+    NumpyVectorIndex.export_from_collection(collection, str(tmp_path))
+    client = ChromaClient(batching_enabled=False, hybrid_search=False)
+    client.products_collection = collection
+    client._embedding_function = lambda texts: [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+    client.load_vector_indexes()
+    assert len(client.vector_indexes["products"]) == 2
+    
+    # The knowledge base grew without a new export: fall back to Chroma
+    collection.size = 3
+    await client.refresh_indexes()
+    assert "products" not in client.vector_indexes
+    await client.query_many(collection, ["anything"], 1)
+    assert collection.queries == 1
+    
+    # A newer export on disk is mapped again
+    NumpyVectorIndex.export_from_collection(collection, str(tmp_path))
+    await client.refresh_indexes()
+    assert len(client.vector_indexes["products"]) == 3
+    await client.query_many(collection, ["anything"], 1)
+    assert collection.queries == 1
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_lexical_and_vector_results():
+    documents = {
+        "premium": "Premium Plan: advanced analytics and priority support for $99",
+        "basic": "Basic Plan: core features for small teams at $29",
+        "error": "Error 500 after login: clear the session cookie and sign in again"
+    }
+    
+    class FakeCollection:
+        name = "products"
+        
+        def __init__(self):
+            self.calls = []
+        
+        def get(self, include):
+            return {"ids": list(documents), "documents": list(documents.values()), "metadatas": [{} for _ in documents]}
+        
+        def query(self, query_texts, n_results):
+            # Dense ranking that puts the exact error-code match last
+            self.calls.append(list(query_texts))
+            ids = ["premium", "basic", "error"][:n_results]
+            return {
+                "ids": [ids for _ in query_texts],
+                "documents": [[documents[i] for i in ids] for _ in query_texts],
+                "metadatas": [[{"source": "vector"} for _ in ids] for _ in query_texts],
+                "distances": [[0.2, 0.4, 0.9][:n_results] for _ in query_texts]
+            }
+    
+    client = ChromaClient(batching_enabled=False, hybrid_search=False)
+    client.products_collection = FakeCollection()
+    client.hybrid_search = True
+    client.build_lexical_indexes()
+    
+    # Keyword query covered by the BM25 vocabulary: no vector search
+    results = await client.search_products("premium plan", limit=2)
+    assert results[0]["content"].startswith("Premium Plan")
+    assert client.products_collection.calls == []
+    
+    # Exact token the dense ranking misses is lifted by fusion
+    results = await client.search_products("site shows error 500 whenever I try to log in", limit=2)
+    assert len(client.products_collection.calls) == 1
+    assert results[0]["content"].startswith("Error 500")
+    assert results[0]["source"] == "vector"
+    
+    # Scores stay vector distances; the fusion score is reported on its own
+    assert results[0]["score"] == 0.9
+    assert results[0]["fused_score"] > results[1]["fused_score"]
+    
+    stats = client.get_stats()
+    assert (stats["lexical_queries"], stats["hybrid_queries"]) == (1, 1)
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_lexical_index_rebuilds_after_knowledge_base_reload():
+    documents = {"basic": "Basic Plan: core features for small teams at $29"}
+    
+    class FakeCollection:
+        name = "products"
+        
+        def get(self, include):
+            return {"ids": list(documents), "documents": list(documents.values()), "metadatas": [{} for _ in documents]}
+    
+    client = ChromaClient(batching_enabled=False, hybrid_search=False)
+    client.products_collection = FakeCollection()
+    client.hybrid_search = True
+    client.build_lexical_indexes()
+    assert await client.search_products("enterprise", limit=1, mode="lexical") == []
+    
+    documents["enterprise"] = "Enterprise Plan: single sign-on and audit logs"
+    await client.refresh_indexes()
+    results = await client.search_products("enterprise", limit=1, mode="lexical")
+    assert results[0]["content"].startswith("Enterprise Plan")
+    assert results[0]["score"] == 1.0
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_prefetched_searches_are_reused_or_cancelled():
+    import asyncio
+    
+    client = ChromaClient(batching_enabled=False, hybrid_search=False)
+    searched = []
+    
+    async def fake_search(query, limit=5, mode=None):
+        searched.append(query)
+        await asyncio.sleep(0.05 if query.startswith("refund") else 1.0)
+        return [{"content": query, "source": "faqs", "score": 0.1}]
+    
+    client.search_products = client.search_faqs = fake_search
+    
+    with client.prefetch([("faqs", "refund policy late order", 3), ("products", "late order", 5)]) as tasks:
+        # Both searches are already running before the agent asks for one
+        await asyncio.sleep(0)
+        assert len(searched) == 2
+        
+        docs = await client.search("faqs", "refund policy late order", 3)
+        assert docs[0]["content"] == "refund policy late order"
+        unused = tasks[("products", "late order", 5)]
+    
+    await asyncio.sleep(0)
+    assert unused.cancelled()
+    assert len(searched) == 2
+    assert (client.stats["prefetch_hits"], client.stats["prefetch_wasted"]) == (1, 1)
+    
+    # Outside the block searches run normally
+    await client.search("products", "late order", 5)
+    assert len(searched) == 3
+    client.close()
+
+
+class FakeBinaryRedis:
+    """Just enough of redis.asyncio (bytes responses) for the checkpointer"""
+    
+    def __init__(self):
+        self.hashes = {}
+        self.lists = {}
+        self.expiring = set()
+    
+    @staticmethod
+    def _bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+    
+    def pipeline(self, transaction=True):
+        redis = self
+        calls = []
+        
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs))
+            
+            async def execute(self):
+                return [await getattr(redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+        
+        return Pipeline()
+    
+    async def hset(self, key, field=None, value=None, mapping=None):
+        items = mapping.items() if mapping else [(field, value)]
+        self.hashes.setdefault(key, {}).update({self._bytes(k): self._bytes(v) for k, v in items})
+    
+    async def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(self._bytes(field), self._bytes(value))
+    
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+    
+    async def lpush(self, key, *values):
+        self.lists.setdefault(key, [])[:0] = [self._bytes(value) for value in reversed(values)]
+    
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+    
+    async def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+    
+    async def lindex(self, key, index):
+        items = self.lists.get(key, [])
+        return items[index] if index < len(items) else None
+    
+    async def expire(self, key, ttl):
+        self.expiring.add(key)
+    
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+            self.lists.pop(key, None)
+    
+    async def scan_iter(self, match="*", count=None):
+        import fnmatch
+        for key in list(self.hashes) + list(self.lists):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+@pytest.mark.asyncio
+async def test_redis_checkpointer_shares_bounded_state():
+    import operator
+    from typing import Annotated, TypedDict
+    from langgraph.graph import StateGraph, END
+    from app.database.redis_checkpointer import RedisCheckpointSaver
+    
+    class State(TypedDict):
+        turns: Annotated[int, operator.add]
+    
+    def build(checkpointer):
+        graph = StateGraph(State)
+        graph.add_node("count", lambda state: {"turns": 1})
+        graph.set_entry_point("count")
+        graph.add_edge("count", END)
+        return graph.compile(checkpointer=checkpointer)
+    
+    redis = FakeBinaryRedis()
+    config = {"configurable": {"thread_id": "conv_1"}}
+    
+    worker_a = build(RedisCheckpointSaver(redis, ttl=60, max_checkpoints=3))
+    worker_b = build(RedisCheckpointSaver(redis, ttl=60, max_checkpoints=3))
+    
+    # Turns alternate between workers and still see one conversation state
+    await worker_a.ainvoke({"turns": 0}, config)
+    state = await worker_b.aget_state(config)
+    assert state.values["turns"] == 1
+    await worker_b.ainvoke({"turns": 0}, config)
+    await worker_a.ainvoke({"turns": 0}, config)
+    assert (await worker_b.aget_state(config)).values["turns"] == 3
+    
+    # Only the latest checkpoints survive, and every key expires
+    assert len(redis.lists["checkpoint_index:conv_1:"]) == 3
+    checkpoint_keys = [key for key in redis.hashes if key.startswith("checkpoint:")]
+    assert len(checkpoint_keys) == 3
+    assert set(checkpoint_keys) <= redis.expiring
+    history = [snapshot async for snapshot in worker_a.aget_state_history(config)]
+    assert len(history) == 3
+    
+    await worker_a.checkpointer.adelete_thread("conv_1")
+    assert (await worker_b.aget_state(config)).values == {}
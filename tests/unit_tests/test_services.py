@@ -21,4 +21,935 @@ async def test_cache_service():
     cache = CacheService()
     await cache.cache_ai_response("ProductAgent", "test", {"response": "test"})
     cached = await cache.get_ai_response_cache("ProductAgent", "test")
-    assert cached is not None
\ No newline at end of file
+    assert cached is not None
+
+def test_resource_registry_loads_once():
+    from app.services.resource_registry import ResourceRegistry
+    
+    registry = ResourceRegistry()
+    calls = []
+    factory = lambda: calls.append(1) or object()
+    
+    first = registry._get_or_load("dummy", factory)
+    second = registry._get_or_load("dummy", factory)
+    
+    assert first is second
+    assert len(calls) == 1
+    assert registry.get_stats()["resources"]["dummy"]["status"] == "loaded"
+
+
+def test_resource_registry_counts_nested_loads_once():
+    import time
+    from app.services.resource_registry import ResourceRegistry
+    
+    # A resource loaded inside another's factory is only counted under its own name
+    registry = ResourceRegistry()
+    
+    def slow(seconds):
+        time.sleep(seconds)
+        return object()
+    
+    registry._get_or_load("parent", lambda: registry._get_or_load("child", lambda: slow(0.2)) and slow(0.05))
+    resources = registry.get_stats()["resources"]
+    assert resources["child"]["load_time_seconds"] >= 0.2
+    assert resources["parent"]["load_time_seconds"] < 0.15
+
+
+@pytest.mark.asyncio
+async def test_registry_loads_tokenizer_off_the_event_loop():
+    import threading
+    from types import SimpleNamespace
+    from app.services.resource_registry import ResourceRegistry
+    
+    # Requests estimate until the startup load hands the tokenizer to the context builder
+    registry = ResourceRegistry()
+    builder = registry.get_context_builder()
+    assert builder.count_tokens("twelve chars") == 3
+    
+    loaded_on = []
+    tokenizer = SimpleNamespace(encode=lambda text, add_special_tokens: text.split())
+    registry.get_tokenizer = lambda: loaded_on.append(threading.current_thread()) or tokenizer
+    await registry.load_tokenizer()
+    assert loaded_on and loaded_on[0] is not threading.main_thread()
+    assert builder.count_tokens("twelve chars") == 2
+    
+    # A failed load leaves the estimate in place
+    registry = ResourceRegistry()
+    registry.get_tokenizer = lambda: 1 / 0
+    await registry.load_tokenizer()
+    assert registry.get_context_builder().count_tokens("twelve chars") == 3
+
+
+@pytest.mark.asyncio
+async def test_pooled_http_client_reuses_client():
+    import httpx
+    from app.services.http_client import PooledHTTPClient
+    
+    client = PooledHTTPClient(per_host_limit=2)
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    )
+    
+    responses = [await client.post("https://example.com/models/test", json={}) for _ in range(3)]
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert client.get_stats()["requests"] == 3
+    assert client.get_stats()["in_flight"] == 0
+    await client.aclose()
+
+
+class KeywordEmbeddings:
+    """Deterministic stand-in for the sentence-transformers model"""
+    
+    vocabulary = ["price", "plan", "refund", "money", "login", "error", "hello"]
+    
+    def embed_documents(self, texts):
+        return [
+            [float(word in text.lower()) for word in self.vocabulary] + [0.01]
+            for text in texts
+        ]
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.mark.asyncio
+async def test_local_intent_classifier():
+    from app.services.intent_classifier import EmbeddingIntentClassifier
+    
+    classifier = EmbeddingIntentClassifier(
+        KeywordEmbeddings(),
+        prototypes={
+            "product_inquiry": ["price of the plan"],
+            "refund_request": ["refund my money"],
+            "technical_issue": ["login error"]
+        }
+    )
+    
+    result = await classifier.classify(
+        "I need a refund", ["product_inquiry", "refund_request", "technical_issue"]
+    )
+    
+    assert result["labels"][0] == "refund_request"
+    assert abs(sum(result["scores"]) - 1.0) < 1e-6
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_coalesces_concurrent_calls():
+    import asyncio
+    from app.services.micro_batcher import MicroBatcher
+    
+    batches = []
+    
+    async def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+    
+    batcher = MicroBatcher(double, max_batch_size=4, max_wait_ms=5)
+    results = await asyncio.gather(*[batcher.submit(i) for i in range(6)])
+    
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert [len(batch) for batch in batches] == [4, 2]
+    assert batcher.get_stats()["items"] == 6
+    
+    # A cancelled batch releases its callers instead of leaving them waiting
+    async def cancelled(items):
+        raise asyncio.CancelledError()
+    
+    batcher = MicroBatcher(cancelled, max_batch_size=2, max_wait_ms=5)
+    results = await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit(i) for i in range(2)], return_exceptions=True), 1.0
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_matches_paraphrases():
+    from app.services.semantic_cache import SemanticCache
+    
+    cache = SemanticCache(
+        KeywordEmbeddings(),
+        similarity_threshold=0.9,
+        near_miss_threshold=0.5,
+        max_entries_per_agent=2
+    )
+    
+    await cache.store("ProductAgent", "What is the price of the plan?", {"content": "$99"})
+    
+    hit = await cache.lookup("ProductAgent", "plan price please")
+    assert hit["content"] == "$99"
+    assert await cache.lookup("RefundAgent", "plan price please") is None
+    
+    # Entity tokens such as order IDs must match exactly
+    await cache.store("RefundAgent", "refund money for ORD001", {"content": "approved"})
+    assert await cache.lookup("RefundAgent", "refund money for ORD002") is None
+    
+    # Capacity is bounded per agent
+    await cache.store("ProductAgent", "login error", {"content": "a"})
+    await cache.store("ProductAgent", "hello", {"content": "b"})
+    assert cache.get_stats()["evictions"] == 1
+    
+    # Every expired match is skipped, not just the nearest one
+    await cache.store("TechnicalAgent", "login error", {"content": "old"})
+    await cache.store("TechnicalAgent", "login error hello", {"content": "older"})
+    for entry in cache._indexes["TechnicalAgent"].entries.values():
+        entry["expires_at"] = 0
+    cache.similarity_threshold = 0.8
+    assert await cache.lookup("TechnicalAgent", "login error hello") is None
+    assert cache.get_stats()["expirations"] == 2
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+    
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeCacheRedis:
+    def __init__(self):
+        self.redis = self
+        self.data = {}
+        self.sets = {}
+        self.gets = 0
+        self.published = []
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+    
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+    
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+    
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+    
+    async def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+    
+    async def expire(self, key, ttl, **kwargs):
+        return True
+    
+    async def exists(self, key):
+        return int(key in self.data)
+    
+    async def unlink(self, *keys):
+        return sum(self.data.pop(key, None) is not None or self.sets.pop(key, None) is not None for key in keys)
+    
+    async def scan_iter(self, match="*", count=None):
+        import fnmatch
+        for key in list(self.data) + list(self.sets):
+            if fnmatch.fnmatch(key, match):
+                yield key
+    
+    async def sscan_iter(self, key, count=None):
+        for member in list(self.sets.get(key, ())):
+            yield member
+    
+    async def publish(self, channel, message):
+        self.published.append(message)
+
+
+@pytest.mark.asyncio
+async def test_cache_service_local_tier():
+    import json
+    
+    redis_client = FakeCacheRedis()
+    service = CacheService(redis_client=redis_client)
+    service._invalidation_task = "disabled"  # no pub/sub listener in unit tests
+    
+    await service.cache_product_info("P1", {"name": "Premium"})
+    assert (await service.get_product_cache("P1"))["name"] == "Premium"
+    assert redis_client.gets == 0
+    
+    # Another worker's write evicts the local copy; the next read goes to Redis
+    cache_key = service._generate_cache_key("product_info", "P1")
+    redis_client.data[cache_key] = json.dumps({"name": "Premium v2"})
+    service._apply_invalidation(json.dumps({"origin": "other", "keys": [cache_key]}))
+    assert (await service.get_product_cache("P1"))["name"] == "Premium v2"
+    assert redis_client.gets == 1
+    
+    stats = await service.get_cache_stats(include_keyspace=False)
+    assert stats["tiers"]["l1"]["hits"] == 1
+    assert stats["tiers"]["l2"]["hits"] == 1
+    assert stats["hit_rate"] == 1.0
+    assert stats["cache_types"]["product_info"]["sets"] == 1
+    assert stats["latency"]["get_l2"]["count"] == 1
+
+
+def test_latency_histogram_prometheus_lines():
+    from app.core.metrics import LatencyHistogram
+    
+    histogram = LatencyHistogram(buckets=(0.001, 0.01))
+    for seconds in (0.0005, 0.005, 0.005, 0.5):
+        histogram.observe(seconds)
+    
+    assert histogram.snapshot()["p50_ms"] == 10.0
+    lines = histogram.prometheus_lines("op_seconds", {"operation": "get"})
+    assert 'op_seconds_bucket{operation="get",le="0.001"} 1' in lines
+    assert 'op_seconds_bucket{operation="get",le="0.01"} 3' in lines
+    assert 'op_seconds_bucket{operation="get",le="+Inf"} 4' in lines
+    assert 'op_seconds_count{operation="get"} 4' in lines
+
+
+@pytest.mark.asyncio
+async def test_cache_service_invalidation(monkeypatch):
+    import json
+    from app.core.config import settings
+    from app.services.semantic_cache import SemanticCache
+    
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_BATCH_SIZE", 2)
+    redis_client = FakeCacheRedis()
+    service = CacheService(redis_client=redis_client)
+    service._invalidation_task = "disabled"
+    service._semantic_cache = SemanticCache(KeywordEmbeddings(), similarity_threshold=0.9)
+    
+    for i in range(5):
+        await service.cache_ai_response("ProductAgent", f"question {i}", {"content": str(i)})
+    await service.cache_ai_response("RefundAgent", "refund", {"content": "ok"})
+    await service.cache_ai_response("TechnicalAgent", "login error", {"content": "reset"})
+    await service.cache_product_info("P1", {"name": "Premium"})
+    
+    # Invalidated responses aren't served by the semantic layer either
+    assert (await service.get_ai_response_cache("RefundAgent", "refund please"))["cache_layer"] == "semantic"
+    assert await service.invalidate_tag("agent:RefundAgent") == 1
+    assert await service.get_ai_response_cache("RefundAgent", "refund") is None
+    assert await service.get_ai_response_cache("RefundAgent", "refund please") is None
+    assert json.loads(redis_client.published[-1])["agents"] == ["RefundAgent"]
+    
+    cached = await service.get_ai_response_cache("TechnicalAgent", "login error")
+    assert await service.invalidate_cache("ai_response", cached["cache_key"][len("ai_resp:"):])
+    assert await service.get_ai_response_cache("TechnicalAgent", "login error please") is None
+    
+    # Prefix flushes are batched and also clear this worker's L1
+    assert await service.invalidate_prefix("ai_response") == 5
+    assert await service.get_ai_response_cache("ProductAgent", "question 0") is None
+    assert await service.get_product_cache("P1") is not None
+    assert json.loads(redis_client.published[-1])["prefixes"] == ["ai_resp:"]
+    
+    # Tag members whose keys are gone get pruned
+    assert await service.clear_expired_cache() == 6
+
+
+@pytest.mark.asyncio
+async def test_knowledge_base_invalidation_refreshes_search_indexes(monkeypatch):
+    import asyncio
+    import json
+    from app.services.resource_registry import resource_registry
+    
+    class FakeChroma:
+        refreshes = 0
+        
+        async def refresh_indexes(self):
+            self.refreshes += 1
+    
+    chroma_client = FakeChroma()
+    monkeypatch.setattr(resource_registry, "get_loaded", lambda name: chroma_client)
+    redis_client = FakeCacheRedis()
+    service = CacheService(redis_client=redis_client)
+    service._invalidation_task = "disabled"
+    
+    # This worker rebuilds its indexes and tells the others to do the same
+    await service.invalidate_knowledge_base()
+    await asyncio.sleep(0)
+    assert chroma_client.refreshes == 1
+    assert json.loads(redis_client.published[-1])["knowledge_base"] is True
+    
+    service._apply_invalidation(json.dumps({"origin": "other", "knowledge_base": True}))
+    await asyncio.sleep(0)
+    assert chroma_client.refreshes == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_sink_forwards_tokens():
+    import asyncio
+    from app.services.huggingface_client import StreamingCallbackHandler
+    from app.services.streaming import StreamSink, bind_sink, current_sink, emit_event, emit_full_response
+    
+    # Nothing is emitted outside a streaming request
+    await emit_event("intent", {"intent": "refund_request"})
+    assert current_sink() is None
+    
+    sink = StreamSink(max_buffered_events=2)
+    
+    async def produce():
+        with bind_sink(sink):
+            handler = StreamingCallbackHandler(current_sink())
+            for token in ["Hel", "lo"]:
+                await handler.on_llm_new_token(token)
+            # Already streamed, so the full text is not repeated
+            await emit_full_response("Hello")
+            await emit_event("done", {"response": "".join(handler.tokens)})
+            await sink.close()
+    
+    # The producer blocks on the small buffer until the consumer catches up
+    producer = asyncio.create_task(produce())
+    events = [event async for event in sink.events()]
+    await producer
+    
+    assert [event["event"] for event in events] == ["token", "token", "done"]
+    assert events[-1]["data"]["response"] == "Hello"
+
+
+@pytest.mark.asyncio
+async def test_langchain_adapters_are_async():
+    from app.services.huggingface_client import ChromaRetriever, HuggingFaceAPILLM
+    
+    class FakeChroma:
+        async def search_products(self, query, limit=5):
+            return [{"content": f"product {i}", "source": "products"} for i in range(limit)]
+    
+    class FakeClient:
+        models = {"generation": "fake/generation-model"}
+        
+        async def _generate_with_api(self, prompt, max_length):
+            return "Premium costs $99.\nHuman: anything else?"
+        
+        async def _stream_with_api(self, prompt, max_length):
+            for token in ["Premium", " costs", " $99"]:
+                yield token
+    
+    retriever = ChromaRetriever(FakeChroma(), k=2)
+    docs = await retriever.ainvoke("premium price")
+    assert [doc.page_content for doc in docs] == ["product 0", "product 1"]
+    
+    llm = HuggingFaceAPILLM(client=FakeClient())
+    assert await llm.ainvoke("price?", stop=["\nHuman:"]) == "Premium costs $99."
+    assert [chunk async for chunk in llm.astream("price?")] == ["Premium", " costs", " $99"]
+    
+    # Sync entry points refuse to block a running loop instead of nesting asyncio.run
+    with pytest.raises(RuntimeError):
+        retriever.invoke("premium price")
+
+
+def test_keyword_automaton_matches_substring_scan():
+    from app.core.keywords import KEYWORD_CATEGORIES, KeywordAutomaton
+    
+    automaton = KeywordAutomaton(KEYWORD_CATEGORIES, cache_size=0)
+    messages = [
+        "I want refund for my order, what is the return policy?",
+        "Login fails with error code 500 and the app hangs",
+        "How much does the Premium plan cost? Any features for API users?",
+        "Stack trace shows an exception when the server connection times out",
+        "hello there"
+    ]
+    
+    for message in messages:
+        text = message.lower()
+        expected = {
+            category: sum(1 for keyword in keywords if keyword in text)
+            for category, keywords in KEYWORD_CATEGORIES.items()
+        }
+        hits = automaton.scan(message)
+        assert {category: hits[category] for category in KEYWORD_CATEGORIES} == expected
+    
+    # Overlapping keywords are all reported
+    assert sorted(automaton.matches("return policy")) == ["policy", "return", "return policy"]
+    
+    # Categories are tried in the caller's priority order
+    categories = ["issue.login_issues", "issue.api_errors"]
+    assert automaton.first_match("Login fails with error code 500", categories) == "issue.login_issues"
+    assert automaton.first_match("hello there", categories, default="none") == "none"
+
+
+@pytest.mark.asyncio
+async def test_intent_cascade_skips_remote_when_confident():
+    import asyncio
+    from app.services.intent_router import IntentCascade
+    
+    labels = ["product_inquiry", "refund_request", "technical_issue", "general_question"]
+    
+    class FakeClient:
+        local_classifier = None
+        
+        def __init__(self):
+            self.remote_calls = 0
+        
+        async def classify_text(self, text, candidate_labels):
+            self.remote_calls += 1
+            return {"labels": candidate_labels, "scores": [0.1, 0.7, 0.1, 0.1]}
+    
+    client = FakeClient()
+    cascade = IntentCascade(client, shadow_rate=0.0)
+    
+    # Keywords plus an order ID decide without the remote classifier
+    scores, tier = await cascade.classify("I want a refund for order #12345", labels)
+    assert tier == "rules"
+    assert max(scores, key=scores.get) == "refund_request"
+    assert client.remote_calls == 0
+    
+    # Ambiguous messages escalate once, then repeats are served from the cache
+    scores, tier = await cascade.classify("Something is off with what I got", labels)
+    assert tier == "remote"
+    scores, tier = await cascade.classify("  something is OFF with what I got ", labels)
+    assert tier == "cache"
+    assert client.remote_calls == 1
+    
+    # Shadow checks score fast-path decisions against the remote classifier
+    cascade.shadow_rate = 1.0
+    await cascade.classify("Refund my order 98765 please", labels)
+    await asyncio.gather(*cascade._shadow_tasks)
+    
+    stats = cascade.get_stats()
+    assert stats["remote_calls_avoided"] == 3
+    assert stats["tiers"]["rules"]["accuracy"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_intent_cascade_ignores_degraded_classifications():
+    import asyncio
+    from types import SimpleNamespace
+    from app.core.deadlines import current_deadline, deadline_scope
+    from app.services.circuit_breaker import CircuitOpenError
+    from app.services.huggingface_client import LangChainHuggingFaceClient
+    from app.services.intent_router import IntentCascade
+    
+    labels = ["product_inquiry", "refund_request", "technical_issue", "general_question"]
+    
+    # With the circuit open, local classifier answers are flagged as a fallback
+    async def circuit_open(texts, candidate_labels):
+        raise CircuitOpenError("classification", 30)
+    
+    async def local_batch(texts, candidate_labels):
+        return [{"labels": candidate_labels, "scores": [0.1, 0.7, 0.1, 0.1]} for _ in texts]
+    
+    degraded_client = SimpleNamespace(
+        _classify_with_api=circuit_open,
+        local_classifier=SimpleNamespace(aclassify_batch=local_batch)
+    )
+    result = (await LangChainHuggingFaceClient.classify_texts(degraded_client, ["anything"], labels))[0]
+    assert result["fallback"] and result["backend"] == "local"
+    
+    class FakeClient:
+        local_classifier = None
+        
+        def __init__(self):
+            self.deadlines = []
+        
+        async def classify_text(self, text, candidate_labels):
+            self.deadlines.append(current_deadline())
+            return {**(await local_batch([text], candidate_labels))[0], "fallback": True}
+    
+    client = FakeClient()
+    cascade = IntentCascade(client, shadow_rate=1.0)
+    
+    # Fallback answers are neither cached nor counted as agreement with the remote tier
+    for _ in range(2):
+        scores, tier = await cascade.classify("Something is off with what I got", labels)
+        assert tier == "remote"
+    
+    # Shadow checks run without the request's deadline
+    with deadline_scope(5):
+        await cascade.classify("Refund my order 98765 please", labels)
+    await asyncio.gather(*cascade._shadow_tasks)
+    assert client.deadlines[-1] is None
+    assert cascade.get_stats()["tiers"]["rules"]["shadow_checks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_conversation_memory_is_bounded_per_conversation():
+    from app.services.conversation_memory import ConversationMemoryStore
+    
+    class FakeRedisClient:
+        async def get_conversation_history(self, conversation_id, limit=10):
+            # Newest first, as stored by RedisClient
+            return [
+                {"type": "assistant", "content": "Premium costs $99"},
+                {"type": "user", "content": "How much is Premium?"}
+            ] if conversation_id == "c1" else []
+    
+    memory = ConversationMemoryStore(FakeRedisClient(), max_tokens=40, max_conversations=2)
+    
+    # Evicted or new conversations are rebuilt from Redis history
+    assert await memory.format_history("c1") == "Human: How much is Premium?\nAssistant: Premium costs $99"
+    assert await memory.format_history("c2") == ""
+    
+    # Conversations don't share history, and each window stays within its token budget
+    for i in range(20):
+        await memory.add_turn("c2", f"question number {i} about my order", f"answer number {i} for you")
+    window = memory.peek("c2")
+    assert sum(turn["tokens"] for turn in window) <= 40
+    assert window[-1]["content"] == "answer number 19 for you"
+    assert memory.peek("c1")[0]["content"] == "How much is Premium?"
+    assert await memory.get_pairs("c2") == [
+        ("question number 18 about my order", "answer number 18 for you"),
+        ("question number 19 about my order", "answer number 19 for you")
+    ]
+    
+    # Least recently used conversations are evicted from the process
+    await memory.add_turn("c3", "hi", "hello")
+    assert memory.peek("c1") == []
+    assert memory.get_stats()["loads"] == 3
+
+
+def test_context_builder_packs_budget():
+    from app.services.context_builder import ContextBuilder, document_chunks
+    
+    class WordTokenizer:
+        name_or_path = "words"
+        
+        def encode(self, text, add_special_tokens=False):
+            return text.split()
+    
+    builder = ContextBuilder(WordTokenizer(), dedup_threshold=0.8)
+    documents = [
+        {"content": "Refunds are issued within 30 days of purchase for unused items", "score": 0.1},
+        {"content": "refunds are issued within 30 days of purchase for unused items!", "score": 0.2},
+        {"content": "Premium subscriptions can be cancelled at any time from the billing page", "score": 0.9}
+    ]
+    chunks = [{"pinned": True, "text": "Standard refund period: 30 days"}] + document_chunks(documents) + [
+        {"score": 0.1, "text": "Guidelines: be empathetic and professional"}
+    ]
+    
+    # Pinned text and the best document fit; the overlapping copy is dropped as a duplicate
+    context = builder.build("refund", chunks, budget=21)
+    assert context.split("\n\n") == [
+        "Standard refund period: 30 days",
+        "Refunds are issued within 30 days of purchase for unused items",
+        "Guidelines: be empathetic and professional"
+    ]
+    assert builder.count_tokens(context) <= 21
+    
+    stats = builder.get_stats()["agents"]["refund"]
+    assert (stats["chunks_kept"], stats["duplicates"], stats["chunks_dropped"]) == (3, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_and_recovers():
+    import httpx
+    from app.services.circuit_breaker import CircuitOpenError
+    from app.services.http_client import PooledHTTPClient
+    
+    now = [0.0]
+    client = PooledHTTPClient(circuit_breaker_enabled=True)
+    url = "https://api-inference.huggingface.co/models/facebook/bart-large-mnli"
+    status = [503]
+    calls = []
+    
+    async def fake_post(url, **kwargs):
+        calls.append(url)
+        return httpx.Response(status[0])
+    
+    client._post = fake_post
+    breaker = client._get_breaker(url)
+    breaker._clock = lambda: now[0]
+    breaker.min_requests, breaker.open_seconds, breaker.half_open_max_calls = 4, 10.0, 1
+    
+    # Model loading (503) trips the circuit once the window has enough calls
+    for _ in range(4):
+        await client.post(url)
+    assert breaker.state == "open"
+    
+    # While open, callers fail immediately without touching the endpoint
+    with pytest.raises(CircuitOpenError):
+        await client.post(url)
+    assert len(calls) == 4
+    
+    # After the cool-down one trial call is let through and closes the circuit
+    now[0] = 11.0
+    status[0] = 200
+    await client.post(url)
+    assert breaker.state == "closed"
+    
+    circuit = client.get_circuit_states()["models/facebook/bart-large-mnli"]
+    assert circuit["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+    assert circuit["short_circuited"] == 1
+    assert 'circuit_breaker_state{breaker="models/facebook/bart-large-mnli"} 0' in client.circuit_prometheus_lines()
+
+def test_circuit_breaker_counts_only_trial_calls_when_half_open():
+    from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+    
+    now = [0.0]
+    breaker = CircuitBreaker("test", min_requests=2, open_seconds=10.0, half_open_max_calls=1, clock=lambda: now[0])
+    
+    # A slow call admitted while closed is still running when the circuit opens
+    straggler = breaker.before_call()
+    assert straggler is None
+    for _ in range(2):
+        breaker.after_call(True, 0.1, breaker.before_call())
+    assert breaker.state == "open"
+    
+    now[0] = 11.0
+    probe = breaker.before_call()
+    assert probe is not None
+    
+    # The straggler finishing neither frees the trial slot nor closes the circuit
+    breaker.after_call(False, 0.1, straggler)
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.after_call(False, 0.1, probe)
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_hedged_call_within_request_deadline():
+    import asyncio
+    from app.core.deadlines import DeadlineExceeded, deadline_scope, timeout_for
+    from app.services.hedging import Hedger
+    
+    # Nested scopes never extend the outer deadline, and calls get what is left
+    with deadline_scope(5.0):
+        with deadline_scope(60.0):
+            assert timeout_for(30.0) <= 5.0
+        assert timeout_for(1.0) == 1.0
+    with deadline_scope(0.0):
+        with pytest.raises(DeadlineExceeded):
+            timeout_for(30.0)
+    
+    # A micro-batch lives as long as its latest member, not the caller that flushed it
+    from app.services.micro_batcher import MicroBatcher
+    
+    async def classify(texts):
+        return [timeout_for(30.0) for _ in texts]
+    
+    async def submit(batcher, text, seconds):
+        with deadline_scope(seconds):
+            return await batcher.submit(text)
+    
+    batcher = MicroBatcher(classify, max_batch_size=4, max_wait_ms=50)
+    timeouts = await asyncio.gather(submit(batcher, "a", 0.01), submit(batcher, "b", 5.0))
+    assert all(1.0 < timeout <= 5.0 for timeout in timeouts)
+    
+    hedger = Hedger("generation", quantile=0.95, min_samples=5, max_hedge_rate=0.5)
+    for _ in range(5):
+        hedger._samples.append(0.01)
+    
+    attempts, cancelled = [], []
+    
+    async def make_call():
+        attempts.append(len(attempts))
+        # The first attempt is stuck; the hedge answers quickly
+        delay = 5.0 if len(attempts) == 1 else 0.01
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+    
+    assert await hedger.call(make_call) == 0.01
+    await asyncio.sleep(0)
+    assert len(attempts) == 2
+    assert cancelled == [5.0]
+    assert hedger.get_stats()["hedge_wins"] == 1
+    
+    # With the hedge budget (half of calls) spent, the next slow call isn't doubled
+    hedger.stats["hedged"] = hedger.stats["calls"]
+    attempts.clear()
+    
+    async def slow_call():
+        attempts.append(len(attempts))
+        await asyncio.sleep(0.1)
+        return "slow"
+    
+    assert await hedger.call(slow_call) == "slow"
+    assert len(attempts) == 1
+    assert hedger.stats["hedges_skipped_budget"] == 1
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_identical_requests():
+    import asyncio
+    from types import SimpleNamespace
+    from app.services.single_flight import SingleFlight
+    
+    runs = []
+    
+    async def answer():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"content": "We're investigating the outage"}
+    
+    # Concurrent duplicates in one process share the first execution
+    flight = SingleFlight(distributed=False)
+    results = await asyncio.gather(*[flight.do("TechnicalAgent:is the site down:", answer) for _ in range(10)])
+    assert len(runs) == 1
+    assert sum(shared for _, shared in results) == 9
+    assert flight.get_stats()["coalesced_local"] == 9
+    assert flight.get_stats()["in_flight"] == 0
+    
+    # The shared run doesn't stream into the first caller's sink, which may have no reader
+    from app.services.streaming import StreamSink, bind_sink, current_sink
+    
+    async def sink_free_answer():
+        assert current_sink() is None
+        return await answer()
+    
+    with bind_sink(StreamSink(max_buffered_events=1)):
+        assert (await flight.do("sink", sink_free_answer))[1] is False
+    
+    # A follower stops waiting on a stuck run and answers itself
+    stuck = asyncio.Event()
+    
+    async def hang():
+        await stuck.wait()
+    
+    flight.wait_timeout = 0.05
+    leader = asyncio.ensure_future(flight.do("stuck", hang))
+    await asyncio.sleep(0)
+    assert await flight.do("stuck", answer) == ({"content": "We're investigating the outage"}, False)
+    assert flight.get_stats()["local_wait_timeouts"] == 1
+    stuck.set()
+    await leader
+    
+    # Across workers the lock holder runs it and the other picks up the published result
+    class FakeLockRedis:
+        def __init__(self):
+            self.data = {}
+        async def set(self, key, value, nx=False, px=None):
+            if nx and key in self.data:
+                return None
+            self.data[key] = value
+            return True
+        async def eval(self, script, numkeys, key, token):
+            if self.data.get(key) == token:
+                del self.data[key]
+        async def exists(self, key):
+            return key in self.data
+    
+    redis_client = SimpleNamespace(redis=FakeLockRedis())
+    published = {}
+    
+    async def run_and_publish():
+        published["answer"] = await answer()
+        return published["answer"]
+    
+    async def lookup():
+        return published.get("answer")
+    
+    runs.clear()
+    workers = [SingleFlight(redis_client, distributed=True, poll_interval=0.01) for _ in range(2)]
+    (first, first_shared), (second, second_shared) = await asyncio.gather(
+        workers[0].do("key", run_and_publish, lookup),
+        workers[1].do("key", run_and_publish, lookup)
+    )
+    assert len(runs) == 1
+    assert first == second
+    assert [first_shared, second_shared] == [False, True]
+    assert workers[1].get_stats()["coalesced_remote"] == 1
+    assert redis_client.redis.data == {}
+
+
+class FakeIntentRouter:
+    async def classify_intent_with_tier(self, message):
+        return {"refund_request": 0.9, "product_inquiry": 0.1}, "rules"
+
+
+class FakeResponseCache:
+    def __init__(self):
+        self.data = {}
+    
+    async def get_ai_response_cache(self, agent_name, message, context=None):
+        return self.data.get((agent_name, message))
+    
+    async def cache_ai_response(self, agent_name, message, response, context=None):
+        self.data[(agent_name, message)] = {**response, "cache_layer": "exact"}
+
+
+class StreamingTestAgent:
+    """Streams its answer token by token when the request is streaming"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def retrieval_plan(self, query):
+        return []
+    
+    async def process_message(self, message):
+        import asyncio
+        from app.database.models import AgentResponse
+        from app.services.huggingface_client import StreamingCallbackHandler
+        from app.services.streaming import current_sink
+        
+        self.calls += 1
+        handler = StreamingCallbackHandler(current_sink())
+        for token in ["Your refund ", "is on ", "its way"]:
+            await handler.on_llm_new_token(token)
+            await asyncio.sleep(0.01)
+        return AgentResponse(
+            agent_name="RefundAgent",
+            content="Your refund is on its way",
+            confidence=0.8,
+            sources=["refund_policy"],
+            processing_time=0.03
+        )
+
+
+def make_test_orchestrator(agent=None):
+    """Real LangGraph workflow over fake routing, agents, cache and storage"""
+    import contextlib
+    from types import SimpleNamespace
+    from langgraph.checkpoint.memory import MemorySaver
+    from app.agents.orchestrator import LangGraphOrchestrator
+    from app.services.conversation_memory import ConversationMemoryStore
+    from app.services.single_flight import SingleFlight
+    
+    class FakeMessageStore:
+        async def store_messages(self, messages, background=False):
+            pass
+    
+    registry = SimpleNamespace(
+        get_llm_client=SimpleNamespace,
+        get_chroma_client=lambda: SimpleNamespace(prefetch=lambda searches: contextlib.nullcontext({})),
+        get_intent_router=lambda: None,
+        get_redis_client=FakeMessageStore,
+        get_conversation_memory=ConversationMemoryStore,
+        get_checkpointer=MemorySaver,
+        get_single_flight=SingleFlight
+    )
+    orchestrator = LangGraphOrchestrator(registry=registry, cache=FakeResponseCache())
+    orchestrator.router = FakeIntentRouter()
+    agent = agent or StreamingTestAgent()
+    orchestrator.agents = {name: agent for name in orchestrator.agents}
+    return orchestrator
+
+
+@pytest.mark.asyncio
+async def test_streamed_first_turn_streams_tokens():
+    orchestrator = make_test_orchestrator()
+    
+    # A first turn is shareable, but a streaming request still gets its tokens as they arrive
+    events = [event async for event in orchestrator.stream_message("u1", "refund please", "conv_a")]
+    tokens = [event["data"]["text"] for event in events if event["event"] == "token"]
+    assert tokens == ["Your refund ", "is on ", "its way"]
+    assert events[-1]["event"] == "done"
+    assert events[-1]["data"]["response"] == "Your refund is on its way"
+
+
+@pytest.mark.asyncio
+async def test_chat_api_reports_cache_status(monkeypatch):
+    import httpx
+    from app.api import chat_routes
+    from app.main import app
+    
+    agent = StreamingTestAgent()
+    monkeypatch.setattr(chat_routes, "orchestrator", make_test_orchestrator(agent))
+    
+    async def chat(message, conversation_id, **headers):
+        response = await client.post(
+            "/api/v1/chat",
+            json={"message": message, "user_id": "u1", "conversation_id": conversation_id},
+            headers=headers
+        )
+        assert response.status_code == 200
+        return response.json()["metadata"]["cache_status"]
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert await chat("refund please", "c1") == "miss"
+        assert await chat("refund please", "c2") == "exact_hit"
+        assert await chat("refund please", "c3", **{"X-Cache-Bypass": "true"}) == "bypass"
+        
+        # A follow-up depends on its conversation, so it is neither served from nor written to the cache
+        assert await chat("how long will it take?", "c1") == "context_dependent"
+        assert await chat("how long will it take?", "c4") == "miss"
+    
+    assert agent.calls == 4